@@ -1,15 +1,161 @@
 import streamlit as st
-import pandas as pd
-import os, time
-import plotly.express as px
+import numpy as np
+import time
 
-from src.model_loader import load_model
-from sklearn.metrics.pairwise import euclidean_distances
+from src.batch_scorer import BatchSummary
+from src.export import EXPORT_FORMATS, available_formats, export_predictions, format_prices
+from src.ingest import UPLOAD_TYPES, input_schema, read_upload
+from src.model_loader import load_model, load_prediction_cache, load_prediction_dispatcher
+from src.startup import timed_import
+from src.tracing import span, trace
+from src.validation import REJECT_REASON_COL, REJECT_ROW_COL, reject_column, validate_batch
 
-# --- Loading model & dataset ---
-MODEL = load_model()
-dataset_path = os.path.join(os.path.dirname(__file__), '..', 'dataset', 'dataset.csv')
-df = pd.read_csv(dataset_path).dropna(subset=['price']).reset_index(drop=True)
+# --- Rows scored per step, progress, preview and charts update after each ---
+UI_CHUNK_SIZE = 10_000
+# --- Shortest time in seconds between two redraws of the live charts ---
+CHART_REFRESH = 1.0
+PREVIEW_ROWS = 20
+
+def _new_run(file_id, n_rows):
+    """Session state of one scoring run, kept so a cancelled run can be resumed."""
+    return {
+        "file_id": file_id,
+        "predictions": np.full(n_rows, np.nan),
+        "rows_done": 0,
+        "seconds": 0.0,
+        "status": "running",
+        "summary": BatchSummary(),
+        "exports": {},
+    }
+
+def _draw_charts(px, summary, columns, slots, key):
+    """Batch insight charts from the running aggregates, drawn into `slots`."""
+    hist = summary.histogram()
+    fig1 = px.bar(
+        x=hist.index + summary.bin_width / 2, y=hist.values,
+        labels={"x": "Predicted price", "y": "Vehicles"}, title="Distribution of Predicted Prices"
+    )
+    fig1.update_traces(width=summary.bin_width * 0.9)
+    slots[0].plotly_chart(fig1, use_container_width=True, key=f"batch_hist_{key}")
+
+    if "make" in columns and len(summary.by_make):
+        fig2 = px.bar(summary.mean_by_make(), title="Average Predicted Price per Make")
+        slots[1].plotly_chart(fig2, use_container_width=True, key=f"batch_make_{key}")
+
+    if "year" in columns and "mileage" in columns:
+        bubbles = summary.year_bubbles()
+        if not bubbles.empty:
+            fig3 = px.scatter(
+                bubbles,
+                x="year",
+                y="price",
+                size="mileage",
+                color="make" if "make" in bubbles.columns else None,
+                hover_data=["vehicles"],
+                title="Mean Price vs Year (Bubble size = Mean Mileage)"
+            )
+            slots[2].plotly_chart(fig3, use_container_width=True, key=f"batch_year_{key}")
+        else:
+            slots[2].info("⚠️ Not enough valid data for scatter plot (missing year/mileage).")
+
+def _chart_slots():
+    col1, col2 = st.columns(2)
+    return [col1.empty(), col2.empty(), st.empty()]
+
+def _score(run, batch_df, px):
+    """Score the rest of `batch_df` chunk by chunk, updating progress, preview and charts live."""
+    n_rows = len(batch_df)
+    with trace("batch_predict", rows=n_rows, resumed_from=run["rows_done"]):
+        with span("model_load"):
+            model = load_model()
+            dispatcher = load_prediction_dispatcher()
+        with span("select_columns"):
+            # --- Only the columns the model was trained on take part in prediction ---
+            features = batch_df[[c for c in model.feature_names_in_ if c in batch_df.columns]]
+        cache = load_prediction_cache()
+
+        live = st.empty()
+        with live.container():
+            # --- Clicking reruns the page, which stops this loop after the current chunk ---
+            st.button("⏹️ Cancel")
+            progress = st.progress(run["rows_done"] / n_rows)
+            stats = st.empty()
+            st.markdown("### 💰 Latest Predictions")
+            preview = st.empty()
+            st.markdown("### 📊 Batch Insights")
+            slots = _chart_slots()
+
+        last_draw = 0.0
+        for start in range(run["rows_done"], n_rows, UI_CHUNK_SIZE):
+            stop = min(start + UI_CHUNK_SIZE, n_rows)
+            chunk_start = time.perf_counter()
+            with span("score", rows=stop - start):
+                # --- Numeric predictions, the model's preprocess and predict spans nest in here ---
+                preds = cache.predict(model, features.iloc[start:stop], predict=dispatcher.predict)
+            with span("aggregate"):
+                run["summary"].update(batch_df.iloc[start:stop], preds)
+            run["predictions"][start:stop] = preds
+            run["rows_done"] = stop
+            run["seconds"] += time.perf_counter() - chunk_start
+
+            rate = run["summary"].rows / run["seconds"] if run["seconds"] > 0 else 0.0
+            eta = (n_rows - stop) / rate if rate > 0 else 0.0
+            progress.progress(stop / n_rows, text=f"{stop:,} / {n_rows:,} rows")
+            stats.text(f"{rate:,.0f} rows/sec | ETA {eta:,.1f}s | mean predicted price ${run['summary'].mean:,.2f}")
+            preview.dataframe(
+                batch_df.iloc[max(start, stop - PREVIEW_ROWS):stop].assign(Predicted_price=preds[-PREVIEW_ROWS:]),
+                use_container_width=True
+            )
+            if time.perf_counter() - last_draw >= CHART_REFRESH or stop == n_rows:
+                with span("charts"):
+                    _draw_charts(px, run["summary"], batch_df.columns, slots, stop)
+                last_draw = time.perf_counter()
+
+        run["status"] = "done"
+        live.empty()
+
+def _show_results(run, batch_df, px):
+    """Results table, charts and download of a finished or cancelled run."""
+    n_rows = len(batch_df)
+    done = run["rows_done"]
+    if run["status"] == "cancelled":
+        st.warning(f"⏹️ Scoring cancelled after {done:,} of {n_rows:,} rows, the results below cover the scored rows.")
+    if done == 0:
+        return
+
+    with trace("batch_results", rows=done):
+        st.success(f"Scored {done:,} rows in {run['seconds']:,.1f}s ({run['summary'].rows / max(run['seconds'], 1e-9):,.0f} rows/sec)")
+        scored = batch_df.iloc[:done]
+
+        # --- Results ---
+        st.markdown("### 💰 Prediction Results")
+        with span("format"):
+            head = scored.head(20).assign(Predicted_price=format_prices(run["predictions"][:min(done, 20)]))
+        st.dataframe(head, use_container_width=True)
+
+        # --- Graphs ---
+        st.markdown("### 📊 Batch Insights")
+        with span("charts"):
+            _draw_charts(px, run["summary"], batch_df.columns, _chart_slots(), "final")
+
+        # --- Download Option, each format is written once per set of scored rows ---
+        fmt = st.selectbox(
+            "Download format", available_formats(),
+            format_func=lambda f: EXPORT_FORMATS[f][0], key="batch_export_format"
+        )
+        label, extension, mime = EXPORT_FORMATS[fmt]
+        cached = run["exports"].get(fmt)
+        if cached is None or cached[0] != done:
+            with span("export", format=fmt) as export:
+                data = export_predictions(scored, run["predictions"][:done], fmt)
+                export["bytes"] = len(data)
+            run["exports"][fmt] = cached = (done, data)
+        st.download_button(
+            f"💾 Download Predictions as {label}",
+            data=cached[1],
+            file_name=f"batch_predictions{extension}",
+            mime=mime,
+        )
 
 def show():
     """
@@ -22,19 +168,30 @@ def show():
 
     Workflow
     --------
-    1. Prompt the user to upload a `.csv` file with vehicle data.
+    1. Prompt the user to upload vehicle data as CSV, gzip or zip CSV, Parquet or Feather/Arrow.
     2. Load and preview the dataset.
-    3. Run predictions on all rows using the trained `MODEL`:
+    3. Run predictions in chunks of `UI_CHUNK_SIZE` rows using the trained model from `load_model()`,
+       with a progress bar, rows/sec, ETA, the latest predictions and live charts. A Cancel button
+       stops the run, which can then be resumed.
     4. Display prediction results (top 20 rows).
-    5. Generate visual insights:
-    6. Provide a download button for saving predictions as a CSV file.
+    5. Generate visual insights from the running aggregates (`BatchSummary`):
+    6. Provide a download button for saving predictions as CSV, gzip CSV, Parquet or Arrow IPC (`src/export.py`).
 
     Notes
     -----
-    - Relies on a global trained `MODEL` object with a `.predict()` method.
+    - The model is only loaded once a file is uploaded, its fitted columns define what is read.
+    - Uploads are validated before scoring (`src/validation.py`): a missing column rejects the file,
+      rows with unparseable or out-of-range values are listed with their reason and can be downloaded.
+    - Predictions go through the shared prediction cache, rows seen before are not re-predicted.
+    - Cache misses are queued on the shared dispatcher together with other sessions' requests.
     - Expected input dataset should include features compatible with the model.
     - Gracefully handles missing or invalid columns for specific plots
-    - Adds temporary column `_predicted_price_num` for numeric predictions.
+    - Predictions and aggregates of the current run live in `st.session_state.batch_run`, so results
+      survive reruns and a cancelled run keeps what it scored.
+    - The upload is read once per file by `src/ingest.py`, keeping only the model's columns with
+      pinned dtypes unless extra columns are requested, and kept in `st.session_state.batch_upload_df`.
+    - Reading, prediction, formatting, charts and export serialization are recorded as spans of a trace
+      (`src/tracing.py`), shown in the sidebar performance panel.
 
     Returns
     -------
@@ -45,11 +202,54 @@ def show():
     st.subheader("📂 Batch Prediction")
     st.markdown("---")
 
+    # --- Heavy imports are deferred to the first render of this page ---
+    px = timed_import("plotly.express")
+
     batch_df = None
-    uploaded_file = st.file_uploader("Upload your vehicle dataset (.csv)", type=["csv"])
+    uploaded_file = st.file_uploader(
+        "Upload your vehicle dataset (.csv, .csv.gz, .zip, .parquet, .feather)", type=UPLOAD_TYPES
+    )
+    keep_all = st.checkbox("Keep extra columns (name, description, ...)", value=False,
+                           help="Only the model's columns are read by default, which is faster and uses less memory.")
     if uploaded_file is not None:
-        batch_df = pd.read_csv(uploaded_file)
-        st.success(f"✅ File loaded successfully with {batch_df.shape[0]} rows.")
+        # --- Parsed once per uploaded file and column choice, reruns reuse the frame ---
+        upload_key = (uploaded_file.file_id, keep_all)
+        if st.session_state.get("batch_upload_key") != upload_key:
+            st.session_state.batch_upload_df = None
+            st.session_state.batch_rejects = None
+            st.session_state.batch_upload_error = None
+            try:
+                with trace("batch_upload", file=uploaded_file.name):
+                    schema = input_schema(load_model())
+                    with span("read_upload") as read:
+                        upload_df = read_upload(uploaded_file, uploaded_file.name, schema, all_columns=keep_all)
+                        read["rows"] = len(upload_df)
+                    # --- Bad rows are set aside here instead of failing inside the model ---
+                    with span("validate") as check:
+                        st.session_state.batch_upload_df, st.session_state.batch_rejects = validate_batch(
+                            upload_df, schema
+                        )
+                        check["rejected"] = len(st.session_state.batch_rejects)
+            except (ValueError, ImportError) as e:
+                st.session_state.batch_upload_error = f"❌ Could not read {uploaded_file.name}: {e}"
+            st.session_state.batch_upload_key = upload_key
+        batch_df = st.session_state.batch_upload_df
+        rejects = st.session_state.batch_rejects
+        if st.session_state.batch_upload_error:
+            st.error(st.session_state.batch_upload_error)
+        if batch_df is not None:
+            st.success(f"✅ File loaded successfully with {batch_df.shape[0]} rows.")
+        if rejects is not None and len(rejects):
+            st.warning(f"⚠️ {len(rejects):,} rows failed validation and will not be scored.")
+            with st.expander("🚫 Rejected Rows"):
+                added = [reject_column(col, batch_df.columns) for col in (REJECT_ROW_COL, REJECT_REASON_COL)]
+                st.dataframe(rejects[added].head(PREVIEW_ROWS), use_container_width=True)
+                st.download_button(
+                    "💾 Download Rejected Rows as CSV",
+                    data=rejects.to_csv(index=False).encode("utf-8"),
+                    file_name="rejected_rows.csv",
+                    mime="text/csv",
+                )
 
     # --- Preview ---
     if batch_df is not None:
@@ -57,56 +257,25 @@ def show():
             st.dataframe(batch_df.head(10), use_container_width=True)
 
         # --- Prediction ---
-        if st.button("Predict Batch"):
-            with st.spinner("Analyzing batch vehicle prices..."):
-                time.sleep(4.5)
-                # --- N umeric predictions ---
-                batch_df["_predicted_price_num"] = MODEL.predict(batch_df).astype(float)
-
-                # --- Formatted for display & CSV ---
-                batch_df["Predicted_price"] = batch_df["_predicted_price_num"].map(lambda x: f"{x:.2f}")
-            
-            # --- Results ---
-            st.markdown("### 💰 Prediction Results")
-            st.dataframe(batch_df.drop(columns=["_predicted_price_num"]).head(20), use_container_width=True)
-
-            # --- Graphs ---
-            st.markdown("### 📊 Batch Insights")
+        run = st.session_state.get("batch_run")
+        if run is not None and run["file_id"] != uploaded_file.file_id:
+            run = None
+        # --- A run still marked as running was stopped by a rerun, e.g. the Cancel button ---
+        if run is not None and run["status"] == "running":
+            run["status"] = "cancelled"
 
-            col1, col2 = st.columns(2)
-
-            with col1:
-                fig1 = px.histogram(batch_df, x="_predicted_price_num", nbins=20, title="Distribution of Predicted Prices")
-                st.plotly_chart(fig1, use_container_width=True)
-
-            with col2:
-                if "make" in batch_df.columns:
-                    avg_make = batch_df.groupby("make")["_predicted_price_num"].mean().sort_values()
-                    fig2 = px.bar(avg_make, title="Average Predicted Price per Make")
-                    st.plotly_chart(fig2, use_container_width=True)
-
-            if "year" in batch_df.columns and "mileage" in batch_df.columns:
-                scatter_df = batch_df.dropna(subset=["year", "mileage", "_predicted_price_num"]).copy()
-                scatter_df = scatter_df[scatter_df["mileage"] > 0]
-
-                if not scatter_df.empty:
-                    fig3 = px.scatter(
-                        scatter_df,
-                        x="year", 
-                        y="_predicted_price_num",
-                        size="mileage",
-                        color="make" if "make" in scatter_df.columns else None,
-                        title="Price vs Year (Bubble size = Mileage)"
-                    )
-                    st.plotly_chart(fig3, use_container_width=True)
-                else:
-                    st.info("⚠️ Not enough valid data for scatter plot (missing year/mileage).")
-
-            # --- Download Option ---
-            csv_bytes = batch_df.drop(columns=["_predicted_price_num"]).to_csv(index=False).encode("utf-8")
-            st.download_button(
-                "💾 Download Predictions as CSV",
-                data=csv_bytes,
-                file_name="batch_predictions.csv",
-                mime="text/csv",
-            )
+        col_start, col_resume = st.columns(2)
+        with col_start:
+            start = st.button("Predict Batch")
+        resume = False
+        if run is not None and run["status"] == "cancelled":
+            with col_resume:
+                resume = st.button(f"▶️ Resume from row {run['rows_done']:,}")
+
+        if start:
+            run = st.session_state.batch_run = _new_run(uploaded_file.file_id, len(batch_df))
+        if start or resume:
+            run["status"] = "running"
+            _score(run, batch_df, px)
+        if run is not None:
+            _show_results(run, batch_df, px)
@@ -2,35 +2,37 @@ import streamlit as st
 import pandas as pd
 import os
 from datetime import datetime
-from sklearn.metrics.pairwise import euclidean_distances
 
-from src.model_loader import load_model
+from src.dataset import DATASET_PATH, load_dataset
+from src.features import MODEL_FEATURES, add_features, load_features
+from src.model_loader import MODEL_PATH, load_model
+from src.similar import SimilarVehicleIndex, load_similar_index
+from src.summary import PREVIEW_ROWS, SummaryStore, load_summary
+from src.text_index import TextIndex, load_text_index
 from src.styles import card_style
 
-# --- Load model and dataset ---
-MODEL = load_model()
-dataset_path = os.path.join(os.path.dirname(__file__), '..', 'dataset', 'dataset.csv')
-model_path = os.path.join(os.path.dirname(__file__), '..', 'model', 'vehicle_price_dt.pkl')
-df = pd.read_csv(dataset_path).dropna(subset=['price']).reset_index(drop=True)
+dataset_path = DATASET_PATH
+model_path = MODEL_PATH
 
-def show(df=df, model=MODEL, input_df=None):
+def show(df=None, model=None, input_df=None):
     """
     Render the Extended Insights & Analytics section of the Vehicle Price Predictor app.
 
     This function provides a multi-tab analytics dashboard with three main modes:
     - **Statistics**: Displays feature importance, price trends, similar vehicles, and dataset statistics.
-    - **Dataset**: Allows browsing, filtering, searching, and downloading parts of the dataset.
+    - **Dataset**: Allows browsing, ranked text search, and downloading parts of the dataset.
     - **Feature Engineering**: Shows dataset metadata, model details, engineered features, and various charts for deeper analysis.
 
     Parameters
     ----------
-    df : pd.DataFrame
-        The dataset containing vehicle information and prices.
-    model : object
-        The trained machine learning model used for predictions. Should have attributes like
-        `feature_importances_`, `n_features_in_`, etc., if applicable.
+    df : pd.DataFrame, optional
+        The dataset containing vehicle information and prices, defaults to the shared `load_dataset()`.
+    model : object, optional
+        The trained machine learning model used for predictions, defaults to `load_model()`. Should have
+        attributes like `feature_importances_`, `n_features_in_`, etc., if applicable.
     input_df : pd.DataFrame, optional
-        The most recent vehicle specification used for prediction. Used to display similar vehicles.
+        The most recent vehicle specification used for prediction, defaults to the session's `input_df`.
+        Used to display similar vehicles.
 
     Workflow
     --------
@@ -44,6 +46,11 @@ def show(df=df, model=MODEL, input_df=None):
     None
         Renders interactive content directly to the Streamlit app.
     """
+    # --- Dataset is loaded on first use of the page, the model only by the tabs that need it ---
+    df = load_dataset() if df is None else df
+    # --- Aggregates and chart data are precomputed once per dataset version ---
+    summary = load_summary() if df is load_dataset() else SummaryStore(df)
+
     card_style()
     st.subheader("📊 Insights & Analytics")
     
@@ -58,6 +65,7 @@ def show(df=df, model=MODEL, input_df=None):
     # --- Tab 1. Statistics ---
     # -------------------------
     if mode == "Statistics":
+        model = load_model() if model is None else model
         if hasattr(model, "feature_importances_"):
             st.markdown('<div class="card"><h3>🔑 Feature Importance</h3>', unsafe_allow_html=True)
             importance_df = pd.DataFrame({
@@ -72,22 +80,23 @@ def show(df=df, model=MODEL, input_df=None):
             "Select feature for price trend",
             ["make", "year", "body", "fuel", "drivetrain"]
         )
-        trend_data = df.groupby(trend_feature)["price"].mean().sort_values()
-        st.bar_chart(trend_data)
+        st.bar_chart(summary.trends[trend_feature])
         st.markdown("</div>", unsafe_allow_html=True)
 
+        # --- Falls back to the last spec predicted on the single vehicle page ---
+        input_df = st.session_state.get("input_df") if input_df is None else input_df
         if input_df is not None:
             st.markdown('<div class="card"><h3>🚗 Similar Vehicles</h3>', unsafe_allow_html=True)
-            features = ["year", "mileage", "cylinders", "doors"]
-            distances = euclidean_distances(df[features], input_df[features])
-            closest_idx = distances.argmin()
-            similar_car = df.iloc[closest_idx]
+            index = load_similar_index() if df is load_dataset() else SimilarVehicleIndex(df)
+            k = st.slider("Number of similar vehicles", 1, 20, 5, key="extended_similar_k")
+            similar = index.query(input_df, k=k)
+            similar_car = similar.iloc[0]
             st.markdown(f"Closest Vehicle: **{similar_car['year']} {similar_car['make']} {similar_car['model']} - ${similar_car['price']:,}**")
-            st.dataframe(similar_car)
+            st.dataframe(similar.drop(columns=["description"], errors="ignore"), hide_index=True)
             st.markdown("</div>", unsafe_allow_html=True)
 
         st.markdown('<div class="card"><h3>📊 Dataset Statistics</h3>', unsafe_allow_html=True)
-        st.write(df["price"].describe())
+        st.write(summary.price_stats)
         st.markdown("</div>", unsafe_allow_html=True)
 
     # -----------------------------
@@ -96,18 +105,25 @@ def show(df=df, model=MODEL, input_df=None):
     elif mode == "Dataset":
         st.markdown('<div class="card"><h3>👀 Browse Dataset</h3>', unsafe_allow_html=True)
 
-        max_rows = df.shape[0]
+        search_term = st.text_input("🔍 Search name, model, trim, engine and description")
+        results_df = df
+        if search_term.strip():
+            # --- Ranked lookup in the text index instead of scanning every cell ---
+            index = load_text_index() if df is load_dataset() else TextIndex(df)
+            positions, _ = index.search(search_term)
+            results_df = df.iloc[positions]
+            st.caption(f"{len(results_df):,} matching vehicles, best match first")
+
+        max_rows = results_df.shape[0]
+        if max_rows == 0:
+            st.info("No vehicles match the search.")
+            max_rows = 1
         col1, col2 = st.columns(2)
         with col1:
             start_idx = st.number_input("Start row", 0, max_rows - 1, 0)
         with col2:
             end_idx = st.number_input("End row", start_idx + 1, max_rows, min(start_idx + 50, max_rows))
-
-        search_term = st.text_input("🔍 Search (case-insensitive)")
-        preview_df = df.iloc[start_idx:end_idx]
-        if search_term.strip():
-            mask = df.apply(lambda row: row.astype(str).str.contains(search_term, case=False, na=False).any(), axis=1)
-            preview_df = df[mask].iloc[start_idx:end_idx]
+        preview_df = results_df.iloc[start_idx:end_idx]
 
         selected_cols = st.multiselect("Columns to display", df.columns.tolist(), default=df.columns.tolist()[:10])
         st.dataframe(preview_df[selected_cols], use_container_width=True)
@@ -122,6 +138,7 @@ def show(df=df, model=MODEL, input_df=None):
     # --- 3. Feature Engineering ---
     # ------------------------------
     elif mode == "Featured Engineering":
+        model = load_model() if model is None else model
 
         # --- Dataset Info ---
         st.markdown('<div class="card"><div class="title">📂 Dataset Info</div>', unsafe_allow_html=True)
@@ -129,18 +146,13 @@ def show(df=df, model=MODEL, input_df=None):
         last_updated = datetime.fromtimestamp(os.path.getmtime(dataset_path)).strftime("%b %d, %Y")
 
         c1, c2, c3, c4 = st.columns(4)
-        c1.metric("Rows", f"{df.shape[0]:,}")
-        c2.metric("Columns", f"{df.shape[1]}")
+        c1.metric("Rows", f"{summary.n_rows:,}")
+        c2.metric("Columns", f"{len(summary.columns)}")
         c3.metric("Size", f"{dataset_size:.2f} KB")
         c4.metric("Last Updated", last_updated)
 
         with st.expander("📑 Columns & Data Types"):
-            dtype_df = pd.DataFrame({
-                "Column": df.columns,
-                "Dtype": df.dtypes.astype(str),
-                "Non-Null Count": df.notnull().sum().values
-            })
-            st.dataframe(dtype_df, use_container_width=True, height=320)
+            st.dataframe(summary.column_info, use_container_width=True, height=320)
         st.markdown("</div>", unsafe_allow_html=True)
 
         # --- Model Info ---
@@ -163,15 +175,11 @@ def show(df=df, model=MODEL, input_df=None):
 
         # --- Engineered Features ---
         st.markdown('<div class="card"><div class="title">🧮 Engineered Features</div>', unsafe_allow_html=True)
-        df["price_per_mile"] = df["price"] / (df["mileage"].replace(0, 1))
-        df["age"] = pd.Timestamp.now().year - df["year"]
-        df["luxury_flag"] = df["make"].isin(["BMW", "Mercedes-Benz", "Audi", "Lexus"]).astype(int)
-
         with st.expander("Preview Engineered Features"):
-            st.dataframe(
-                df[["make", "model", "year", "mileage", "price", "price_per_mile", "age", "luxury_flag"]].head(10),
-                use_container_width=True
-            )
+            st.dataframe(summary.preview, use_container_width=True)
+        with st.expander("Preview Model Features"):
+            features = load_features() if df is load_dataset() else add_features(df.head(PREVIEW_ROWS), MODEL_FEATURES)
+            st.dataframe(features[["make", "model", *MODEL_FEATURES]].head(PREVIEW_ROWS), use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
 
@@ -179,24 +187,18 @@ def show(df=df, model=MODEL, input_df=None):
         st.markdown('<div class="card"><div class="title">📊 Charts</div>', unsafe_allow_html=True)
 
         with st.expander("📉 Average Price by Age"):
-            avg_price_by_age = df.groupby("age")["price"].mean().reset_index()
-            st.line_chart(avg_price_by_age.set_index("age"))
+            st.line_chart(summary.price_by_age().set_index("age"))
 
         with st.expander("💎 Luxury vs Non-Luxury Vehicles"):
-            avg_price_luxury = df.groupby("luxury_flag")["price"].mean().rename({0: "Non-Luxury", 1: "Luxury"})
-            st.bar_chart(avg_price_luxury)
+            st.bar_chart(summary.luxury_prices)
 
         with st.expander("🚗 Price per Mile Distribution"):
-            st.histogram_chart(df["price_per_mile"], bins=30) if hasattr(st, "histogram_chart") else st.bar_chart(
-                df["price_per_mile"].value_counts(bins=30).sort_index()
-            )
+            st.bar_chart(summary.price_per_mile_hist)
 
         with st.expander("⛽ Mileage vs Price"):
-            scatter_df = df[["mileage", "price"]].dropna()
-            st.scatter_chart(scatter_df, x="mileage", y="price")
+            st.scatter_chart(summary.scatter, x="mileage", y="price")
 
         with st.expander("🏷️ Vehicle Distribution by Make (Top 10)"):
-            top_makes = df["make"].value_counts().head(10)
-            st.bar_chart(top_makes)
+            st.bar_chart(summary.top_makes)
 
         st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
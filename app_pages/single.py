@@ -1,14 +1,16 @@
 import streamlit as st
 import pandas as pd
-from src.model_loader import load_model
-import os, time
-import plotly.express as px
+from src.model_loader import load_model, load_prediction_cache, load_prediction_dispatcher
+from src.dataset import load_dataset
+from src.similar import SIMILAR_FEATURES, load_similar_index
+from src.text_index import load_text_index
+from src.startup import timed_import
+from src.tracing import span, trace
 
-from sklearn.metrics.pairwise import euclidean_distances
 from src.styles import color_name, get_contrast_color
 
-# --- Model ---
-MODEL = load_model()
+# --- Search results shown per page in Basic Mode ---
+RESULTS_PAGE_SIZE = 50
 
 def reset_if_changed(key, widget_func, *args, **kwargs):
     """Wrapper: resets prediction if the user changes a value"""
@@ -39,7 +41,7 @@ def show():
 
     Workflow
     --------
-    1. Load the dataset from `dataset/dataset.csv` and clean missing prices.
+    1. Load the shared dataset (`dataset/dataset.csv`, rows with a price).
     2. Display a segmented control for switching between:
     3. Basic Mode: Explore vehicles by brand, price range, model, and description.
     4. Full Prediction: Enter detailed specifications and predict vehicle price.
@@ -51,12 +53,18 @@ def show():
         * `predicted_price` (float): Most recent predicted price.
         * `predict_clicked` (bool): Whether the user requested a prediction.
         * `last_mode` (str): Last active mode.
-        * `filtered_df` (pd.DataFrame): Vehicles matching filters in Basic Mode.
+        * `filtered_df` (pd.DataFrame): Vehicles matching filters in Basic Mode, best text match first.
+        * `results_page` (int): Page of `filtered_df` on display.
         * `selected_car` (str): Persisted selection for chosen car.
     - Relies on external helpers:
         * `color_name(hex)`: Maps hex color to human-readable name.
         * `get_contrast_color(fg, bg)`: Ensures readable text contrast.
-        * `MODEL`: Trained ML model for predictions.
+        * `load_model()`: Trained ML model, loaded on the first prediction.
+        * `load_prediction_cache()`: Shared cache of predictions for repeated specs.
+        * `load_prediction_dispatcher()`: Shared coalescer batching predictions across sessions.
+        * `load_text_index()`: Shared inverted index answering the model and description searches.
+        * `load_similar_index()`: Shared KD-tree behind "Similar Vehicles".
+        * `trace()` / `span()`: Per-stage timings of searches, predictions and charts for the sidebar panel.
 
     Returns
     -------
@@ -64,11 +72,9 @@ def show():
         Content is rendered directly to the Streamlit app.
     """
     st.subheader("🚙 Vehicle Input Predictions")
-    
+
     # --- Loading dataset ---
-    dataset_path = os.path.join(os.path.dirname(__file__), '..', 'dataset', 'dataset.csv')
-    df = pd.read_csv(dataset_path)
-    df = df.dropna(subset=['price']).reset_index(drop=True)
+    df = load_dataset()
 
     # --- Feature Switching Tabs ---
     mode = st.segmented_control(
@@ -116,39 +122,41 @@ def show():
 
         # --- Search button ---
         if st.button("🔍 Search"):
-            filtered_df = df[
-                (df['price'] >= price_range[0]) & (df['price'] <= price_range[1])
-            ]
-            if selected_brand != 'All':
-                filtered_df = filtered_df[filtered_df['make'] == selected_brand]
-            if model_name_input:
-                filtered_df = filtered_df[
-                    filtered_df['model'].str.contains(model_name_input, case=False, na=False)
-                ]
-            if desc_query:
-                filtered_df = filtered_df[
-                    filtered_df['description'].str.contains(desc_query, case=False, na=False)
-                ]
-            st.session_state.filtered_df = filtered_df.reset_index(drop=True)
+            with trace("vehicle_search"):
+                with span("filter"):
+                    mask = ((df['price'] >= price_range[0]) & (df['price'] <= price_range[1])).to_numpy()
+                    if selected_brand != 'All':
+                        mask &= (df['make'] == selected_brand).to_numpy()
+                # --- Text filters are answered by the shared index, best matches first ---
+                with span("text_search") as search:
+                    positions, _ = load_text_index().search(
+                        {"model": model_name_input, "description": desc_query}, candidates=mask
+                    )
+                    search["rows"] = len(positions)
+                st.session_state.filtered_df = df.iloc[positions].reset_index(drop=True)
+                st.session_state.results_page = 1
 
         # --- Display if we already have results ---
         if "filtered_df" in st.session_state:
             filtered_df = st.session_state.filtered_df
 
             with st.spinner("Crunching numbers..."):
-                time.sleep(1.5)
                 st.write(f"Showing {len(filtered_df)} vehicles")
 
                 if not filtered_df.empty:
+                    n_pages = -(-len(filtered_df) // RESULTS_PAGE_SIZE)
+                    page = st.number_input("Page", 1, n_pages, key="results_page", help=f"{n_pages} pages of {RESULTS_PAGE_SIZE} vehicles")
+                    page_df = filtered_df.iloc[(page - 1) * RESULTS_PAGE_SIZE:page * RESULTS_PAGE_SIZE]
+
                     display_cols = ['name','make','model','year','price','fuel','body']
-                    st.dataframe(filtered_df[display_cols], use_container_width=True)
+                    st.dataframe(page_df[display_cols], use_container_width=True)
 
                     car_names = [
                         f"{row.year} {row.make} {row.model} - ${row.price:,.0f}"
-                        for _, row in filtered_df.iterrows()
+                        for _, row in page_df.iterrows()
                     ]
 
-                    if "selected_car" not in st.session_state:
+                    if st.session_state.get("selected_car") not in car_names:
                         st.session_state.selected_car = car_names[0]
 
                     selected_car = st.selectbox(
@@ -158,7 +166,7 @@ def show():
                     )
 
                     # --- Details for selected car ---
-                    car_row = filtered_df.iloc[car_names.index(selected_car)]
+                    car_row = page_df.iloc[car_names.index(selected_car)]
                     st.markdown("---")
                     st.markdown(f"### 🚗 {car_row['year']} {car_row['make']} {car_row['model']}")
                     st.write(f"**Price:** ${car_row['price']:,}")
@@ -244,9 +252,12 @@ def show():
                 }])
 
                     
-                with st.spinner("Analyzing the Price of Car..."):
-                    time.sleep(2.5)    
-                    price = MODEL.predict(input_df)[0]
+                with st.spinner("Analyzing the Price of Car..."), trace("single_predict"):
+                    with span("model_load"):
+                        model = load_model()
+                        dispatcher = load_prediction_dispatcher()
+                    with span("score"):
+                        price = load_prediction_cache().predict(model, input_df, predict=dispatcher.predict)[0]
                 st.session_state.predicted_price = price
                 st.session_state.input_df = input_df
                 st.session_state.predict_clicked = True
@@ -289,25 +300,46 @@ def show():
                     </div>
                     """, unsafe_allow_html=True)
 
+                # --- Heavy imports are deferred until a prediction is shown ---
+                px = timed_import("plotly.express")
+
                 # --- Similar Vehicles ---
                 st.markdown("### 🚘 Similar Vehicles")
-                features = ["year", "mileage", "cylinders", "doors"]
-
-                df_numeric = df[features].fillna(0)
-                input_df_filled = input_df[features].fillna(0)
-
-                distances = euclidean_distances(df_numeric, input_df_filled)
-                closest_idx = distances.argmin()
-                similar_car = df.iloc[closest_idx]
-
-                st.write(f"Closest Vehicle: **{similar_car['year']} {similar_car['make']} {similar_car['model']} - ${similar_car['price']:,}**")
-
-                # --- Feature Comparison ---
-                st.markdown("### 📊 Feature Comparison")
-                comp_df = pd.DataFrame({
-                    "Feature": features,
-                    "Your Car": [year, mileage, cylinders, doors],
-                    "Closest Car": [similar_car[f] for f in features]
-                })
-                fig = px.bar(comp_df, x="Feature", y=["Your Car", "Closest Car"], barmode="group", text_auto=True)
-                st.plotly_chart(fig, use_container_width=True)
+                features = SIMILAR_FEATURES
+                col_k, col_make, col_body = st.columns([2, 1, 1])
+                with col_k:
+                    k = st.slider("Number of similar vehicles", 1, 20, 5)
+                with col_make:
+                    same_make = st.checkbox(f"Only {make}")
+                with col_body:
+                    same_body = st.checkbox(f"Only {body}")
+
+                with trace("similar_vehicles"):
+                    with span("similar_search", k=k):
+                        similar = load_similar_index().query(
+                            input_df, k=k,
+                            make=make if same_make else None,
+                            body=body if same_body else None,
+                        )
+                    if similar.empty:
+                        st.info("No vehicles match the selected filters.")
+                    else:
+                        similar_car = similar.iloc[0]
+
+                        st.write(f"Closest Vehicle: **{similar_car['year']} {similar_car['make']} {similar_car['model']} - ${similar_car['price']:,}**")
+                        st.dataframe(
+                            similar[["distance", "make", "model", "year", "trim", "body", "price"] + [f for f in features if f != "year"]],
+                            hide_index=True,
+                            column_config={"distance": st.column_config.NumberColumn("Distance", format="%.3f")},
+                        )
+
+                        # --- Feature Comparison ---
+                        st.markdown("### 📊 Feature Comparison")
+                        with span("charts"):
+                            comp_df = pd.DataFrame({
+                                "Feature": features,
+                                "Your Car": [year, mileage, cylinders, doors],
+                                "Closest Car": [similar_car[f] for f in features]
+                            })
+                            fig = px.bar(comp_df, x="Feature", y=["Your Car", "Closest Car"], barmode="group", text_auto=True)
+                            st.plotly_chart(fig, use_container_width=True)
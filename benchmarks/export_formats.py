@@ -0,0 +1,52 @@
+import argparse
+import io
+import time
+
+from benchmarks.suite import synthetic_rows
+from src.dataset import read_dataset
+from src.export import EXPORT_FORMATS, available_formats, write_predictions
+
+def _legacy_csv(df, predictions):
+    """The batch page's former download path: per-value formatting, a dropped copy and an encoded string."""
+    out = df.assign(_predicted_price_num=predictions)
+    out["Predicted_price"] = out["_predicted_price_num"].map(lambda x: f"{x:.2f}")
+    return out.drop(columns=["_predicted_price_num"]).to_csv(index=False).encode("utf-8")
+
+def _measure(func):
+    start = time.perf_counter()
+    size = func()
+    return time.perf_counter() - start, size
+
+def main():
+    """
+    Compare export formats of batch predictions by time and file size.
+
+    Run from the project root: `python -m benchmarks.export_formats --rows 1000000`.
+    """
+    parser = argparse.ArgumentParser(description="Batch prediction export format benchmark.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--formats", nargs="+", choices=list(EXPORT_FORMATS), default=None)
+    args = parser.parse_args()
+
+    df = synthetic_rows(read_dataset(), args.rows)
+    predictions = df["price"].to_numpy(dtype=float) * 1.05
+    print(f"{len(df):,} rows")
+    print(f"{'format':>16} {'seconds':>9} {'size MB':>9}")
+
+    def legacy():
+        return len(_legacy_csv(df, predictions))
+    results = [("CSV (legacy)", *_measure(legacy))]
+
+    for fmt in args.formats or available_formats():
+        def export(fmt=fmt):
+            buffer = io.BytesIO()
+            write_predictions(df, predictions, buffer, fmt=fmt)
+            return buffer.getbuffer().nbytes
+        results.append((EXPORT_FORMATS[fmt][0], *_measure(export)))
+
+    for name, seconds, size in results:
+        print(f"{name:>16} {seconds:9.2f} {size / 1e6:9.1f}")
+    return results
+
+if __name__ == "__main__":
+    main()
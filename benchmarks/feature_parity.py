@@ -0,0 +1,59 @@
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.features import MODEL_FEATURES, add_features
+from src.model_loader import MODEL_DIR, _saved_year
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), '..', 'dataset', 'dataset.csv')
+LEGACY_PATH = os.path.join(MODEL_DIR, 'vehicle_price_pipeline.pkl')
+
+def main():
+    """
+    Check `add_features()` against the fitted statistics of `model/vehicle_price_pipeline.pkl`.
+
+    The rows that model was trained on are not shipped, so features are
+    compared where the fitted state pins them down regardless of the rows:
+    the `make_model` vocabulary of the one-hot encoder, the scaler mean of
+    `age` against that of `year`, and the imputer median of `mileage_k`
+    (thousands rounded to one decimal). The medians of `desc_len` and
+    `has_keywords_warranty`, which the notebook does not define, and the
+    model's R² on plain rows are only reported. Run from the project root:
+    `python -m benchmarks.feature_parity`. Exits non-zero when a check fails.
+    """
+    pipeline = joblib.load(LEGACY_PATH)
+    preprocessor = pipeline.named_steps["preprocess"]
+    columns = {name: cols for name, _, cols in preprocessor.transformers_}
+    num = preprocessor.named_transformers_["num"]
+    medians = dict(zip(columns["num"], num.named_steps["imputer"].statistics_))
+    means = dict(zip(columns["num"], num.named_steps["scaler"].mean_))
+    encoder = preprocessor.named_transformers_["cat"].steps[-1][1]
+    year = _saved_year(LEGACY_PATH)
+
+    df = pd.read_csv(DATASET_PATH).dropna(subset=["price"]).reset_index(drop=True)
+    featured = add_features(df, MODEL_FEATURES, year)
+    checks = []
+
+    fitted = set(encoder.categories_[columns["cat"].index("make_model")])
+    ours = set(featured["make_model"].dropna().astype(str))
+    checks.append(("make_model vocabulary", f"{len(fitted & ours)} of {len(fitted)} fitted labels built", fitted <= ours))
+    # --- Imputation keeps `age = year_ref - year` row by row, so the means keep it too ---
+    gap = abs(means["age"] - (year - means["year"]))
+    checks.append(("age mean", f"{means['age']:.5f} vs {year} - {means['year']:.5f}", gap < 1e-6))
+    median = float(featured["mileage_k"].median())
+    checks.append(("mileage_k median", f"{median:g} vs fitted {medians['mileage_k']:g}", median == medians["mileage_k"]))
+
+    for name, detail, ok in checks:
+        print(f"{name:>28} {'OK' if ok else 'MISMATCH':>8}  {detail}")
+    for name in ("desc_len", "has_keywords_warranty"):
+        print(f"{name + ' median':>28} {'-':>8}  {featured[name].median():g} vs fitted {medians[name]:g}")
+    preds = pipeline.predict(featured.drop(columns=["price"]))
+    r2 = 1 - np.sum((preds - df["price"]) ** 2) / np.sum((df["price"] - df["price"].mean()) ** 2)
+    print(f"{'R2 on plain rows':>28} {'-':>8}  {r2:.4f} on {len(df):,} rows")
+    return 0 if all(ok for _, _, ok in checks) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
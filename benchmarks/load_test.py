@@ -0,0 +1,82 @@
+import argparse
+import http.client
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), '..', 'dataset', 'dataset.csv')
+SPEC_COLS = ["make", "model", "year", "engine", "cylinders", "fuel", "mileage", "transmission",
+             "trim", "body", "doors", "exterior_color", "interior_color", "drivetrain"]
+
+def load_specs():
+    """Request bodies for `/predict`, one JSON object per dataset row."""
+    df = pd.read_csv(DATASET_PATH)[SPEC_COLS]
+    records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    return [json.dumps(record).encode("utf-8") for record in records]
+
+def _client(host, port, bodies, n_requests, latencies, errors):
+    # --- One keep-alive connection per simulated client ---
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    for i in range(n_requests):
+        body = bodies[i % len(bodies)]
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/predict", body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as exc:
+            errors.append(repr(exc))
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+def main():
+    """
+    Fire concurrent `/predict` requests at a running service and report throughput.
+
+    Start the service first (`python serve.py`), then run from the project root:
+    `python -m benchmarks.load_test --clients 32 --requests 200`.
+    """
+    parser = argparse.ArgumentParser(description="Load test for the prediction service.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    bodies = load_specs()
+    rng = np.random.default_rng(0)
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(
+            target=_client,
+            args=(url.hostname, url.port or 80, [bodies[j] for j in rng.permutation(len(bodies))],
+                  args.requests, latencies, errors)
+        )
+        for _ in range(args.clients)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1e3
+    print(f"{len(latencies):,} requests from {args.clients} clients in {seconds:.2f}s "
+          f"-> {len(latencies) / seconds:,.0f} req/sec")
+    print(f"latency p50 {np.percentile(ms, 50):.1f} ms | p90 {np.percentile(ms, 90):.1f} ms | "
+          f"p99 {np.percentile(ms, 99):.1f} ms | errors {len(errors)}")
+
+if __name__ == "__main__":
+    main()
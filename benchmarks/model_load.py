@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+# --- Runs in a fresh interpreter, so imports and lazy initialization are paid like on a replica start ---
+_COLD_START = """
+import json, sys, time
+start = time.perf_counter()
+from src.model_bundle import bundle_path
+from src.model_loader import MODEL_PATH, read_model
+layout, backend = sys.argv[1], sys.argv[2]
+if layout == "pickle":
+    import joblib
+    model = joblib.load(MODEL_PATH)
+    if backend == "numpy":
+        from src.tree_engine import CompiledPipeline
+        model = CompiledPipeline(model)
+else:
+    model = read_model(bundle_path(MODEL_PATH), backend=backend, warm_up=layout == "bundle+warm-up")
+loaded = time.perf_counter()
+import pandas as pd
+row = pd.read_csv("dataset/dataset.csv", nrows=1)
+before = time.perf_counter()
+model.predict(row)
+first = time.perf_counter()
+model.predict(row)
+second = time.perf_counter()
+print(json.dumps({"load": loaded - start, "first": first - before, "second": second - first}))
+"""
+
+LAYOUTS = ["pickle", "bundle", "bundle+warm-up"]
+
+def _cold_start(layout, backend):
+    out = subprocess.run(
+        [sys.executable, "-c", _COLD_START, layout, backend],
+        capture_output=True, text=True, check=True, cwd=os.path.join(os.path.dirname(__file__), ".."),
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    """
+    Compare cold start time of the pickled model and the bundle, per backend.
+
+    Every run starts a new Python process and measures the time to a loaded
+    model (imports included) and the latency of the first two single-row
+    predictions. Run from the project root: `python -m benchmarks.model_load`.
+    """
+    parser = argparse.ArgumentParser(description="Model cold load and first prediction benchmark.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # --- Make sure the bundle exists before timing it ---
+    from src.model_loader import prepare_bundle
+    prepare_bundle()
+
+    print(f"{'layout':>16} {'backend':>8} {'load s':>8} {'1st ms':>8} {'2nd ms':>8}")
+    results = []
+    for backend in ("sklearn", "numpy"):
+        for layout in LAYOUTS:
+            runs = [_cold_start(layout, backend) for _ in range(args.runs)]
+            load, first, second = (np.median([run[key] for run in runs]) for key in ("load", "first", "second"))
+            results.append((layout, backend, load, first, second))
+            print(f"{layout:>16} {backend:>8} {load:8.3f} {first * 1000:8.1f} {second * 1000:8.1f}")
+    return results
+
+if __name__ == "__main__":
+    main()
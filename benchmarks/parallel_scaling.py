@@ -0,0 +1,56 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.model_loader import read_model
+from src.parallel_predict import DEFAULT_SHARD_SIZE, ParallelPredictor
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), '..', 'dataset', 'dataset.csv')
+
+def replicate_dataset(n_rows):
+    """Repeat the bundled dataset until it has `n_rows` rows."""
+    df = pd.read_csv(DATASET_PATH).dropna(subset=['price']).reset_index(drop=True)
+    reps = -(-n_rows // len(df))
+    return pd.concat([df] * reps, ignore_index=True).iloc[:n_rows]
+
+def main():
+    """
+    Measure how batch prediction throughput scales with the number of workers.
+
+    Run from the project root: `python -m benchmarks.parallel_scaling --rows 2000000`.
+    """
+    parser = argparse.ArgumentParser(description="Parallel batch prediction scaling benchmark.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="worker counts to try (default: 1, 2, 4, ... up to the core count)")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({2 ** i for i in range(cores.bit_length()) if 2 ** i <= cores} | {cores})
+    df = replicate_dataset(args.rows)
+    print(f"{len(df):,} rows, shard size {args.shard_size:,}, {cores} cores")
+
+    # --- Baseline: single call of the pipeline in this process, loaded and warmed up beforehand ---
+    model = read_model()
+    start = time.perf_counter()
+    expected = model.predict(df).astype(float)
+    baseline = time.perf_counter() - start
+    print(f"{'in-process':>12}: {baseline:7.2f}s {len(df) / baseline:12,.0f} rows/sec")
+
+    for n_workers in worker_counts:
+        with ParallelPredictor(n_workers=n_workers, shard_size=args.shard_size) as predictor:
+            # --- Start and load every worker so their start-up is not part of the timing ---
+            predictor.warm_up(df)
+            start = time.perf_counter()
+            preds = predictor.predict(df)
+            seconds = time.perf_counter() - start
+        assert np.allclose(preds, expected, rtol=1e-5), "parallel predictions differ from the pipeline"
+        print(f"{n_workers:>4} workers: {seconds:7.2f}s {len(df) / seconds:12,.0f} rows/sec "
+              f"({baseline / seconds:.2f}x)")
+
+if __name__ == "__main__":
+    main()
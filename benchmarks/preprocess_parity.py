@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.model_loader import MODEL_PATH
+from src.preprocess import FittedPreprocessor
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), '..', 'dataset', 'dataset.csv')
+
+def _with_edge_cases(df):
+    """Add rows with missing values and categories the encoder has never seen."""
+    edge = df.head(4).copy()
+    edge.loc[edge.index[0], "make"] = "Unseen Make"
+    edge.loc[edge.index[1], ["year", "mileage"]] = np.nan
+    edge.loc[edge.index[2], ["engine", "trim"]] = None
+    edge.loc[edge.index[3], "doors"] = np.nan
+    return pd.concat([df, edge], ignore_index=True)
+
+def _time(func, *args, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - start) / repeat * 1e3
+
+def main():
+    """
+    Check `FittedPreprocessor` against the pipeline's ColumnTransformer and time both.
+
+    Run from the project root: `python -m benchmarks.preprocess_parity`.
+    Exits non-zero when the outputs differ.
+    """
+    # --- The pickled pipeline, not a bundle: its ColumnTransformer is the reference ---
+    model = joblib.load(MODEL_PATH)
+    reference = model.named_steps["preprocess"]
+    fast = FittedPreprocessor.from_pipeline(model)
+    df = _with_edge_cases(pd.read_csv(DATASET_PATH))
+
+    expected = reference.transform(df).toarray()
+    sparse = fast.transform(df).toarray()
+    dense = fast.transform_dense(df, missing=0.0)
+    ok = expected.shape == sparse.shape and np.allclose(expected, sparse) and np.allclose(expected, dense, atol=1e-5)
+    print(f"parity on {len(df):,} rows: {'OK' if ok else 'MISMATCH'}")
+
+    row = df.iloc[[0]]
+    print(f"single row  ColumnTransformer {_time(reference.transform, row):7.3f} ms"
+          f" | FittedPreprocessor {_time(fast.transform_dense, row):7.3f} ms")
+    print(f"{len(df):,} rows ColumnTransformer {_time(reference.transform, df, repeat=10):7.3f} ms"
+          f" | FittedPreprocessor {_time(fast.transform_dense, df, repeat=10):7.3f} ms")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
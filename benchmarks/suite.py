@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from src.dataset import read_dataset
+from src.features import MODEL_FEATURES, add_features
+from src.model_loader import MODEL_PATH, read_model
+from src.similar import SimilarVehicleIndex
+from src.styles import color_name
+from src.summary import SummaryStore
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_THRESHOLD = 0.25
+BATCH_SIZES = [1_000, 100_000, 1_000_000]
+SEED = 42
+
+# --- Columns jittered in synthetic rows so they are not plain copies of the dataset ---
+_JITTER_COLS = {"mileage": 0.15, "price": 0.10}
+
+def synthetic_rows(df, n_rows, seed=SEED):
+    """
+    Reproducible synthetic vehicles sampled from `df`.
+
+    Rows are drawn with replacement and `mileage` / `price` are scaled by a
+    small random factor, the same `seed` always gives the same frame.
+    """
+    rng = np.random.default_rng(seed)
+    out = df.iloc[rng.integers(0, len(df), n_rows)].reset_index(drop=True)
+    for col, spread in _JITTER_COLS.items():
+        if col not in out:
+            continue
+        out[col] = (out[col] * rng.uniform(1 - spread, 1 + spread, n_rows)).round()
+    return out
+
+def _timings(func, repeat):
+    """Wall time in seconds of `repeat` calls of `func`."""
+    times = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        times[i] = time.perf_counter() - start
+    return times
+
+def _metric(value, unit, better="lower"):
+    return {"value": float(value), "unit": unit, "better": better}
+
+# --- Benchmarks, each returns {metric name: metric} ---
+
+def bench_model_load(ctx):
+    times = _timings(lambda: read_model(MODEL_PATH), ctx["repeat"])
+    return {"model_load": _metric(np.median(times), "s")}
+
+def bench_single_predict(ctx):
+    out = {}
+    rows = [ctx["df"].iloc[[i]] for i in range(200)]
+    for backend in ("sklearn", "numpy"):
+        model = read_model(backend=backend)
+        model.predict(rows[0])
+        times = np.concatenate([_timings(lambda r=r: model.predict(r), 1) for r in rows * ctx["repeat"]]) * 1000
+        out[f"single_predict_{backend}_p50"] = _metric(np.percentile(times, 50), "ms")
+        out[f"single_predict_{backend}_p99"] = _metric(np.percentile(times, 99), "ms")
+    return out
+
+def bench_batch_predict(ctx):
+    out = {}
+    model = ctx["model"]
+    for n_rows in ctx["batch_sizes"]:
+        batch = synthetic_rows(ctx["df"][ctx["model_cols"]], n_rows)
+        seconds = np.median(_timings(lambda: model.predict(batch), 1 if n_rows >= 100_000 else ctx["repeat"]))
+        out[f"batch_predict_{n_rows}"] = _metric(n_rows / seconds, "rows/s", "higher")
+    return out
+
+def bench_color_name(ctx):
+    rng = np.random.default_rng(SEED)
+    colors = [f"#{v:06x}" for v in rng.integers(0, 0xFFFFFF, 500)]
+    times = _timings(lambda: [color_name(c) for c in colors], ctx["repeat"])
+    return {"color_name": _metric(np.median(times) / len(colors) * 1e6, "us/call")}
+
+def bench_similar(ctx):
+    df = ctx["df"]
+    build = _timings(lambda: SimilarVehicleIndex(df), ctx["repeat"])
+    index = SimilarVehicleIndex(df)
+    specs = synthetic_rows(df, 200).to_dict(orient="records")
+    times = np.concatenate([_timings(lambda s=s: index.query(s, k=5), 1) for s in specs]) * 1000
+    make_times = np.concatenate([_timings(lambda s=s: index.query(s, k=5, make=s["make"]), 1) for s in specs]) * 1000
+    return {
+        "similar_build": _metric(np.median(build), "s"),
+        "similar_query_p50": _metric(np.percentile(times, 50), "ms"),
+        "similar_query_p99": _metric(np.percentile(times, 99), "ms"),
+        "similar_query_make_p50": _metric(np.percentile(make_times, 50), "ms"),
+    }
+
+def bench_aggregations(ctx):
+    df = synthetic_rows(ctx["df"], 100_000)
+    build = _timings(lambda: SummaryStore(df), ctx["repeat"])
+    store = SummaryStore(df.iloc[:90_000])
+    append = _timings(lambda: store.append(df.iloc[90_000:]), ctx["repeat"])
+    return {
+        "aggregations_build_100k": _metric(np.median(build), "s"),
+        "aggregations_append_10k": _metric(np.median(append), "s"),
+    }
+
+def bench_features(ctx):
+    df = synthetic_rows(ctx["df"], 100_000)
+    times = _timings(lambda: add_features(df, MODEL_FEATURES), ctx["repeat"])
+    return {"features_100k": _metric(np.median(times), "s")}
+
+BENCHMARKS = {
+    "model_load": bench_model_load,
+    "single_predict": bench_single_predict,
+    "batch_predict": bench_batch_predict,
+    "color_name": bench_color_name,
+    "similar": bench_similar,
+    "aggregations": bench_aggregations,
+    "features": bench_features,
+}
+
+def compare(results, baseline, threshold):
+    """
+    Metrics of `results` that are more than `threshold` (a fraction) worse than `baseline`.
+
+    Returns
+    -------
+    list[tuple[str, float, float, float]]
+        (name, baseline value, new value, relative change) of every regression.
+    """
+    regressions = []
+    for name, metric in results.items():
+        old = baseline.get(name)
+        if old is None or old["value"] == 0:
+            continue
+        change = (metric["value"] - old["value"]) / old["value"]
+        worse = change if metric["better"] == "lower" else -change
+        if worse > threshold:
+            regressions.append((name, old["value"], metric["value"], change))
+    return regressions
+
+def main():
+    """
+    Run the performance benchmarks and compare them with a saved baseline.
+
+    Run from the project root: `python -m benchmarks.suite`. The first run
+    (or `--save`) writes `benchmarks/baseline.json`, later runs exit with
+    status 1 when a metric is more than `--threshold` worse than the baseline.
+    """
+    parser = argparse.ArgumentParser(description="Performance benchmark suite with regression check.")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown before a metric counts as a regression")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = read_dataset()
+    model = read_model()
+    ctx = {
+        "df": df,
+        "model": model,
+        "model_cols": list(model.feature_names_in_),
+        "batch_sizes": args.batch_sizes,
+        "repeat": args.repeat,
+    }
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        start = time.perf_counter()
+        metrics = BENCHMARKS[name](ctx)
+        print(f"{name} ({time.perf_counter() - start:.1f}s)")
+        for metric_name, metric in metrics.items():
+            print(f"  {metric_name:<28} {metric['value']:>14,.4f} {metric['unit']}")
+        results.update(metrics)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if baseline is None or args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                            "cpus": os.cpu_count()},
+                "metrics": {**(baseline or {}).get("metrics", {}), **results},
+            }, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline["metrics"], args.threshold)
+    for name, old, new, change in regressions:
+        print(f"REGRESSION {name}: {old:,.4f} -> {new:,.4f} ({change:+.0%})")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import argparse
+import os
+import subprocess
+import sys
+
+from src.model_bundle import bundle_path
+from src.model_loader import MODEL_PATH
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# --- One worker: load the model like a serving process would, predict once and wait to be measured ---
+_WORKER = """
+import sys
+layout, backend = sys.argv[1], sys.argv[2]
+import pandas as pd
+from src.model_loader import MODEL_PATH, read_model
+if layout == "pickle":
+    import joblib
+    model = joblib.load(MODEL_PATH)
+    if backend == "numpy":
+        from src.tree_engine import CompiledPipeline
+        model = CompiledPipeline(model)
+elif layout == "bundle":
+    from src.model_bundle import bundle_path
+    model = read_model(bundle_path(MODEL_PATH), backend=backend)
+if layout != "none":
+    model.predict(pd.read_csv("dataset/dataset.csv", nrows=100))
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+# --- (layout, backend): "none" is the interpreter with pandas and the app modules but no model ---
+LAYOUTS = [("none", "-"), ("pickle", "sklearn"), ("bundle", "sklearn"), ("pickle", "numpy"), ("bundle", "numpy")]
+
+def _rollup(pid):
+    """RSS, PSS and USS (private pages) of a process in KB, from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields["Rss"], fields["Pss"], fields["Private_Clean"] + fields["Private_Dirty"]
+
+def _mapped(pid, prefix):
+    """RSS and PSS in KB of the mappings of files under `prefix`, e.g. the model bundle."""
+    rss = pss = 0
+    inside = False
+    with open(f"/proc/{pid}/smaps", "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if "-" in parts[0] and len(parts) >= 5:
+                # --- Mapping header: address range, perms, offset, device, inode [, path] ---
+                inside = len(parts) >= 6 and parts[5].startswith(prefix)
+            elif inside and parts[0] == "Rss:":
+                rss += int(parts[1])
+            elif inside and parts[0] == "Pss:":
+                pss += int(parts[1])
+    return rss, pss
+
+def measure(layout, backend, n_workers):
+    """Start `n_workers` workers with the same model layout and measure them while all are alive."""
+    workers = [
+        subprocess.Popen([sys.executable, "-c", _WORKER, layout, backend], cwd=ROOT, text=True,
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        for _ in range(n_workers)
+    ]
+    try:
+        for worker in workers:
+            if worker.stdout.readline().strip() != "ready":
+                raise RuntimeError(f"Worker for {layout}/{backend} failed to start")
+        bundle = os.path.realpath(bundle_path(MODEL_PATH))
+        rows = [(*_rollup(w.pid), *_mapped(w.pid, bundle)) for w in workers]
+    finally:
+        for worker in workers:
+            worker.stdin.close()
+            worker.wait()
+    return [sum(column) for column in zip(*rows)]
+
+def main():
+    """
+    Compare the memory of N worker processes per model layout.
+
+    Every worker loads the model the way a Streamlit or serving process does
+    and predicts once. With all of them alive, their RSS, PSS (shared pages
+    split between the processes that map them, so the PSS of all workers adds
+    up to what the host pays) and USS (pages no other process shares) are read
+    from /proc, plus the RSS and PSS of the memory-mapped bundle files. Linux
+    only. Run from the project root: `python -m benchmarks.worker_memory --workers 1 4 8`.
+    """
+    parser = argparse.ArgumentParser(description="Per-worker and per-host memory of the model layouts.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    # --- Export the bundle up front, every worker maps the same files ---
+    from src.model_loader import prepare_bundle
+    prepare_bundle()
+
+    print(f"{'layout':>8} {'backend':>8} {'workers':>8} {'RSS/w MB':>9} {'USS/w MB':>9} {'host PSS MB':>12} "
+          f"{'bundle RSS/w KB':>16} {'bundle PSS/w KB':>16}")
+    results = []
+    for n_workers in args.workers:
+        for layout, backend in LAYOUTS:
+            rss, pss, uss, bundle_rss, bundle_pss = measure(layout, backend, n_workers)
+            results.append((layout, backend, n_workers, rss, pss, uss, bundle_rss, bundle_pss))
+            print(f"{layout:>8} {backend:>8} {n_workers:>8} {rss / n_workers / 1024:9.1f} {uss / n_workers / 1024:9.1f} "
+                  f"{pss / 1024:12.1f} {bundle_rss / n_workers:16.0f} {bundle_pss / n_workers:16.0f}")
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,20 @@ st.set_page_config(
     layout=st.session_state.get("layout", "wide"),
     initial_sidebar_state="auto"
 )
-from app_pages import home, single, extended, batch
+from src.model_loader import load_prediction_cache, prediction_dispatcher_stats
+from src.startup import render_page, startup_report, timed_import
+from src.tracing import get_tracer
+
+# --- Traces listed in the sidebar performance panel ---
+PANEL_TRACES = 10
+
+# --- Page modules, imported only when their page is opened ---
+PAGES = {
+    "Home": "app_pages.home",
+    "Vehicle Price Prediction": "app_pages.single",
+    "Batch Prediction": "app_pages.batch",
+    "Insights and Analytics": "app_pages.extended",
+}
 
 st.title("🚗 Vehicle Price Predictor")
 st.caption("""This Application is made for the prediction of User Inputted Specifications of a Vehicle, The Model was trained 
@@ -17,7 +30,7 @@ st.markdown('---')
 # --- Sidebar Navigation ---
 with st.sidebar:
     st.title("Navigation")
-    page = st.sidebar.selectbox("Go to", ["Home", "Vehicle Price Prediction", "Batch Prediction", "Insights and Analytics"])
+    page = st.sidebar.selectbox("Go to", list(PAGES))
 
     st.markdown("---")
     # --- Header ---
@@ -33,14 +46,83 @@ with st.sidebar:
     st.text(f"{greeting} — Today is {current_date}")
 
 # --- Load Pages ---
-if page == "Home":
-    home.show()
-elif page == "Vehicle Price Prediction":
-    single.show()
-elif page == "Insights and Analytics":
-    extended.show()
-elif page == "Batch Prediction":
-    batch.show()
+render_page(page, timed_import(PAGES[page]).show)
+
+# --- Prediction Cache Stats ---
+with st.sidebar:
+    st.markdown("---")
+    cache_stats = load_prediction_cache().stats()
+    st.caption("🗃️ Prediction Cache")
+    st.text(
+        f"Hits: {cache_stats['hits']:,} | Misses: {cache_stats['misses']:,}\n"
+        f"Evictions: {cache_stats['evictions']:,} | Invalidations: {cache_stats['invalidations']:,}\n"
+        f"Entries: {cache_stats['size']:,} / {cache_stats['max_size']:,}"
+    )
+
+    # --- Prediction Dispatcher Stats ---
+    dispatch_stats = prediction_dispatcher_stats()
+    with st.expander("📦 Prediction Dispatcher"):
+        st.text(
+            f"Queue depth: {dispatch_stats['queue_depth']}\n"
+            f"Batches: {dispatch_stats['batches']:,} | Requests: {dispatch_stats['requests']:,}"
+        )
+        if dispatch_stats["batches"]:
+            st.caption("Rows per batch (up to)")
+            st.bar_chart({str(k): v for k, v in dispatch_stats["batch_sizes"].items()})
+            st.caption("Queue depth at dispatch (up to)")
+            st.bar_chart({str(k): v for k, v in dispatch_stats["queue_depths"].items()})
+
+# --- Startup Report ---
+with st.sidebar:
+    report = startup_report()
+    with st.expander("⏱️ Startup Report"):
+        st.caption("First import per module (ms)")
+        st.dataframe(
+            {"Module": list(report["imports"]), "ms": [round(t * 1000, 1) for t in report["imports"].values()]},
+            hide_index=True, use_container_width=True
+        )
+        st.caption("First render per page (ms)")
+        st.dataframe(
+            {"Page": list(report["first_render"]), "ms": [round(t * 1000, 1) for t in report["first_render"].values()]},
+            hide_index=True, use_container_width=True
+        )
+
+# --- Performance Panel ---
+with st.sidebar:
+    tracer = get_tracer()
+    traces = tracer.recent(PANEL_TRACES)
+    with st.expander("🧭 Performance"):
+        if not traces:
+            st.caption("No traces yet, run a search or a prediction.")
+        else:
+            st.caption(f"Last {len(traces)} requests (ms)")
+            st.dataframe(
+                {
+                    "Request": [t["name"] for t in traces],
+                    "Total": [t["duration_ms"] for t in traces],
+                    "Stages": [
+                        ", ".join(f"{'· ' * s['depth']}{s['name']} {s['duration_ms']:.1f}" for s in t["spans"])
+                        for t in traces
+                    ],
+                },
+                hide_index=True, use_container_width=True
+            )
+            latest = traces[0]
+            # --- Innermost stages summed by name, a parent's time is already split among its children ---
+            stages = {}
+            spans = latest["spans"]
+            for i, s in enumerate(spans):
+                if i + 1 < len(spans) and spans[i + 1]["depth"] > s["depth"]:
+                    continue
+                stages[s["name"]] = stages.get(s["name"], 0.0) + s["duration_ms"]
+            st.caption(f"Latest: {latest['name']}, stages (ms)")
+            st.bar_chart(stages)
+            st.download_button(
+                "💾 Export traces (JSON lines)",
+                data=tracer.export_jsonl(),
+                file_name="traces.jsonl",
+                mime="application/x-ndjson",
+            )
 
 # --- Footer ---
 st.markdown("---")
@@ -0,0 +1,25 @@
+import argparse
+
+from src.batch_scorer import DEFAULT_CHUNK_SIZE, score_csv
+from src.model_loader import BACKENDS
+from src.parallel_predict import DEFAULT_SHARD_SIZE
+
+if __name__ == "__main__":
+    # --- Headless batch scoring, e.g. `python score_batch.py feed.csv feed_scored.csv --resume` ---
+    parser = argparse.ArgumentParser(description="Score a vehicle CSV with the trained model, chunk by chunk.")
+    parser.add_argument("input", help="CSV file with vehicle rows")
+    parser.add_argument("output", help="CSV file to write the predictions to")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk (default: %(default)s)")
+    parser.add_argument("--resume", action="store_true", help="continue from the last finished chunk of a crashed run")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes used for prediction (default: %(default)s)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="rows per worker task (default: %(default)s)")
+    parser.add_argument("--backend", choices=BACKENDS, default="sklearn", help="prediction backend (default: %(default)s)")
+    parser.add_argument("--rejects", default=None, help="CSV for rows that fail validation (default: <output>.rejects.csv)")
+    args = parser.parse_args()
+
+    summary = score_csv(args.input, args.output, chunksize=args.chunksize, resume=args.resume,
+                        workers=args.workers, shard_size=args.shard_size, backend=args.backend,
+                        rejects_path=args.rejects)
+    print(f"Scored {summary['rows']:,} rows in {summary['seconds']:.1f}s ({summary['rows_per_sec']:,.0f} rows/sec)")
+    if summary["rejected"]:
+        print(f"Rejected {summary['rejected']:,} rows, see {summary['rejects_path']}")
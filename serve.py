@@ -0,0 +1,45 @@
+import argparse
+
+from src.micro_batcher import DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT
+from src.model_loader import BACKENDS, MODEL_PATH, prepare_bundle, read_model
+from src.model_registry import POLL_INTERVAL, REGISTRY_PATH, ModelRegistry
+from src.service import PredictionServer
+
+if __name__ == "__main__":
+    # --- Local prediction service, e.g. `python serve.py --port 8000` ---
+    parser = argparse.ArgumentParser(description="Serve vehicle price predictions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on (default: %(default)s)")
+    parser.add_argument("--backend", choices=BACKENDS, default="sklearn", help="prediction backend (default: %(default)s)")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT * 1000,
+                        help="micro-batching window for /predict in ms (default: %(default)s)")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help="most /predict rows combined into one call (default: %(default)s)")
+    parser.add_argument("--registry", nargs="?", const=REGISTRY_PATH, default=None,
+                        help="serve the active model of a registry file, reloaded when it changes "
+                             "(default file: model/registry.json)")
+    parser.add_argument("--poll", type=float, default=POLL_INTERVAL,
+                        help="seconds between checks for changed model files (default: %(default)s)")
+    parser.add_argument("--shadow-log", default=None, help="append shadow comparisons to this JSON lines file")
+    parser.add_argument("--bundle", action="store_true",
+                        help="serve model/vehicle_price_dt.pkl from its bundle, exported first when missing or stale")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    if args.registry:
+        model = ModelRegistry(args.registry, backend=args.backend, poll_interval=args.poll,
+                              shadow_log_path=args.shadow_log)
+        print(f"Serving model {model.current.name!r} of {args.registry}")
+    else:
+        path = (prepare_bundle() or MODEL_PATH) if args.bundle else MODEL_PATH
+        model = read_model(path, backend=args.backend)
+    server = PredictionServer((args.host, args.port), model,
+                              max_wait=args.max_wait_ms / 1000, max_batch_size=args.max_batch_size,
+                              verbose=args.verbose)
+    print(f"Serving predictions on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,272 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.ingest import check_columns, input_schema
+from src.model_loader import MODEL_PATH, read_model
+from src.parallel_predict import DEFAULT_SHARD_SIZE, ParallelPredictor
+from src.validation import REJECT_ROW_COL, reject_column, validate_batch
+
+PREDICTION_COL = "Predicted_price"
+DEFAULT_CHUNK_SIZE = 100_000
+# --- Width in dollars of the predicted price histogram bins ---
+HIST_BIN_WIDTH = 5_000
+
+def _checkpoint_path(output_path):
+    """Sidecar file recording how far a scoring run has progressed."""
+    return output_path + ".progress.json"
+
+def rejects_path_for(output_path):
+    """Default file for the rows of a run that failed validation, `<output>.rejects.csv`."""
+    root, ext = os.path.splitext(output_path)
+    return root + ".rejects" + (ext or ".csv")
+
+def _read_checkpoint(output_path):
+    path = _checkpoint_path(output_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_checkpoint(output_path, state):
+    # --- Write-then-rename so a crash never leaves a half written checkpoint ---
+    path = _checkpoint_path(output_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+class BatchSummary:
+    """
+    Running aggregates of batch predictions, updated one chunk at a time.
+
+    Everything is kept as counts and sums, so adding a chunk only touches
+    that chunk and charts can be redrawn while scoring is still going.
+
+    Parameters
+    ----------
+    bin_width : float, optional
+        Width of the predicted price histogram bins.
+    """
+
+    def __init__(self, bin_width=HIST_BIN_WIDTH):
+        self.bin_width = bin_width
+        self.rows = 0
+        self.total = 0.0
+        self.hist = pd.Series(dtype="int64")
+        self.by_make = pd.DataFrame(columns=["sum", "count"], dtype="float64")
+        self.by_year_make = pd.DataFrame(columns=["sum", "count", "mileage"], dtype="float64")
+
+    def update(self, chunk, predictions):
+        """
+        Fold one scored chunk into the aggregates.
+
+        Parameters
+        ----------
+        chunk : pd.DataFrame
+            Input rows of the chunk.
+        predictions : np.ndarray
+            Predicted prices aligned with `chunk`.
+        """
+        predictions = np.asarray(predictions, dtype=float)
+        self.rows += len(predictions)
+        self.total += predictions.sum()
+
+        bins = pd.Series(np.floor(predictions / self.bin_width) * self.bin_width).value_counts()
+        self.hist = self.hist.add(bins, fill_value=0).astype("int64")
+
+        scored = chunk.assign(_price=predictions)
+        if "make" in scored.columns:
+            by_make = scored.groupby("make", observed=True)["_price"].agg(["sum", "count"])
+            self.by_make = self.by_make.add(by_make, fill_value=0)
+        if {"year", "mileage"} <= set(scored.columns):
+            valid = scored.dropna(subset=["year", "mileage"])
+            valid = valid[valid["mileage"] > 0]
+            keys = ["year", "make"] if "make" in valid.columns else ["year"]
+            by_year = valid.groupby(keys, observed=True).agg(sum=("_price", "sum"), count=("_price", "count"), mileage=("mileage", "sum"))
+            self.by_year_make = by_year if self.by_year_make.empty else self.by_year_make.add(by_year, fill_value=0)
+
+    @property
+    def mean(self):
+        """Mean predicted price so far."""
+        return self.total / self.rows if self.rows else float("nan")
+
+    def histogram(self):
+        """Rows per price bin, indexed by the bin's lower bound."""
+        return self.hist.sort_index()
+
+    def mean_by_make(self):
+        """Mean predicted price per make, cheapest first."""
+        return (self.by_make["sum"] / self.by_make["count"]).sort_values().rename("Predicted_price")
+
+    def year_bubbles(self):
+        """Mean predicted price and mean mileage per year (and make), one row each."""
+        df = self.by_year_make
+        return pd.DataFrame({
+            "price": df["sum"] / df["count"],
+            "mileage": df["mileage"] / df["count"],
+            "vehicles": df["count"],
+        }).reset_index()
+
+def score_csv(input_path, output_path, model=None, chunksize=DEFAULT_CHUNK_SIZE, resume=False, log=print,
+              workers=1, shard_size=DEFAULT_SHARD_SIZE, backend="sklearn", rejects_path=None, model_path=None):
+    """
+    Score a CSV file chunk by chunk and append the predictions to an output CSV.
+
+    Only one chunk is held in memory at a time, so peak memory depends on
+    `chunksize` and not on the size of the input file. After every chunk the
+    output is flushed to disk and a `<output>.progress.json` checkpoint is
+    written, which lets a crashed run continue from the last finished chunk.
+
+    The header is checked against the model's columns before anything is
+    predicted, and every chunk goes through `validate_batch()`: rows that fail
+    are written to `rejects_path` with their reason instead of being scored.
+
+    Parameters
+    ----------
+    input_path : str
+        CSV file with vehicle rows (same columns as `dataset/dataset.csv`).
+    output_path : str
+        Destination CSV, the input columns plus a `Predicted_price` column.
+    model : object, optional
+        Fitted pipeline with a `.predict()` method, defaults to the model at
+        `model_path`. Worker processes cannot share it, so it only applies
+        when `workers` is 1.
+    chunksize : int, optional
+        Number of rows read, predicted and written per step.
+    resume : bool, optional
+        Continue from the checkpoint of a previous run instead of starting over.
+    log : callable, optional
+        Receives one progress line per chunk, `None` to stay silent.
+    workers : int, optional
+        Worker processes used to predict each chunk, 1 predicts in-process.
+    shard_size : int, optional
+        Rows per worker task when `workers` is greater than 1.
+    backend : str, optional
+        Prediction backend used when the model is loaded here, see `read_model()`.
+    rejects_path : str, optional
+        CSV receiving the rejected rows, defaults to `rejects_path_for(output_path)`.
+        Removed at the end of a run without rejects.
+    model_path : str, optional
+        Model file or bundle directory to load, in-process when `model` is None
+        and in every worker process, defaults to `model/vehicle_price_dt.pkl`.
+
+    Returns
+    -------
+    dict
+        Summary with `rows` (scored), `rejected`, `chunks`, `seconds` and
+        `rows_per_sec` of this run.
+
+    Raises
+    ------
+    SchemaError
+        When the input lacks a column the model needs, before anything is written.
+    ValueError
+        When a `model` is passed with several `workers` but no `model_path` for them.
+    """
+    if model is not None and workers > 1 and model_path is None:
+        raise ValueError("Worker processes load their model from disk, pass model_path with workers > 1")
+    model_path = model_path or MODEL_PATH
+    if model is None:
+        model = read_model(model_path, backend=backend)
+    schema = input_schema(model)
+    # --- A missing or misspelled column fails the whole file, before the first predict ---
+    check_columns(pd.read_csv(input_path, nrows=0).columns, schema)
+    rejects_path = rejects_path or rejects_path_for(output_path)
+
+    predictor = None
+    if workers > 1:
+        predictor = ParallelPredictor(n_workers=workers, shard_size=shard_size, model_path=model_path, backend=backend)
+        predict = predictor.predict
+    else:
+        predict = model.predict
+
+    state = _read_checkpoint(output_path) if resume else None
+    if state is not None and state.get("input") != os.path.abspath(input_path):
+        raise ValueError(f"Checkpoint for {output_path} belongs to another input: {state.get('input')}")
+    if state is None:
+        state = {"input": os.path.abspath(input_path), "chunksize": chunksize,
+                 "chunks_done": 0, "rows_done": 0, "bytes_written": 0,
+                 "rows_rejected": 0, "rejects_bytes": 0}
+    # --- Checkpoints written before validation existed have no rejects yet ---
+    state.setdefault("rows_rejected", 0)
+    state.setdefault("rejects_bytes", 0)
+    # --- Keep the original chunk size so chunk boundaries line up on resume ---
+    chunksize = state["chunksize"]
+    rows_skipped = state["rows_done"]
+
+    if rows_skipped and not os.path.exists(output_path):
+        raise FileNotFoundError(f"Cannot resume, {output_path} is missing")
+
+    # --- Drop whatever a crashed run wrote after its last finished chunk ---
+    out = open(output_path, "r+b" if rows_skipped else "wb")
+    out.truncate(state["bytes_written"])
+    out.seek(state["bytes_written"])
+    rejects_out = open(rejects_path, "r+b" if rows_skipped and os.path.exists(rejects_path) else "wb")
+    rejects_out.truncate(state["rejects_bytes"])
+    rejects_out.seek(state["rejects_bytes"])
+
+    skip = (lambda i: 0 < i <= rows_skipped) if rows_skipped else None
+    reader = pd.read_csv(input_path, chunksize=chunksize, skiprows=skip)
+
+    rows = 0
+    rejected = 0
+    chunks = 0
+    start = time.perf_counter()
+    try:
+        for chunk in reader:
+            valid, rejects = validate_batch(chunk, schema)
+            # --- Valid rows are written as read, the coerced copy only feeds the model ---
+            scored = chunk
+            if len(rejects):
+                row_col = reject_column(REJECT_ROW_COL, chunk.columns)
+                keep = np.ones(len(chunk), dtype=bool)
+                keep[rejects[row_col].to_numpy()] = False
+                scored = chunk[keep].copy()
+                rejects[row_col] += state["rows_done"]
+                rejects.to_csv(rejects_out, header=state["rejects_bytes"] == 0, index=False, lineterminator="\n")
+                rejects_out.flush()
+                os.fsync(rejects_out.fileno())
+            predictions = predict(valid).astype(float).round(2) if len(valid) else np.empty(0)
+            scored[PREDICTION_COL] = predictions
+            scored.to_csv(out, header=state["chunks_done"] == 0, index=False, lineterminator="\n")
+            out.flush()
+            os.fsync(out.fileno())
+
+            rows += len(scored)
+            rejected += len(rejects)
+            chunks += 1
+            state["chunks_done"] += 1
+            state["rows_done"] += len(chunk)
+            state["bytes_written"] = out.tell()
+            state["rows_rejected"] += len(rejects)
+            state["rejects_bytes"] = rejects_out.tell()
+            _write_checkpoint(output_path, state)
+
+            if log is not None:
+                elapsed = time.perf_counter() - start
+                log(f"chunk {state['chunks_done']}: {state['rows_done']:,} rows done, {state['rows_rejected']:,} rejected "
+                    f"({(rows + rejected) / elapsed:,.0f} rows/sec)")
+    finally:
+        out.close()
+        rejects_out.close()
+        if predictor is not None:
+            predictor.close()
+
+    seconds = time.perf_counter() - start
+    # --- A finished run needs no checkpoint, a rerun starts from scratch ---
+    if os.path.exists(_checkpoint_path(output_path)):
+        os.remove(_checkpoint_path(output_path))
+    if state["rows_rejected"] == 0:
+        os.remove(rejects_path)
+    return {
+        "rows": rows,
+        "rejected": rejected,
+        "rejects_path": rejects_path if state["rows_rejected"] else None,
+        "chunks": chunks,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds > 0 else 0.0,
+    }
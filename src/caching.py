@@ -0,0 +1,23 @@
+import functools
+import os
+
+# --- Entries kept by caches keyed on a dataset version: the current one, and the previous one while sessions move over ---
+VERSION_ENTRIES = 2
+
+def file_version(path):
+    """Identify the current contents of a file by modification time and size."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+@functools.lru_cache(maxsize=None)
+def streamlit_cached(func, max_entries=None):
+    """
+    Wrap `func` with `st.cache_resource`, shared by every session of the app.
+
+    Streamlit is imported lazily, so modules using this helper can still be
+    imported by headless tools (CLI scoring, services) without the UI stack.
+    Pass `max_entries=VERSION_ENTRIES` for functions keyed on a data version,
+    so outdated versions are evicted instead of piling up in memory.
+    """
+    import streamlit as st
+    return st.cache_resource(func, max_entries=max_entries)
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import uuid
+
+import pandas as pd
+
+from src.caching import VERSION_ENTRIES, file_version, streamlit_cached
+
+DATASET_DIR = os.path.join(os.path.dirname(__file__), '..', 'dataset')
+DATASET_PATH = os.path.join(DATASET_DIR, 'dataset.csv')
+
+# --- Keys of the source signature stored in the Feather schema metadata ---
+_META_MTIME = b"source_mtime_ns"
+_META_SIZE = b"source_size"
+_META_HASH = b"source_sha256"
+
+def cache_path(csv_path=DATASET_PATH):
+    """Location of the columnar cache written next to a CSV file."""
+    return os.path.splitext(csv_path)[0] + ".feather"
+
+def file_hash(path, block_size=1 << 20, limit=None):
+    """SHA-256 of a file's contents, read in blocks, or of only its first `limit` bytes."""
+    digest = hashlib.sha256()
+    remaining = float("inf") if limit is None else limit
+    with open(path, "rb") as f:
+        while remaining > 0:
+            block = f.read(int(min(block_size, remaining)))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+def _read_cache(csv_path, mtime_ns, size):
+    """
+    Return (frame, sha256, same_stat) from the columnar cache, or None when it
+    is stale or missing. `same_stat` is False when only the file's mtime/size
+    record is outdated.
+    """
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        return None
+    path = cache_path(csv_path)
+    if not os.path.exists(path):
+        return None
+    table = feather.read_table(path, memory_map=True)
+    meta = table.schema.metadata or {}
+    if _META_HASH not in meta:
+        return None
+    sha256 = meta[_META_HASH].decode()
+    same_stat = meta.get(_META_MTIME) == str(mtime_ns).encode() and meta.get(_META_SIZE) == str(size).encode()
+    # --- A touched or copied CSV with unchanged contents keeps its cache ---
+    if not same_stat and file_hash(csv_path) != sha256:
+        return None
+    return table.to_pandas(), sha256, same_stat
+
+def _write_cache(csv_path, df, mtime_ns, size, sha256):
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError:
+        return
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        _META_MTIME: str(mtime_ns).encode(),
+        _META_SIZE: str(size).encode(),
+        _META_HASH: sha256.encode(),
+    })
+    # --- Write-then-rename so concurrent readers never see a partial file, sessions are threads of one process ---
+    tmp_path = f"{cache_path(csv_path)}.tmp{uuid.uuid4().hex}"
+    try:
+        feather.write_feather(table, tmp_path)
+        os.replace(tmp_path, cache_path(csv_path))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def read_dataset_with_version(path=DATASET_PATH):
+    """
+    Read the vehicle dataset through its columnar cache.
+
+    The CSV is only parsed when the Feather cache next to it is missing or
+    belongs to other contents (checked by mtime/size, then SHA-256). Without
+    pyarrow the CSV is parsed every time.
+
+    Parameters
+    ----------
+    path : str, optional
+        CSV file, defaults to `dataset/dataset.csv`.
+
+    Returns
+    -------
+    tuple[pd.DataFrame, str]
+        Rows with a price, re-indexed from 0, and the SHA-256 of the CSV
+        which identifies the dataset version.
+    """
+    mtime_ns, size = file_version(path)
+    cached = _read_cache(path, mtime_ns, size)
+    if cached is not None:
+        df, sha256, same_stat = cached
+    else:
+        df = pd.read_csv(path)
+        sha256 = file_hash(path)
+        same_stat = False
+    if not same_stat:
+        try:
+            _write_cache(path, df, mtime_ns, size, sha256)
+        except OSError:
+            # --- A read-only checkout still works, it just parses the CSV again next time ---
+            pass
+    df = df.dropna(subset=['price']).reset_index(drop=True)
+    return df, sha256
+
+def read_dataset(path=DATASET_PATH):
+    """Headless shortcut returning only the frame of `read_dataset_with_version()`."""
+    return read_dataset_with_version(path)[0]
+
+def _read_dataset_version(path, version):
+    # --- `version` only takes part in the cache key, a changed file means a new entry ---
+    return read_dataset_with_version(path)
+
+def load_dataset_with_version():
+    """
+    Shared, cached dataset and its version hash for every Streamlit session.
+
+    Returns
+    -------
+    tuple[pd.DataFrame, str]
+        See `read_dataset_with_version()`. The frame is shared and must be
+        treated as read-only, copy it before adding or changing columns.
+    """
+    return streamlit_cached(_read_dataset_version, max_entries=VERSION_ENTRIES)(DATASET_PATH, file_version(DATASET_PATH))
+
+def load_dataset():
+    """
+    Load the vehicle dataset once and share it between all pages and sessions.
+
+    The frame is parsed from `dataset/dataset.csv` (or its columnar cache) on
+    first use and reused until the CSV changes.
+
+    Returns
+    -------
+    pd.DataFrame
+        Shared read-only frame of vehicles with a price.
+    """
+    return load_dataset_with_version()[0]
@@ -0,0 +1,60 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from src.features import FEATURE_SOURCES, MODEL_FEATURES, add_features
+
+# --- sklearn side of `src.features`, imported by training and by loaders of pickled pipelines only ---
+
+class FeatureEngineer(BaseEstimator, TransformerMixin):
+    """
+    Pipeline step adding engineered features, so training and every prediction path share `add_features()`.
+
+    Parameters
+    ----------
+    features : list[str], optional
+        Features to add, see `add_features()`.
+    reference_year : int, optional
+        Year `age` is counted from, fixed at `fit` (default: the year of fitting)
+        so a saved model sees the same ages it was trained on.
+    """
+
+    def __init__(self, features=MODEL_FEATURES, reference_year=None):
+        self.features = features
+        self.reference_year = reference_year
+
+    def fit(self, X, y=None):
+        self.reference_year_ = datetime.date.today().year if self.reference_year is None else self.reference_year
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        return self
+
+    def transform(self, X):
+        return add_features(X, self.features, self.reference_year_)
+
+def with_features(pipeline, reference_year=None):
+    """
+    `pipeline` with a `FeatureEngineer` step in front when it reads engineered features it cannot compute.
+
+    Models trained before the step existed expect the features as input
+    columns, wrapping them lets every caller pass plain vehicle rows.
+
+    Parameters
+    ----------
+    pipeline : sklearn.pipeline.Pipeline
+        Fitted pipeline, returned as is when it needs no features or already has the step.
+    reference_year : int, optional
+        Year the model's `age` was counted from, usually the year it was saved.
+    """
+    from sklearn.pipeline import Pipeline
+
+    steps = getattr(pipeline, "named_steps", {})
+    needed = [col for col in getattr(pipeline, "feature_names_in_", []) if col in FEATURE_SOURCES]
+    if not needed or "features" in steps:
+        return pipeline
+    sources = [src for name in needed for src in FEATURE_SOURCES[name]]
+    raw = [col for col in pipeline.feature_names_in_ if col not in needed]
+    engineer = FeatureEngineer(needed, reference_year)
+    engineer.fit(pd.DataFrame(columns=raw + [src for src in dict.fromkeys(sources) if src not in raw]))
+    return Pipeline([("features", engineer), *pipeline.steps])
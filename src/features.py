@@ -0,0 +1,137 @@
+import datetime
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.caching import VERSION_ENTRIES, streamlit_cached
+from src.dataset import load_dataset_with_version
+
+# --- Engineered model inputs, as listed in model/vehicle_price_pipeline.metadata.json. `age`, `mileage_k` and
+# `make_model` are checked against that model by `benchmarks/feature_parity.py`, `desc_len` and
+# `has_keywords_warranty` are this module's definitions: the notebook that trained it does not define them ---
+MODEL_FEATURES = ["age", "mileage_k", "desc_len", "has_keywords_warranty", "make_model"]
+# --- Derived columns of the insights page ---
+INSIGHT_FEATURES = ["price_per_mile", "age", "luxury_flag"]
+LUXURY_MAKES = ["BMW", "Mercedes-Benz", "Audi", "Lexus"]
+WARRANTY_KEYWORDS = ["warranty", "warranties", "warrantied"]
+WARRANTY_PATTERN = r"\b(?:" + "|".join(WARRANTY_KEYWORDS) + r")\b"
+
+# --- Input columns every feature is computed from, and the dtype they are read with ---
+FEATURE_SOURCES = {
+    "age": ["year"],
+    "mileage_k": ["mileage"],
+    "desc_len": ["description"],
+    "has_keywords_warranty": ["description"],
+    "make_model": ["make", "model"],
+    "price_per_mile": ["price", "mileage"],
+    "luxury_flag": ["make"],
+}
+SOURCE_DTYPES = {
+    "year": "float32", "mileage": "float32", "price": "float32",
+    "make": "category", "model": "category", "description": "object",
+}
+
+def _keyword_flags(uniques):
+    """1 for every string of `uniques` containing a warranty keyword, in one regex pass."""
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        pattern = re.compile(WARRANTY_PATTERN, re.IGNORECASE)
+        return np.fromiter((pattern.search(s) is not None for s in uniques), dtype=np.int8, count=len(uniques))
+    # --- Arrow's RE2 engine scans the whole column in C ---
+    matches = pc.match_substring_regex(pa.array(uniques, type=pa.large_string()), WARRANTY_PATTERN, ignore_case=True)
+    return matches.to_numpy(zero_copy_only=False).astype(np.int8)
+
+def _per_value(codes, values, missing):
+    """Expand per-unique `values` to rows, code -1 (a missing value) maps to `missing`."""
+    return np.append(values, missing)[codes]
+
+def _make_model(df):
+    """`make` and `model` joined by a space, the strings are built once per distinct pair."""
+    make_codes, makes = pd.factorize(df["make"])
+    model_codes, models = pd.factorize(df["model"])
+    known = (make_codes >= 0) & (model_codes >= 0)
+    pair_codes, pairs = pd.factorize(make_codes[known].astype(np.int64) * len(models) + model_codes[known])
+    labels = (np.asarray(makes, dtype=object)[pairs // len(models)] + " "
+              + np.asarray(models, dtype=object)[pairs % len(models)])
+    # --- Different pairs can spell the same label, e.g. "Land" + "Rover X" and "Land Rover" + "X" ---
+    label_codes, categories = pd.factorize(labels)
+    codes = np.full(len(df), -1, dtype=np.int64)
+    codes[known] = label_codes[pair_codes]
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+def add_features(df, features=MODEL_FEATURES, year=None):
+    """
+    Copy of `df` with engineered feature columns added.
+
+    Every feature is computed on whole columns. The description features
+    factorize the text first, so a description shared by many rows is
+    measured and searched once, with a single regex for all warranty keywords.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Vehicle rows with the `FEATURE_SOURCES` columns of `features`, left untouched.
+    features : list[str], optional
+        Columns to add, any of `FEATURE_SOURCES`.
+    year : int, optional
+        Reference year for `age`, defaults to the current year.
+
+    Returns
+    -------
+    pd.DataFrame
+        Shallow copy of `df` plus the feature columns.
+    """
+    year = datetime.date.today().year if year is None else year
+    out = df.copy(deep=False)
+    text = None
+    for name in features:
+        if name == "age":
+            out[name] = year - df["year"]
+        elif name == "mileage_k":
+            # --- Thousands rounded to one decimal: the fitted median of the legacy pipeline is 0 and its
+            # splits fall at 0.05 steps, see `benchmarks/feature_parity.py`. In float64 like the training frame ---
+            out[name] = (df["mileage"].astype(np.float64) / 1000).round(1)
+        elif name == "price_per_mile":
+            out[name] = df["price"] / df["mileage"].replace(0, 1)
+        elif name == "luxury_flag":
+            out[name] = df["make"].isin(LUXURY_MAKES).astype(int)
+        elif name == "make_model":
+            out[name] = _make_model(df)
+        elif name in ("desc_len", "has_keywords_warranty"):
+            if text is None:
+                text = pd.factorize(df["description"])
+            codes, uniques = text
+            if name == "desc_len":
+                lengths = np.fromiter(map(len, uniques), dtype=np.int64, count=len(uniques))
+                out[name] = _per_value(codes, lengths, 0)
+            else:
+                out[name] = _per_value(codes, _keyword_flags(uniques), 0)
+        else:
+            raise ValueError(f"Unknown feature {name!r}, expected one of {list(FEATURE_SOURCES)}")
+    return out
+
+def _build_features(version, _df):
+    # --- `version` keys the cache, the underscore keeps Streamlit from hashing the frame ---
+    return add_features(_df, list(dict.fromkeys(MODEL_FEATURES + INSIGHT_FEATURES)))
+
+def load_features():
+    """
+    Shared dataset with every engineered feature added, built once per dataset version.
+
+    Returns
+    -------
+    pd.DataFrame
+        `load_dataset_with_version()` frame plus the `MODEL_FEATURES` and `INSIGHT_FEATURES` columns.
+    """
+    df, version = load_dataset_with_version()
+    return streamlit_cached(_build_features, max_entries=VERSION_ENTRIES)(version, df)
+
+def __getattr__(name):
+    # --- Pickles written before the sklearn step moved to `src.feature_pipeline` still find it here ---
+    if name in ("FeatureEngineer", "with_features"):
+        from src import feature_pipeline
+        return getattr(feature_pipeline, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,196 @@
+import difflib
+import gzip
+import os
+import zipfile
+
+import pandas as pd
+
+from src.features import FEATURE_SOURCES, SOURCE_DTYPES
+from src.preprocess import FittedPreprocessor
+
+# --- File extensions accepted by the batch upload ---
+UPLOAD_TYPES = ["csv", "gz", "zip", "parquet", "feather", "arrow"]
+
+def input_schema(model):
+    """
+    Columns a fitted model reads and the dtype each is parsed with.
+
+    Numeric columns are pinned to float32 and categorical ones to category,
+    both give the same predictions as the inferred dtypes for a fraction of
+    the memory. Engineered features the pipeline computes itself are replaced
+    by the columns they are computed from, e.g. `description` (kept as object).
+
+    Parameters
+    ----------
+    model : object
+        Fitted pipeline, a backend wrapping one in `.pipeline` or a bundled model.
+
+    Returns
+    -------
+    dict[str, str]
+        Column name -> pandas dtype, in training order.
+    """
+    pipeline = getattr(model, "pipeline", model)
+    # --- Compiled and bundled models carry their preprocessor and feature list directly ---
+    preprocessor = getattr(model, "preprocessor", None) or FittedPreprocessor.from_pipeline(pipeline)
+    engineer = getattr(pipeline, "named_steps", {}).get("features")
+    derived = list(engineer.features) if engineer is not None else getattr(model, "features", [])
+    schema = {col: "float32" for col in preprocessor.numeric_cols if col not in derived}
+    schema.update({col: "category" for col in preprocessor.categorical_cols if col not in derived})
+    for name in derived:
+        for col in FEATURE_SOURCES[name]:
+            schema.setdefault(col, SOURCE_DTYPES[col])
+    return schema
+
+def detect_format(filename):
+    """Upload format from the file name: "csv", "csv.gz", "csv.zip", "parquet" or "feather"."""
+    name = filename.lower()
+    if name.endswith(".zip"):
+        return "csv.zip"
+    if name.endswith(".gz"):
+        return "csv.gz"
+    if name.endswith(".parquet"):
+        return "parquet"
+    if name.endswith((".feather", ".arrow")):
+        return "feather"
+    if name.endswith(".csv"):
+        return "csv"
+    raise ValueError(f"Unsupported file type: {os.path.basename(filename)}")
+
+def _open_csv(source, fmt):
+    """Binary stream of the CSV text, decompressed on the fly."""
+    if fmt == "csv.gz":
+        return gzip.open(source, "rb")
+    if fmt == "csv.zip":
+        archive = zipfile.ZipFile(source)
+        members = [m for m in archive.namelist() if m.lower().endswith(".csv") and not m.startswith("__MACOSX")]
+        if not members:
+            raise ValueError("The zip archive contains no .csv file")
+        return archive.open(members[0])
+    return source
+
+def _arrow_type(dtype):
+    import pyarrow as pa
+    if dtype == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.string() if dtype == "object" else pa.float32()
+
+class SchemaError(ValueError):
+    """A batch is missing columns the model needs, no row of it can be scored."""
+
+def check_columns(columns, schema):
+    """
+    Raise `SchemaError` when a column of `schema` is missing from `columns`.
+
+    The message names every missing column and, for misspelled ones, the
+    closest column the file does have.
+    """
+    columns = [str(col) for col in columns]
+    missing = [col for col in schema if col not in columns]
+    if not missing:
+        return
+    extra = [col for col in columns if col not in schema]
+    notes = []
+    for col in missing:
+        close = difflib.get_close_matches(col, extra, n=1, cutoff=0.75)
+        notes.append(f"{col} (found {close[0]!r}?)" if close else col)
+    raise SchemaError(f"Missing required columns: {', '.join(notes)}")
+
+def _as_text(schema):
+    """`schema` with numeric columns read as text, for files where one does not parse."""
+    return {col: "category" if dtype == "category" else "object" for col, dtype in schema.items()}
+
+def _read_csv(source, fmt, schema, all_columns):
+    # --- The header alone tells whether a required column is missing ---
+    header = pd.read_csv(_open_csv(source, fmt), nrows=0).columns
+    check_columns(header, schema)
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+    try:
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        # --- Without pyarrow the C parser still skips unused columns and pins dtypes ---
+        return pd.read_csv(
+            _open_csv(source, fmt),
+            usecols=None if all_columns else list(schema),
+            dtype=schema,
+        )
+
+    convert = pa_csv.ConvertOptions(
+        include_columns=None if all_columns else list(schema),
+        column_types={col: _arrow_type(dtype) for col, dtype in schema.items()},
+        strings_can_be_null=True,
+    )
+    # --- Quoted descriptions span several lines ---
+    parse = pa_csv.ParseOptions(newlines_in_values=True)
+    table = pa_csv.read_csv(_open_csv(source, fmt), parse_options=parse, convert_options=convert)
+    return table.to_pandas()
+
+def _read_columnar(source, fmt, schema, all_columns):
+    try:
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(f"Reading {fmt} files needs pyarrow") from None
+
+    if fmt == "parquet":
+        names = pq.ParquetFile(source).schema_arrow.names
+    else:
+        import pyarrow as pa
+        names = pa.ipc.open_file(source).schema.names
+    check_columns(names, schema)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    columns = None if all_columns else list(schema)
+    if fmt == "parquet":
+        df = pq.read_table(source, columns=columns).to_pandas()
+    else:
+        df = feather.read_table(source, columns=columns, memory_map=isinstance(source, str)).to_pandas()
+    # --- Columnar files carry their own types, cast to the pinned ones ---
+    return df.astype(schema)
+
+def read_upload(source, filename, schema, all_columns=False):
+    """
+    Read a batch of vehicles from CSV, gzip/zip CSV, Parquet or Feather/Arrow.
+
+    Only the columns in `schema` are read, with their pinned dtypes. CSVs go
+    through the multithreaded pyarrow parser when pyarrow is installed and
+    through the pandas C parser otherwise. When a numeric column holds values
+    that are not numbers it is read as text instead, see
+    `src.validation.validate_batch()` for sorting out those rows.
+
+    Parameters
+    ----------
+    source : str or binary file-like
+        Path or seekable buffer, e.g. a Streamlit `UploadedFile`.
+    filename : str
+        Name of the file, its extension selects the format.
+    schema : dict[str, str]
+        Required columns and their dtypes, see `input_schema()`.
+    all_columns : bool, optional
+        Also read the columns the model does not use (name, description, ...).
+
+    Returns
+    -------
+    pd.DataFrame
+        The uploaded rows.
+
+    Raises
+    ------
+    SchemaError
+        For files missing a required column.
+    ValueError
+        For unsupported file types.
+    """
+    fmt = detect_format(filename)
+    read = _read_columnar if fmt in ("parquet", "feather") else _read_csv
+    try:
+        return read(source, fmt, schema, all_columns)
+    except SchemaError:
+        raise
+    except ValueError:
+        # --- A value that is not a number, read those columns as text and leave them to validation ---
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return read(source, fmt, _as_text(schema), all_columns)
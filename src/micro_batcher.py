@@ -0,0 +1,182 @@
+import contextvars
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+import pandas as pd
+
+from src.ingest import check_columns
+
+DEFAULT_MAX_WAIT = 0.005
+DEFAULT_MAX_BATCH_SIZE = 256
+
+# --- Put on the queue by `close()` to stop the worker thread ---
+_STOP = object()
+
+def _bucket(n):
+    """Power of two histogram bucket (upper bound) of a count."""
+    return 1 << max(n - 1, 0).bit_length()
+
+class MicroBatcher:
+    """
+    Combine concurrent prediction requests into one vectorized `predict` call.
+
+    A background thread takes the first pending request, keeps collecting
+    more for up to `max_wait` seconds or until `max_batch_size` rows are
+    queued, predicts them together and hands every caller its own slice of
+    the result through a `Future`. A request predicted on its own runs in the
+    caller's context, so spans opened by `predict_fn` join the caller's trace.
+
+    Parameters
+    ----------
+    predict_fn : callable
+        Function mapping a DataFrame to an array of predictions, e.g. `model.predict`.
+        Can be replaced at any time, the next batch uses the new one.
+    max_wait : float, optional
+        Longest time in seconds the first request of a batch waits for company.
+    max_batch_size : int, optional
+        Rows at which a batch is dispatched without waiting any longer.
+    columns : callable, optional
+        Returns the columns every request must have, checked per request in
+        `submit()`. Merged requests fill each other's missing columns with
+        NaN, so without it a malformed request could be scored depending on
+        which requests it is batched with.
+    """
+
+    def __init__(self, predict_fn, max_wait=DEFAULT_MAX_WAIT, max_batch_size=DEFAULT_MAX_BATCH_SIZE, columns=None):
+        self.predict_fn = predict_fn
+        self.columns = columns
+        self.max_wait = max_wait
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.batch_sizes = Counter()
+        self.queue_depths = Counter()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, df):
+        """
+        Queue `df` for prediction.
+
+        Parameters
+        ----------
+        df : pd.DataFrame or list[dict]
+            One or more vehicle rows, as a frame or as records.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to an array with one prediction per row of `df`, or
+            fails with `SchemaError` at once when a row misses a required column.
+        """
+        future = Future()
+        if self.columns is not None:
+            try:
+                required = self.columns()
+                for keys in ([record.keys() for record in df] if isinstance(df, list) else [df.columns]):
+                    check_columns(keys, required)
+            except ValueError as exc:
+                future.set_exception(exc)
+                return future
+        self._queue.put((df, future, contextvars.copy_context()))
+        return future
+
+    def predict(self, df, timeout=None):
+        """Blocking shortcut for `submit(df).result(timeout)`."""
+        return self.submit(df).result(timeout=timeout)
+
+    def queue_depth(self):
+        """Requests waiting to be batched."""
+        return self._queue.qsize()
+
+    def stats(self):
+        """
+        Dispatch counters for display.
+
+        Returns
+        -------
+        dict
+            `batches`, `requests`, current `queue_depth`, and the histograms
+            `batch_sizes` (rows per predict call) and `queue_depths` (requests
+            still waiting when a batch was dispatched), both keyed by power of
+            two bucket upper bound.
+        """
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "queue_depth": self.queue_depth(),
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "queue_depths": dict(sorted(self.queue_depths.items())),
+            }
+
+    def close(self):
+        """Finish the pending requests and stop the worker thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        rows = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # --- Serve what was collected, then let `_run` see the stop marker ---
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    @staticmethod
+    def _combine(items):
+        # --- Records are merged before building a single frame, cheaper than concatenating many tiny frames ---
+        if all(isinstance(item, list) for item in items):
+            return pd.DataFrame([record for item in items for record in item])
+        frames = [pd.DataFrame(item) if isinstance(item, list) else item for item in items]
+        return pd.concat(frames, ignore_index=True)
+
+    def _dispatch(self, batch):
+        try:
+            if len(batch) == 1:
+                df, _, context = batch[0]
+                preds = context.run(self.predict_fn, self._combine([df]))
+            else:
+                preds = self.predict_fn(self._combine([df for df, _, _ in batch]))
+        except Exception:
+            # --- One bad request must not fail its neighbours, retry them one by one ---
+            for df, future, context in batch:
+                try:
+                    future.set_result(context.run(self.predict_fn, self._combine([df])))
+                except Exception as exc:
+                    future.set_exception(exc)
+            return
+        start = 0
+        for df, future, _ in batch:
+            future.set_result(preds[start:start + len(df)])
+            start += len(df)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = self._collect(item)
+            with self._stats_lock:
+                self.batches += 1
+                self.requests += len(batch)
+                self.batch_sizes[_bucket(sum(len(df) for df, _, _ in batch))] += 1
+                self.queue_depths[_bucket(self._queue.qsize())] += 1
+            self._dispatch(batch)
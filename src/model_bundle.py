@@ -0,0 +1,197 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+from src.dataset import file_hash
+from src.preprocess import FittedPreprocessor
+from src.tree_engine import BLOCK_ROWS, TreeEnsemble
+
+BUNDLE_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+BOOSTER_NAME = "booster.ubj"
+# --- Fitted preprocessor statistics stored as arrays, one .npy file each ---
+_PREPROCESSOR_ARRAYS = ("medians", "means", "scales")
+
+def bundle_path(model_path):
+    """Location of the bundle written next to a pickled model, `<model>.bundle/`."""
+    return os.path.splitext(model_path)[0] + ".bundle"
+
+def _scalar(value):
+    return value.item() if hasattr(value, "item") else value
+
+def export_bundle(pipeline, path, source_path=None):
+    """
+    Write a fitted XGBoost pipeline as a bundle directory.
+
+    The bundle holds the booster in XGBoost's native UBJSON format, the fitted
+    preprocessor and the flattened trees of `TreeEnsemble` as `.npy` files that
+    load memory-mapped, and a `manifest.json` with the column layout. Loading
+    it needs neither sklearn nor unpickling, see `load_bundle()`.
+
+    Parameters
+    ----------
+    pipeline : sklearn.pipeline.Pipeline
+        Fitted pipeline with a `preprocess` step and an XGBoost `model` step,
+        optionally preceded by a `features` step.
+    path : str
+        Bundle directory, replaced as a whole.
+    source_path : str, optional
+        Pickle the pipeline was read from, recorded so stale bundles are detected.
+    """
+    preprocessor = FittedPreprocessor.from_pipeline(pipeline)
+    booster = pipeline.named_steps["model"].get_booster()
+    tree_arrays, tree_scalars = TreeEnsemble(booster).to_arrays()
+    engineer = pipeline.named_steps.get("features")
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "feature_names_in": [str(col) for col in pipeline.feature_names_in_],
+        "numeric_cols": list(preprocessor.numeric_cols),
+        "categorical_cols": list(preprocessor.categorical_cols),
+        "most_frequent": [_scalar(value) for value in preprocessor.most_frequent],
+        "features": list(engineer.features) if engineer is not None else [],
+        "reference_year": int(engineer.reference_year_) if engineer is not None else None,
+        "trees": tree_scalars,
+        "source": None,
+    }
+    if source_path is not None:
+        stat = os.stat(source_path)
+        manifest["source"] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": file_hash(source_path)}
+
+    # --- Write-then-rename so a reader never sees a half written bundle ---
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    booster.save_model(os.path.join(tmp_path, BOOSTER_NAME))
+    for name in _PREPROCESSOR_ARRAYS:
+        np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(preprocessor, name))
+    for j, categories in enumerate(preprocessor.categories):
+        # --- Fixed width unicode rather than object arrays, so they can be memory-mapped ---
+        values = categories.astype(str) if all(isinstance(v, str) for v in categories) else categories.astype(np.float64)
+        np.save(os.path.join(tmp_path, f"categories_{j}.npy"), values)
+    for name, values in tree_arrays.items():
+        np.save(os.path.join(tmp_path, f"tree_{name}.npy"), values)
+    with open(os.path.join(tmp_path, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    old_path = f"{path}.old{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def read_manifest(path):
+    """The bundle's manifest, None when `path` holds no bundle."""
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def is_current(path, source_path):
+    """True when the bundle at `path` was exported from the current contents of `source_path`."""
+    manifest = read_manifest(path)
+    if manifest is None or manifest.get("format") != BUNDLE_FORMAT or not manifest.get("source"):
+        return False
+    source = manifest["source"]
+    stat = os.stat(source_path)
+    if source["mtime_ns"] == stat.st_mtime_ns and source["size"] == stat.st_size:
+        return True
+    # --- A touched or copied pickle with unchanged contents keeps its bundle ---
+    return source["size"] == stat.st_size and source["sha256"] == file_hash(source_path)
+
+class BundledModel:
+    """
+    Predictor loaded from a bundle, a stand-in for the fitted pipeline at prediction time.
+
+    Parameters
+    ----------
+    preprocessor : FittedPreprocessor
+        Fitted preprocessing state.
+    feature_names_in : list[str]
+        Input columns, like `Pipeline.feature_names_in_`.
+    ensemble : TreeEnsemble, optional
+        Trees evaluated with NumPy, the "numpy" backend.
+    booster : xgboost.Booster, optional
+        Native booster, the "sklearn" backend, used when `ensemble` is None.
+    features : list[str], optional
+        Engineered features added before preprocessing, see `src.features.add_features()`.
+    reference_year : int, optional
+        Year `age` is counted from.
+    """
+
+    def __init__(self, preprocessor, feature_names_in, ensemble=None, booster=None, features=(), reference_year=None):
+        self.preprocessor = preprocessor
+        self.feature_names_in_ = np.asarray(feature_names_in, dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.ensemble = ensemble
+        self.booster = booster
+        self.features = list(features)
+        self.reference_year = reference_year
+
+    def predict(self, df):
+        """Predict prices for the rows of `df`, same output as the pipeline the bundle was exported from."""
+        if self.features:
+            from src.features import add_features
+            df = add_features(df, self.features, self.reference_year)
+        if self.ensemble is None:
+            return self.booster.inplace_predict(self.preprocessor.transform(df))
+        out = np.empty(len(df), dtype=np.float32)
+        for start in range(0, len(df), BLOCK_ROWS):
+            block = df.iloc[start:start + BLOCK_ROWS]
+            out[start:start + BLOCK_ROWS] = self.ensemble.predict_dense(self.preprocessor.transform_dense(block))
+        return out
+
+def load_bundle(path, backend="numpy"):
+    """
+    Load a bundle written by `export_bundle()`.
+
+    Parameters
+    ----------
+    path : str
+        Bundle directory.
+    backend : str, optional
+        "numpy" evaluates the memory-mapped trees without importing XGBoost
+        and looks categories up in the memory-mapped vocabularies, so the
+        model's pages are shared by every process of a host that loads the
+        bundle. "sklearn" loads the native booster and predicts with XGBoost.
+
+    Returns
+    -------
+    BundledModel
+    """
+    manifest = read_manifest(path)
+    if manifest is None or manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"No model bundle of format {BUNDLE_FORMAT} at {path}")
+
+    def array(name):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+    categorical_cols = manifest["categorical_cols"]
+    preprocessor = FittedPreprocessor(
+        numeric_cols=manifest["numeric_cols"],
+        medians=array("medians"),
+        means=array("means"),
+        scales=array("scales"),
+        categorical_cols=categorical_cols,
+        most_frequent=manifest["most_frequent"],
+        categories=[array(f"categories_{j}") for j in range(len(categorical_cols))],
+        shared=backend == "numpy",
+    )
+    ensemble = booster = None
+    if backend == "numpy":
+        ensemble = TreeEnsemble.from_arrays({name: array(f"tree_{name}") for name in TreeEnsemble.ARRAYS}, manifest["trees"])
+    else:
+        import xgboost
+        booster = xgboost.Booster()
+        booster.load_model(os.path.join(path, BOOSTER_NAME))
+    return BundledModel(
+        preprocessor,
+        manifest["feature_names_in"],
+        ensemble=ensemble,
+        booster=booster,
+        features=manifest["features"],
+        reference_year=manifest["reference_year"],
+    )
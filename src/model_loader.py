@@ -1,21 +1,231 @@
 import joblib
-import streamlit as st
+import json
 import os
 
-@st.cache_resource
-def load_model():
+from src.caching import streamlit_cached
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'model')
+MODEL_PATH = os.path.join(MODEL_DIR, 'vehicle_price_dt.pkl')
+METADATA_NAME = 'metadata.json'
+
+# --- Prediction backends: the stock sklearn/XGBoost pipeline or the flattened NumPy trees ---
+BACKENDS = ("sklearn", "numpy")
+
+def read_metadata(path):
+    """
+    Metadata of a model file, None without any.
+
+    Read from `<model>.metadata.json` next to it, or from the directory's
+    `metadata.json` (as written by `train.py`) when its `model_file` names it.
+    """
+    own = os.path.splitext(path)[0] + ".metadata.json"
+    shared = os.path.join(os.path.dirname(path), METADATA_NAME)
+    for metadata_path in (own, shared):
+        if not os.path.exists(metadata_path):
+            continue
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        if metadata.get("model_file", os.path.basename(path)) == os.path.basename(path):
+            return metadata
+    return None
+
+def _saved_year(path):
+    """Year in the `saved_at` of a model file's metadata, None without one."""
+    saved_at = (read_metadata(path) or {}).get("saved_at")
+    return int(saved_at[:4]) if saved_at else None
+
+def warm_up_model(model):
+    """
+    Run one prediction on a dummy row so lazy initialization is paid at load time.
+
+    The row holds the fitted medians and most frequent categories, and empty
+    strings for text inputs such as `description`.
+    """
+    import pandas as pd
+    from src.preprocess import FittedPreprocessor
+
+    preprocessor = getattr(model, "preprocessor", None)
+    if preprocessor is None:
+        preprocessor = FittedPreprocessor.from_pipeline(getattr(model, "pipeline", model))
+    row = {col: [""] for col in model.feature_names_in_}
+    row.update({col: [value] for col, value in zip(preprocessor.numeric_cols, preprocessor.medians)})
+    row.update({col: [value] for col, value in zip(preprocessor.categorical_cols, preprocessor.most_frequent)})
+    model.predict(pd.DataFrame(row))
+
+def _write_bundle(model, path, source_path):
+    from src.model_bundle import export_bundle
+    try:
+        export_bundle(model, path, source_path=source_path)
+    except (AttributeError, KeyError, ValueError, OSError):
+        # --- Not an XGBoost pipeline or a read-only model directory, keep loading the pickle ---
+        pass
+
+def prepare_bundle(path=MODEL_PATH):
+    """
+    Bundle directory of the pickled model at `path`, exported first when missing or stale.
+
+    This is the only place a bundle is written, `read_model()` never does.
+    Call it once before starting worker processes, they then all load and
+    memory-map the same files instead of each writing its own copy.
+
+    Returns
+    -------
+    str or None
+        The bundle path, None for models that cannot be bundled.
+    """
+    from src.model_bundle import bundle_path, is_current
+
+    bundle = bundle_path(path)
+    if not (os.path.isdir(bundle) and is_current(bundle, path)):
+        from src.feature_pipeline import with_features
+        _write_bundle(with_features(joblib.load(path), reference_year=_saved_year(path)), bundle, path)
+    return bundle if os.path.isdir(bundle) and is_current(bundle, path) else None
+
+def read_model(path=MODEL_PATH, backend="sklearn", warm_up=True):
+    """
+    Load the trained vehicle price prediction model from disk.
+
+    This is the uncached loader used by headless tools (CLI scoring, services)
+    that run outside of Streamlit. Inside the app use `load_model()` instead.
+
+    A pickle is loaded as is, nothing is written next to it. Pass a bundle
+    directory (`src/model_bundle.py`: native booster, memory-mapped arrays,
+    no sklearn import) for a cold start several times faster, exporting it
+    first is an explicit step, e.g. `read_model(prepare_bundle(path) or path)`.
+
+    Parameters
+    ----------
+    path : str, optional
+        Location of the pickled model or of a bundle directory, defaults to
+        `model/vehicle_price_dt.pkl`.
+    backend : str, optional
+        "sklearn" predicts with XGBoost, the pipeline as trained or its native
+        booster, "numpy" evaluates the trees with vectorized NumPy.
+    warm_up : bool, optional
+        Run a dummy prediction before returning, see `warm_up_model()`.
+
+    Returns
+    -------
+    object
+        The trained sklearn Pipeline (preprocessor + regressor), its compiled counterpart
+        or a `BundledModel`, all with the same `predict` output and `feature_names_in_`.
+        Pipelines trained on engineered features get a `FeatureEngineer` step in front,
+        see `src.feature_pipeline.with_features()`, so they take plain vehicle rows.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    if os.path.isdir(path):
+        from src.model_bundle import load_bundle
+        model = load_bundle(path, backend=backend)
+    else:
+        from src.feature_pipeline import with_features
+        model = with_features(joblib.load(path), reference_year=_saved_year(path))
+        if backend == "numpy":
+            from src.tree_engine import CompiledPipeline
+            model = CompiledPipeline(model)
+    if warm_up:
+        warm_up_model(model)
+    return model
+
+def _new_model_registry(backend):
+    from src.model_registry import ModelRegistry
+    return ModelRegistry(backend=backend)
+
+def load_registry(backend="sklearn"):
+    """
+    Shared model registry for every Streamlit session of this process.
+
+    Serves the active model of `model/registry.json` and reloads it in the
+    background when its file or the registry changes, see `ModelRegistry`.
+
+    Parameters
+    ----------
+    backend : str, optional
+        Prediction backend, see `read_model()`.
+
+    Returns
+    -------
+    ModelRegistry
+    """
+    return streamlit_cached(_new_model_registry)(backend)
+
+def load_model(backend="sklearn"):
     """
     Load and cache the trained vehicle price prediction model.
 
-    This function loads a pre-trained Model stored as a `.pkl` file and
-    caches it using Streamlit's caching mechanism for performance.
-    The cached model is reused across app runs until the underlying file changes.
+    This function returns the active model of the shared registry (see
+    `load_registry()`), loaded once and reused across app runs. A changed
+    model file is reloaded in the background and served from the next call.
+    Models are loaded with `read_model()`, so no bundle is written.
+
+    Parameters
+    ----------
+    backend : str, optional
+        Prediction backend, see `read_model()`.
 
     Returns
     -------
     object
-        The trained machine learning model loaded from disk (e.g., a DecisionTreeRegressor).
+        The trained pipeline (preprocessor + XGBoost regressor), or a `BundledModel`
+        when the registry entry points at a bundle directory.
+
+    """
+    return load_registry(backend).model
+
+def _registry_version():
+    return load_registry().version
+
+def _new_prediction_cache():
+    from src.prediction_cache import PredictionCache
+    return PredictionCache(version=_registry_version)
 
+def load_prediction_cache():
     """
-    path = os.path.join(os.path.dirname(__file__), '..', 'model', 'vehicle_price_dt.pkl')
-    return joblib.load(path)
\ No newline at end of file
+    Shared prediction cache for every Streamlit session of this process.
+
+    Returns
+    -------
+    PredictionCache
+        LRU cache of predictions, invalidated when the registry swaps the active model.
+    """
+    return streamlit_cached(_new_prediction_cache)()
+
+# --- Defaults of the shared in-app prediction dispatcher ---
+DISPATCH_MAX_WAIT = 0.01
+DISPATCH_MAX_BATCH_SIZE = 512
+
+def _new_prediction_dispatcher(backend, max_wait, max_batch_size):
+    from src.micro_batcher import MicroBatcher
+    # --- The model is bound by `load_prediction_dispatcher`, creating the dispatcher stays cheap ---
+    return MicroBatcher(None, max_wait=max_wait, max_batch_size=max_batch_size)
+
+def load_prediction_dispatcher(backend="sklearn", max_wait=DISPATCH_MAX_WAIT, max_batch_size=DISPATCH_MAX_BATCH_SIZE):
+    """
+    Shared request coalescer for every Streamlit session of this process.
+
+    Predictions submitted from concurrent sessions are collected by one
+    background thread and run as a single batched `predict`, so sessions do
+    not compete for the XGBoost threads.
+
+    Parameters
+    ----------
+    backend : str, optional
+        Prediction backend, see `read_model()`.
+    max_wait : float, optional
+        Longest time in seconds a request waits for others to join its batch.
+    max_batch_size : int, optional
+        Rows at which a batch is dispatched without waiting any longer.
+
+    Returns
+    -------
+    MicroBatcher
+        Dispatcher with a blocking `predict(df)` and `stats()` for monitoring.
+    """
+    dispatcher = streamlit_cached(_new_prediction_dispatcher)(backend, max_wait, max_batch_size)
+    # --- The registry predicts with its current model and feeds the shadow model ---
+    dispatcher.predict_fn = load_registry(backend).predict
+    return dispatcher
+
+def prediction_dispatcher_stats(backend="sklearn", max_wait=DISPATCH_MAX_WAIT, max_batch_size=DISPATCH_MAX_BATCH_SIZE):
+    """Counters of the shared dispatcher (see `MicroBatcher.stats()`), without loading the model."""
+    return streamlit_cached(_new_prediction_dispatcher)(backend, max_wait, max_batch_size).stats()
@@ -0,0 +1,384 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from src.caching import file_version
+from src.model_loader import MODEL_DIR, read_metadata, read_model
+from src.tracing import predict_in_stages
+
+REGISTRY_PATH = os.path.join(MODEL_DIR, 'registry.json')
+# --- Seconds between two checks of the registry file and the served model files ---
+POLL_INTERVAL = 2.0
+# --- Shadow comparisons waiting to run, more are dropped rather than slowing down traffic ---
+SHADOW_QUEUE_SIZE = 64
+SHADOW_LOG_SIZE = 1000
+
+# --- Put on the shadow queue by `close()` to stop the shadow thread ---
+_STOP = object()
+
+def read_registry(path=REGISTRY_PATH):
+    """
+    Read a registry file, model and metadata paths resolved against its directory.
+
+    The file is a JSON object with the `active` model name, an optional
+    `shadow` model name (null for none) and the named `models`, each with a
+    `path` to its pickle and optionally a `metadata` JSON file (found with
+    `src.model_loader.read_metadata()` by default) and a `description`, see
+    `model/registry.json`.
+
+    Returns
+    -------
+    dict
+        `{"active": str, "shadow": str or None, "models": {name: entry}}`.
+
+    Raises
+    ------
+    ValueError
+        When the active or shadow model is not one of the listed models.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    models = {}
+    for name, entry in config.get("models", {}).items():
+        entry = dict(entry)
+        entry["path"] = os.path.normpath(os.path.join(base, entry["path"]))
+        if entry.get("metadata"):
+            entry["metadata"] = os.path.normpath(os.path.join(base, entry["metadata"]))
+        models[name] = entry
+    active, shadow = config.get("active"), config.get("shadow")
+    for role, name in (("active", active), ("shadow", shadow)):
+        if (name is not None or role == "active") and name not in models:
+            raise ValueError(f"Registry {role} model {name!r} is not one of {list(models)}")
+    return {"active": active, "shadow": shadow if shadow != active else None, "models": models}
+
+def _read_metadata(entry):
+    path = entry.get("metadata")
+    if not path:
+        return read_metadata(entry["path"])
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class ModelVersion:
+    """
+    One loaded model file, never changed after loading: a reload creates a new instance.
+
+    Parameters
+    ----------
+    name : str
+        Name of the model in the registry.
+    path : str
+        Pickle the model was read from.
+    version : tuple
+        `file_version()` of `path` when it was read.
+    model : object
+        The loaded model, see `read_model()`.
+    metadata : dict, optional
+        Contents of the model's metadata file.
+    load_seconds : float
+        Time spent loading and warming up the model.
+    """
+
+    def __init__(self, name, path, version, model, metadata, load_seconds):
+        self.name = name
+        self.path = path
+        self.version = version
+        self.model = model
+        self.metadata = metadata
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+
+    def info(self):
+        """JSON-ready description for display and health checks."""
+        return {
+            "name": self.name,
+            "path": self.path,
+            "modified": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.version[0] / 1e9)),
+            "size": self.version[1],
+            "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.loaded_at)),
+            "load_ms": round(self.load_seconds * 1000, 1),
+            "metadata": self.metadata,
+        }
+
+class ModelRegistry:
+    """
+    Named model versions with hot reload and optional shadow scoring.
+
+    The registry file (`model/registry.json`) names the models and which one
+    is `active`. A background thread polls it and the files of the served
+    models; when one changes, the new version is loaded and warmed up on that
+    thread while traffic keeps going to the old one, then both are swapped in
+    a single assignment. A prediction already running holds its own reference
+    to the model it started with, so none is dropped or mixes versions.
+    Deploying is replacing a pickle (write it elsewhere and `os.replace` it)
+    or editing the registry file, a file that fails to load is reported and
+    the current model stays.
+
+    With a `shadow` model set, every `predict` also queues the same rows for
+    the shadow model, scored on a separate thread after the caller has its
+    answer. Latency and the differences to the active predictions are kept
+    in a bounded log, see `shadow_log()` and `shadow_stats()`.
+
+    Parameters
+    ----------
+    path : str, optional
+        Registry file.
+    backend : str, optional
+        Prediction backend of every model, see `read_model()`.
+    poll_interval : float, optional
+        Seconds between checks for changed files, None or 0 turns the watcher off
+        (`refresh()` can still be called by hand).
+    shadow_log_path : str, optional
+        JSON lines file every shadow comparison is appended to.
+    """
+
+    def __init__(self, path=REGISTRY_PATH, backend="sklearn", poll_interval=POLL_INTERVAL, shadow_log_path=None):
+        self.path = path
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.shadow_log_path = shadow_log_path
+        self._config_version = file_version(path)
+        self._config = read_registry(path)
+        self._refresh_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._failed = {}
+        self.config_error = None
+        self.reloads = 0
+
+        # --- The active model is loaded up front, the registry always has one to serve ---
+        self._serving = (self._load(self._config["active"]), None)
+
+        self._shadow_queue = queue.Queue(maxsize=SHADOW_QUEUE_SIZE)
+        self._shadow_log = deque(maxlen=SHADOW_LOG_SIZE)
+        self.shadow_dropped = 0
+        self.shadow_errors = 0
+        self._shadow_thread = threading.Thread(target=self._run_shadow, name="shadow-scorer", daemon=True)
+        self._shadow_thread.start()
+
+        self._stop = threading.Event()
+        self._watcher = None
+        if poll_interval:
+            self._watcher = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._watcher.start()
+        elif self._config["shadow"] is not None:
+            self.refresh()
+
+    # --- Serving ---
+
+    @property
+    def current(self):
+        """`ModelVersion` receiving traffic."""
+        return self._serving[0]
+
+    @property
+    def model(self):
+        """The active model, keep the reference for a sequence of calls that must see one version."""
+        return self._serving[0].model
+
+    @property
+    def version(self):
+        """Name and file version of the active model, changes with every swap."""
+        active = self._serving[0]
+        return active.name, active.version
+
+    @property
+    def feature_names_in_(self):
+        return self._serving[0].model.feature_names_in_
+
+    def predict(self, df):
+        """
+        Predict prices for `df` with the active model, and queue a shadow comparison when a shadow is set.
+
+        Returns
+        -------
+        np.ndarray
+            Predictions of the active model.
+        """
+        # --- One read of the pair, a swap in between cannot mix versions ---
+        active, shadow = self._serving
+        start = time.perf_counter()
+        out = predict_in_stages(active.model, df)
+        seconds = time.perf_counter() - start
+        if shadow is not None:
+            try:
+                self._shadow_queue.put_nowait((df, out, seconds, active, shadow))
+            except queue.Full:
+                with self._stats_lock:
+                    self.shadow_dropped += 1
+        return out
+
+    # --- Loading ---
+
+    def _load(self, name):
+        entry = self._config["models"][name]
+        version = file_version(entry["path"])
+        start = time.perf_counter()
+        model = read_model(entry["path"], backend=self.backend)
+        return ModelVersion(name, entry["path"], version, model, _read_metadata(entry),
+                            time.perf_counter() - start)
+
+    def _resolve(self, name, reusable):
+        """Loaded `ModelVersion` of `name` for its file as it is now, None when it fails to load."""
+        if name is None:
+            return None
+        path = self._config["models"][name]["path"]
+        try:
+            version = file_version(path)
+        except OSError as exc:
+            # --- The file is being replaced, the next poll will see the new one ---
+            self._failed[name] = (None, f"{type(exc).__name__}: {exc}")
+            return None
+        for loaded in reusable:
+            if loaded is not None and (loaded.name, loaded.path, loaded.version) == (name, path, version):
+                return loaded
+        if self._failed.get(name, (None,))[0] == version:
+            return None
+        try:
+            loaded = self._load(name)
+        except Exception as exc:
+            # --- Any error of a half written or broken pickle, keep serving the current model ---
+            self._failed[name] = (version, f"{type(exc).__name__}: {exc}")
+            return None
+        self._failed.pop(name, None)
+        self.reloads += 1
+        return loaded
+
+    def refresh(self):
+        """
+        Check the registry file and the served model files once, loading whatever changed.
+
+        New versions are loaded on the calling thread and swapped in when
+        ready. A model that fails to load is recorded in `describe()` and not
+        retried until its file changes again.
+
+        Returns
+        -------
+        bool
+            True when the active or shadow model was swapped.
+        """
+        with self._refresh_lock:
+            try:
+                config_version = file_version(self.path)
+                if config_version != self._config_version:
+                    self._config = read_registry(self.path)
+                    self._config_version = config_version
+                    self.config_error = None
+            except (OSError, ValueError) as exc:
+                # --- Registry file half saved or invalid, keep the last good one ---
+                self.config_error = f"{type(exc).__name__}: {exc}"
+
+            active, shadow = self._serving
+            new_active = self._resolve(self._config["active"], (active, shadow)) or active
+            new_shadow = self._resolve(self._config["shadow"], (shadow, active))
+            if new_shadow is not None and new_shadow.name == new_active.name:
+                new_shadow = None
+            if (new_active, new_shadow) == (active, shadow):
+                return False
+            self._serving = (new_active, new_shadow)
+            return True
+
+    def _watch(self):
+        if self._config["shadow"] is not None:
+            self.refresh()
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+    # --- Shadow scoring ---
+
+    def _run_shadow(self):
+        while True:
+            item = self._shadow_queue.get()
+            if item is _STOP:
+                return
+            df, primary, primary_seconds, active, shadow = item
+            start = time.perf_counter()
+            try:
+                preds = shadow.model.predict(df)
+            except Exception:
+                # --- A candidate that cannot score live traffic is counted, never raised into it ---
+                with self._stats_lock:
+                    self.shadow_errors += 1
+                continue
+            shadow_seconds = time.perf_counter() - start
+            delta = np.asarray(preds, dtype=np.float64) - np.asarray(primary, dtype=np.float64)
+            record = {
+                "time": time.time(),
+                "active": active.name,
+                "shadow": shadow.name,
+                "rows": len(delta),
+                "active_ms": round(primary_seconds * 1000, 3),
+                "shadow_ms": round(shadow_seconds * 1000, 3),
+                "mean_delta": float(delta.mean()) if len(delta) else 0.0,
+                "mean_abs_delta": float(np.abs(delta).mean()) if len(delta) else 0.0,
+                "max_abs_delta": float(np.abs(delta).max()) if len(delta) else 0.0,
+            }
+            with self._stats_lock:
+                self._shadow_log.append(record)
+            if self.shadow_log_path:
+                with open(self.shadow_log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def shadow_log(self, n=None):
+        """Up to `n` most recent shadow comparisons, newest first."""
+        with self._stats_lock:
+            records = list(self._shadow_log)
+        records.reverse()
+        return records if n is None else records[:n]
+
+    def shadow_stats(self):
+        """
+        Summary of the logged shadow comparisons.
+
+        Returns
+        -------
+        dict
+            `comparisons`, `rows`, `dropped` and `errors` counts, median and 95th
+            percentile latency of both models in ms, and the row-weighted mean
+            and the largest absolute prediction difference.
+        """
+        records = self.shadow_log()
+        stats = {"comparisons": len(records), "dropped": self.shadow_dropped, "errors": self.shadow_errors}
+        if not records:
+            return stats
+        rows = np.array([r["rows"] for r in records], dtype=np.float64)
+        for key in ("active_ms", "shadow_ms"):
+            values = [r[key] for r in records]
+            stats[f"{key[:-3]}_p50_ms"] = round(float(np.percentile(values, 50)), 3)
+            stats[f"{key[:-3]}_p95_ms"] = round(float(np.percentile(values, 95)), 3)
+        mean_abs = np.array([r["mean_abs_delta"] for r in records])
+        stats["rows"] = int(rows.sum())
+        stats["mean_abs_delta"] = float((mean_abs * rows).sum() / max(rows.sum(), 1))
+        stats["max_abs_delta"] = max(r["max_abs_delta"] for r in records)
+        return stats
+
+    # --- Monitoring ---
+
+    def describe(self):
+        """Registered models, what is served, and load or registry errors, JSON-ready."""
+        active, shadow = self._serving
+        return {
+            "active": active.info(),
+            "shadow": shadow.info() if shadow is not None else None,
+            "models": {
+                name: {"path": entry["path"], "description": entry.get("description", "")}
+                for name, entry in self._config["models"].items()
+            },
+            "reloads": self.reloads,
+            "errors": {name: error for name, (_, error) in self._failed.items()},
+            "config_error": self.config_error,
+        }
+
+    def close(self):
+        """Stop the watcher and shadow threads, queued shadow comparisons are finished first."""
+        self._stop.set()
+        self._shadow_queue.put(_STOP)
+        self._shadow_thread.join()
+        if self._watcher is not None:
+            self._watcher.join()
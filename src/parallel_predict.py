@@ -0,0 +1,118 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.model_loader import MODEL_PATH, prepare_bundle, read_model
+
+DEFAULT_SHARD_SIZE = 50_000
+
+# --- Model of the current worker process, set once by `_init_worker` ---
+_WORKER_MODEL = None
+
+def _init_worker(model_path, backend):
+    """Load the model once per worker process."""
+    global _WORKER_MODEL
+    _WORKER_MODEL = read_model(model_path, backend=backend)
+    # --- Parallelism comes from the pool, keep XGBoost to one thread per worker ---
+    if hasattr(_WORKER_MODEL, "named_steps") and "model" in _WORKER_MODEL.named_steps:
+        _WORKER_MODEL.named_steps["model"].set_params(n_jobs=1)
+    elif getattr(_WORKER_MODEL, "booster", None) is not None:
+        _WORKER_MODEL.booster.set_param({"nthread": 1})
+
+def _predict_shard(shard):
+    return _WORKER_MODEL.predict(shard).astype(float)
+
+def _worker_pid(row):
+    # --- Held briefly so the tasks of one round spread over the workers ---
+    _WORKER_MODEL.predict(row)
+    time.sleep(0.05)
+    return os.getpid()
+
+class ParallelPredictor:
+    """
+    Batch predictions spread over a pool of worker processes.
+
+    Every worker loads the model once when the pool starts, so only the data
+    shards travel between processes. Predictions come back in input order.
+    The model bundle is exported before the pool starts and every worker
+    loads it, with the "numpy" backend the workers share its memory-mapped
+    arrays instead of holding a copy each.
+
+    Parameters
+    ----------
+    n_workers : int, optional
+        Number of worker processes, defaults to the number of CPU cores.
+    shard_size : int, optional
+        Rows sent to a worker per task.
+    model_path : str, optional
+        Model file each worker loads (through its bundle when it can be
+        bundled) or a bundle directory, defaults to `model/vehicle_price_dt.pkl`.
+    backend : str, optional
+        Prediction backend of the workers, see `read_model()`.
+
+    Examples
+    --------
+    >>> with ParallelPredictor(n_workers=4) as predictor:
+    ...     prices = predictor.predict(batch_df)
+    """
+
+    def __init__(self, n_workers=None, shard_size=DEFAULT_SHARD_SIZE, model_path=MODEL_PATH, backend="sklearn"):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        if not os.path.isdir(model_path):
+            model_path = prepare_bundle(model_path) or model_path
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            initializer=_init_worker,
+            initargs=(model_path, backend)
+        )
+
+    def predict(self, df):
+        """
+        Predict prices for every row of `df`.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Vehicle rows with the columns the model was trained on.
+
+        Returns
+        -------
+        np.ndarray
+            Float predictions aligned with the rows of `df`.
+        """
+        if len(df) == 0:
+            return np.empty(0, dtype=float)
+        shards = (df.iloc[i:i + self.shard_size] for i in range(0, len(df), self.shard_size))
+        # --- `map` yields results in submission order, which keeps the rows aligned ---
+        return np.concatenate(list(self._pool.map(_predict_shard, shards)))
+
+    def warm_up(self, df):
+        """
+        Start every worker and wait until each has loaded the model and predicted once.
+
+        Workers start on demand, a single warm-up shard only starts one of
+        them. One-row tasks are sent in rounds of `n_workers` until every
+        worker process has answered.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Vehicle rows, only the first is predicted.
+        """
+        row = df.iloc[:1]
+        pids = set()
+        while len(pids) < self.n_workers:
+            pids.update(self._pool.map(_worker_pid, [row] * self.n_workers))
+
+    def close(self):
+        """Shut down the worker processes."""
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
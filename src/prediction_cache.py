@@ -0,0 +1,140 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.caching import file_version
+from src.model_loader import MODEL_PATH
+from src.tracing import span
+
+DEFAULT_MAX_SIZE = 50_000
+
+# --- Stand-in for NaN in keys, NaN never compares equal to itself ---
+_NAN = ("nan",)
+
+def _canonical(value):
+    """Normalize one input value so equal specs always produce equal keys."""
+    if value is None:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        # --- 2024, 2024.0 and np.int64(2024) all reach the model as the same float ---
+        value = float(value)
+        return _NAN if value != value else value
+    return str(value)
+
+class PredictionCache:
+    """
+    Process-wide, size-bounded LRU cache of model predictions.
+
+    Rows are keyed on the canonicalized values of the columns the model was
+    trained on, so extra columns (name, description, price, ...) and number
+    formatting do not cause misses. The cache empties itself whenever the
+    model changes. Safe to share between Streamlit sessions.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        Maximum number of cached rows, the least recently used are evicted first.
+    model_path : str, optional
+        Model file whose changes invalidate the cache.
+    version : callable, optional
+        Returns the identity of the served model, e.g. `ModelRegistry.version`,
+        used instead of the version of `model_path`.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, model_path=MODEL_PATH, version=None):
+        self.max_size = max_size
+        self.model_path = model_path
+        self.version = version or (lambda: file_version(model_path))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def keys(self, model, df):
+        """Canonical cache key of every row of `df` for `model`."""
+        columns = list(getattr(model, "feature_names_in_", df.columns))
+        columns = [col for col in columns if col in df.columns]
+        return [
+            tuple(_canonical(v) for v in row)
+            for row in df[columns].itertuples(index=False, name=None)
+        ]
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._version is not None:
+                self._entries.clear()
+                self.invalidations += 1
+            self._version = version
+
+    def predict(self, model, df, predict=None):
+        """
+        Predict prices for `df`, only rows not seen before reach `model.predict`.
+
+        Parameters
+        ----------
+        model : object
+            Fitted pipeline with a `.predict()` method.
+        df : pd.DataFrame
+            Vehicle rows to predict.
+        predict : callable, optional
+            Used instead of `model.predict` for the misses, e.g. a dispatcher's `predict`.
+
+        Returns
+        -------
+        np.ndarray
+            float predictions aligned with the rows of `df`.
+        """
+        with span("cache_lookup", rows=len(df)) as lookup:
+            keys = self.keys(model, df)
+            out = np.empty(len(keys), dtype=float)
+            missing = []
+            version = self.version()
+
+            with self._lock:
+                self._check_version(version)
+                for i, key in enumerate(keys):
+                    value = self._entries.get(key)
+                    if value is None:
+                        missing.append(i)
+                    else:
+                        self._entries.move_to_end(key)
+                        out[i] = value
+                self.hits += len(keys) - len(missing)
+                self.misses += len(missing)
+            lookup["hits"] = len(keys) - len(missing)
+
+        if missing:
+            # --- One vectorized call for all misses, outside the lock ---
+            with span("model_predict", rows=len(missing)):
+                out[missing] = (predict or model.predict)(df.iloc[missing]).astype(float)
+            with self._lock:
+                for i in missing:
+                    self._entries[keys[i]] = out[i]
+                    self._entries.move_to_end(keys[i])
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return out
+
+    def clear(self):
+        """Drop every cached prediction."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Counters for display: hits, misses, evictions, invalidations, size and max_size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
@@ -1,32 +1,44 @@
+import bisect
+
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.impute import SimpleImputer
+import scipy.sparse as sp
 
-# --- Define columns ---
-NUMERIC_COLS = ["year", "price", "cylinders", "mileage"]
+# --- Define columns, the model inputs in the order the trained pipeline uses them ---
+TARGET_COL = "price"
+NUMERIC_COLS = ["year", "cylinders", "mileage", "doors"]
 CATEGORICAL_COLS = [
-    "make", "model", "fuel", "transmission", "trim", "body", "doors",
-    "exterior_color", "interior_color", "drivetrain", "engine"
+    "make", "model", "engine", "fuel", "transmission", "trim", "body",
+    "exterior_color", "interior_color", "drivetrain"
 ]
 TEXT_COLS = ["name", "description"]
 
-def build_preprocessor():
+def build_preprocessor(numeric_cols=NUMERIC_COLS, categorical_cols=CATEGORICAL_COLS):
     """
     Creates preprocessing pipeline for numeric + categorical features.
+
+    Parameters
+    ----------
+    numeric_cols, categorical_cols : list[str], optional
+        Input columns of each branch, e.g. with engineered features added.
     
     Returns
     -------
     Preprocessor that will be used in the predictions outcome.
     """
+    # --- sklearn is only needed to fit, `FittedPreprocessor` loads without it ---
+    from sklearn.preprocessing import StandardScaler, OneHotEncoder
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.impute import SimpleImputer
+
     # --- Numeric: impute missing with median, then scale ---
     numeric_transformer = Pipeline(steps=[
         ("imputer", SimpleImputer(strategy="median")),
         ("scaler", StandardScaler())
     ])
 
-    # --- Categorical: input missing with "Unknown", then one-hot encode ---
+    # --- Categorical: input missing with the most frequent value, then one-hot encode ---
     categorical_transformer = Pipeline(steps=[
         ("imputer", SimpleImputer(strategy="most_frequent")),
         ("encoder", OneHotEncoder(handle_unknown="ignore"))
@@ -35,8 +47,8 @@ def build_preprocessor():
     # --- Combine transformations ---
     preprocessor = ColumnTransformer(
         transformers=[
-            ("num", numeric_transformer, NUMERIC_COLS),
-            ("cat", categorical_transformer, CATEGORICAL_COLS)
+            ("num", numeric_transformer, list(numeric_cols)),
+            ("cat", categorical_transformer, list(categorical_cols))
         ],
         remainder="drop"
     )
@@ -46,6 +58,10 @@ def build_preprocessor():
 def preprocess_input(df: pd.DataFrame):
     """
     Preprocesses vehicle dataset for ML models.
+
+    Note that this fits a fresh preprocessor on `df`, use
+    `FittedPreprocessor.from_pipeline(model).transform(df)` to transform
+    rows with the preprocessor the trained model was fitted with.
     
     Input
     -----
@@ -58,3 +74,222 @@ def preprocess_input(df: pd.DataFrame):
     preprocessor = build_preprocessor()
     processed = preprocessor.fit_transform(df)
     return processed
+
+def _position(cats, value, offset):
+    """Index of `value` in the sorted array `cats` plus `offset`, -1 when absent."""
+    i = bisect.bisect_left(cats, value)
+    return offset + i if i < len(cats) and cats[i] == value else -1
+
+class FittedPreprocessor:
+    """
+    Inference-only copy of a fitted preprocessing `ColumnTransformer`.
+
+    The fitted state is read once from the pipeline (imputer medians, scaler
+    means/scales and a category -> output column dictionary per categorical
+    column). `transform` then writes straight into preallocated arrays and
+    never re-fits, which avoids most of the pandas/sklearn overhead per call.
+
+    Parameters
+    ----------
+    numeric_cols : list[str]
+        Numeric input columns, in output order.
+    medians, means, scales : np.ndarray
+        Fitted imputer medians and scaler statistics of the numeric columns.
+    categorical_cols : list[str]
+        Categorical input columns, in output order.
+    most_frequent : list
+        Fitted imputer fill value of every categorical column.
+    categories : list[np.ndarray]
+        Fitted one-hot categories of every categorical column.
+    shared : bool, optional
+        Search `categories` in place, e.g. read-only arrays memory-mapped by
+        every worker process of a host, instead of building per-process lookup
+        tables. Expects sorted string or float arrays, as fitted by `OneHotEncoder`.
+    """
+
+    def __init__(self, numeric_cols, medians, means, scales, categorical_cols, most_frequent, categories, shared=False):
+        self.numeric_cols = list(numeric_cols)
+        self.medians = np.asarray(medians, dtype=np.float64)
+        self.means = np.asarray(means, dtype=np.float64)
+        self.scales = np.asarray(scales, dtype=np.float64)
+        self.categorical_cols = list(categorical_cols)
+        self.most_frequent = list(most_frequent)
+        self.shared = shared
+        if shared:
+            # --- Plain ndarray views of memory-mapped arrays, indexing a `np.memmap` is slower ---
+            self.categories = [np.asarray(c) for c in categories]
+            # --- Only a vocabulary that is not sorted gets a private sort order ---
+            self.sorters = [None if np.all(c[:-1] < c[1:]) else np.argsort(c, kind="stable") for c in self.categories]
+        else:
+            self.categories = [np.asarray(c, dtype=object) for c in categories]
+
+        # --- Precomputed category -> output column lookups ---
+        offset = len(self.numeric_cols)
+        self.offsets = []
+        self.lookups = []
+        self.indexes = []
+        for cats in self.categories:
+            self.offsets.append(offset)
+            if not shared:
+                self.lookups.append({value: offset + i for i, value in enumerate(cats)})
+                self.indexes.append(pd.Index(cats))
+            offset += len(cats)
+        self.n_features_out = offset
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """
+        Build from a fitted model pipeline (or its `preprocess` ColumnTransformer).
+
+        Expects the layout used in training: a "num" branch with a median
+        `SimpleImputer` and a `StandardScaler`, and a "cat" branch with a
+        `SimpleImputer` and a `OneHotEncoder(handle_unknown="ignore")`.
+        """
+        preprocessor = pipeline.named_steps["preprocess"] if hasattr(pipeline, "named_steps") else pipeline
+        num = preprocessor.named_transformers_["num"]
+        cat = preprocessor.named_transformers_["cat"]
+        columns = {name: cols for name, _, cols in preprocessor.transformers_}
+        scaler = num.named_steps["scaler"]
+        encoder = cat.named_steps[[name for name in cat.named_steps if name != "imputer"][0]]
+        if encoder.handle_unknown != "ignore" or encoder.drop is not None:
+            raise ValueError("Only OneHotEncoder(handle_unknown='ignore') without drop is supported")
+        n_num = len(columns["num"])
+        return cls(
+            numeric_cols=columns["num"],
+            medians=num.named_steps["imputer"].statistics_,
+            means=scaler.mean_ if scaler.with_mean else np.zeros(n_num),
+            scales=scaler.scale_ if scaler.with_std else np.ones(n_num),
+            categorical_cols=columns["cat"],
+            most_frequent=cat.named_steps["imputer"].statistics_,
+            categories=encoder.categories_,
+        )
+
+    def _numeric(self, df):
+        values = df[self.numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        values = np.where(np.isnan(values), self.medians, values)
+        return (values - self.means) / self.scales
+
+    def _search(self, j, values):
+        """Output column of every value in the sorted categories of column `j`, -1 for unknown ones."""
+        cats = self.categories[j]
+        sorter = self.sorters[j]
+        offset = self.offsets[j]
+        kind = str if cats.dtype.kind == "U" else (int, float, np.number)
+        if len(values) <= 64 and sorter is None:
+            # --- A few values, bisecting in Python beats setting up the vectorized search ---
+            return np.fromiter(
+                (_position(cats, v, offset) if isinstance(v, kind) else -1 for v in values),
+                dtype=np.int64, count=len(values)
+            )
+        known = np.fromiter((isinstance(v, kind) for v in values), dtype=bool, count=len(values))
+        keys = np.asarray(values[known], dtype=str if kind is str else np.float64)
+        out = np.full(len(values), -1, dtype=np.int64)
+        if not len(keys) or not len(cats):
+            return out
+        pos = np.minimum(np.searchsorted(cats, keys, sorter=sorter), len(cats) - 1)
+        if sorter is not None:
+            pos = sorter[pos]
+        match = cats[pos] == keys
+        out[np.flatnonzero(known)[match]] = pos[match] + offset
+        return out
+
+    def _shared_codes(self, column, j):
+        fill = self.most_frequent[j]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # --- Categorical columns already carry their distinct values ---
+            codes = column.cat.codes.to_numpy()
+            uniques = np.append(column.cat.categories.to_numpy(dtype=object), fill)
+        else:
+            values = column.to_numpy(dtype=object)
+            values = np.where(values != values, fill, values)
+            if len(values) <= 64:
+                return self._search(j, values)
+            # --- Distinct values are searched once, None keeps code -1 and stays unknown ---
+            codes, uniques = pd.factorize(values)
+            uniques = np.append(np.asarray(uniques, dtype=object), None)
+        return self._search(j, uniques)[codes]
+
+    def _codes(self, df, j):
+        """Output column of every row for categorical column `j`, -1 for unknown categories."""
+        if self.shared:
+            return self._shared_codes(df[self.categorical_cols[j]], j)
+        values = df[self.categorical_cols[j]].to_numpy(dtype=object)
+        fill = self.most_frequent[j]
+        # --- Like the fitted SimpleImputer only NaN is imputed, None stays an unknown category ---
+        if len(values) <= 64:
+            lookup = self.lookups[j]
+            return np.fromiter(
+                (lookup.get(fill if v != v else v, -1) for v in values),
+                dtype=np.int64, count=len(values)
+            )
+        values = np.where(values != values, fill, values)
+        codes = self.indexes[j].get_indexer(values)
+        return np.where(codes >= 0, codes + self.offsets[j], -1)
+
+    def transform(self, df):
+        """
+        Transform raw vehicle rows into the sparse matrix the model was trained on.
+
+        Output matches `ColumnTransformer.transform` of the fitted pipeline.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Raw rows with the numeric and categorical input columns.
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix
+            float64 matrix of shape (n_rows, n_features_out).
+        """
+        n_rows = len(df)
+        n_num = len(self.numeric_cols)
+        width = n_num + len(self.categorical_cols)
+
+        # --- Every row has the same number of slots: all numerics + one per categorical ---
+        data = np.empty((n_rows, width), dtype=np.float64)
+        indices = np.empty((n_rows, width), dtype=np.int64)
+        data[:, :n_num] = self._numeric(df)
+        indices[:, :n_num] = np.arange(n_num)
+        data[:, n_num:] = 1.0
+        for j in range(len(self.categorical_cols)):
+            indices[:, n_num + j] = self._codes(df, j)
+
+        # --- Unknown categories and exact zeros are not stored, like sklearn's output ---
+        keep = (indices >= 0) & (data != 0)
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(keep.sum(axis=1), out=indptr[1:])
+        return sp.csr_matrix((data[keep], indices[keep], indptr), shape=(n_rows, self.n_features_out))
+
+    def transform_dense(self, df, missing=np.nan):
+        """
+        Transform raw vehicle rows into a dense float32 matrix.
+
+        Entries that the sparse output would not store are set to `missing`,
+        NaN by default so tree models see them exactly as XGBoost sees the
+        unstored entries of a sparse matrix.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Raw rows with the numeric and categorical input columns.
+        missing : float, optional
+            Value for entries absent from the sparse output.
+
+        Returns
+        -------
+        np.ndarray
+            float32 matrix of shape (n_rows, n_features_out).
+        """
+        n_rows = len(df)
+        n_num = len(self.numeric_cols)
+        out = np.full((n_rows, self.n_features_out), missing, dtype=np.float32)
+
+        numeric = self._numeric(df)
+        out[:, :n_num] = np.where(numeric != 0, numeric, missing)
+        rows = np.arange(n_rows)
+        for j in range(len(self.categorical_cols)):
+            codes = self._codes(df, j)
+            known = codes >= 0
+            out[rows[known], codes[known]] = 1.0
+        return out
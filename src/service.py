@@ -0,0 +1,158 @@
+import io
+import json
+import sys
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from src.ingest import input_schema
+from src.micro_batcher import MicroBatcher
+
+# --- Longest time a request handler waits for its micro-batched prediction ---
+PREDICT_TIMEOUT = 30.0
+
+class _BadRequest(Exception):
+    """Raised for request bodies that cannot be turned into vehicle rows."""
+
+def _parse_batch(body, content_type):
+    """Turn a `/predict/batch` body (CSV or JSON lines) into a DataFrame."""
+    if "csv" in content_type:
+        return pd.read_csv(io.BytesIO(body))
+    try:
+        rows = [json.loads(line) for line in body.decode("utf-8").splitlines() if line.strip()]
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise _BadRequest(f"Invalid JSON lines: {exc}")
+    if not all(isinstance(row, dict) for row in rows):
+        raise _BadRequest("Every JSON line must be an object with vehicle specs")
+    return pd.DataFrame(rows)
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """
+    Request handler for the prediction service.
+
+    Endpoints
+    ---------
+    GET  /healthz        Liveness check with queue depth and uptime.
+    GET  /models         Served and registered models and shadow statistics, when serving a registry.
+    POST /predict        One JSON object of vehicle specs -> {"price": float}.
+    POST /predict/batch  JSON lines or CSV (Content-Type: text/csv) -> {"prices": [float, ...]}.
+    """
+
+    # --- HTTP/1.1 keeps client connections alive between requests ---
+    protocol_version = "HTTP/1.1"
+    # --- Headers and body go out in separate writes, Nagle would hold the body back for a delayed ACK ---
+    disable_nagle_algorithm = True
+    server_version = "VehiclePriceService/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        registry = self.server.model if hasattr(self.server.model, "describe") else None
+        if self.path == "/healthz":
+            health = {
+                "status": "ok",
+                "queue_depth": self.server.batcher.queue_depth(),
+                "uptime_sec": round(time.monotonic() - self.server.started, 1),
+            }
+            if registry:
+                health["model"] = registry.current.name
+            self._send_json(200, health)
+        elif self.path == "/models" and registry:
+            self._send_json(200, {**registry.describe(), "shadow_stats": registry.shadow_stats()})
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        body = self._read_body()
+        try:
+            if self.path == "/predict":
+                try:
+                    spec = json.loads(body)
+                except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+                    raise _BadRequest(f"Invalid JSON: {exc}")
+                if not isinstance(spec, dict):
+                    raise _BadRequest("Expected a JSON object with vehicle specs")
+                future = self.server.batcher.submit([spec])
+                price = float(future.result(timeout=PREDICT_TIMEOUT)[0])
+                self._send_json(200, {"price": price})
+            elif self.path == "/predict/batch":
+                df = _parse_batch(body, self.headers.get("Content-Type", ""))
+                prices = self.server.model.predict(df).astype(float) if len(df) else []
+                self._send_json(200, {"prices": [float(p) for p in prices]})
+            else:
+                self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+        except _BadRequest as exc:
+            self._send_json(400, {"error": str(exc)})
+        except TimeoutError:
+            self._send_json(503, {"error": "Prediction timed out"})
+        except (KeyError, ValueError, TypeError) as exc:
+            # --- Missing columns or values the preprocessor cannot handle ---
+            self._send_json(422, {"error": f"Could not score input: {exc}"})
+        except Exception as exc:
+            # --- Always answer, a keep-alive client would otherwise wait for a response that never comes ---
+            traceback.print_exc(file=sys.stderr)
+            self._send_json(500, {"error": f"Internal error: {type(exc).__name__}"})
+
+class PredictionServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding the model and the micro-batcher shared by all handlers.
+
+    Parameters
+    ----------
+    address : tuple[str, int]
+        Host and port to listen on.
+    model : object
+        Fitted pipeline with a `.predict()` method, or a `ModelRegistry` to serve
+        its active model with hot reload.
+    max_wait : float
+        Micro-batching window in seconds for `/predict`.
+    max_batch_size : int
+        Largest number of `/predict` rows combined into one call.
+    verbose : bool, optional
+        Log every request to stderr.
+    """
+
+    daemon_threads = True
+    # --- Room for bursts of new keep-alive connections ---
+    request_queue_size = 256
+
+    def __init__(self, address, model, max_wait, max_batch_size, verbose=False):
+        super().__init__(address, PredictionHandler)
+        self.model = model
+        self.batcher = MicroBatcher(model.predict, max_wait=max_wait, max_batch_size=max_batch_size,
+                                    columns=self.required_columns)
+        self._schema = (None, None)
+        self._schema_lock = threading.Lock()
+        self.verbose = verbose
+        self.started = time.monotonic()
+
+    def required_columns(self):
+        """Input columns of the model being served, recomputed only when a registry swaps it."""
+        model = self.model.model if hasattr(self.model, "describe") else self.model
+        with self._schema_lock:
+            if self._schema[0] is not model:
+                self._schema = (model, list(input_schema(model)))
+            return self._schema[1]
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.close()
+        if hasattr(self.model, "close"):
+            self.model.close()
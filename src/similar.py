@@ -0,0 +1,108 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.caching import VERSION_ENTRIES, streamlit_cached
+from src.dataset import load_dataset_with_version
+
+# --- Numeric specs that define how close two vehicles are ---
+SIMILAR_FEATURES = ["year", "mileage", "cylinders", "doors"]
+# --- Columns the results can be restricted on ---
+FILTER_COLS = ["make", "body"]
+
+class SimilarVehicleIndex:
+    """
+    KD-tree over standardized numeric specs for "Similar Vehicles" lookups.
+
+    Missing values are filled with the column median and every feature is
+    scaled to zero mean / unit variance, so year, mileage, cylinders and doors
+    weigh the same. Trees restricted to one make and/or body are built on
+    first use and kept for later queries.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataset to search, must contain `SIMILAR_FEATURES` and `FILTER_COLS`.
+    features : list[str], optional
+        Numeric columns used for the distance.
+    """
+
+    def __init__(self, df, features=SIMILAR_FEATURES):
+        from sklearn.neighbors import KDTree
+
+        self._kdtree = KDTree
+        self.df = df
+        self.features = list(features)
+        values = df[self.features].astype(float)
+        self.medians = values.median().fillna(0).to_numpy()
+        filled = values.fillna(pd.Series(self.medians, index=self.features)).to_numpy()
+        self.means = filled.mean(axis=0)
+        std = filled.std(axis=0)
+        self.scales = np.where(std > 0, std, 1.0)
+        self.points = (filled - self.means) / self.scales
+
+        self._trees = {(None, None): (KDTree(self.points), np.arange(len(df)))}
+        self._lock = threading.Lock()
+
+    def _transform(self, spec):
+        values = np.array([spec.get(f, np.nan) for f in self.features], dtype=float)
+        values = np.where(np.isnan(values), self.medians, values)
+        return ((values - self.means) / self.scales)[None, :]
+
+    def _tree(self, make, body):
+        key = (make, body)
+        with self._lock:
+            if key not in self._trees:
+                mask = np.ones(len(self.df), dtype=bool)
+                if make is not None:
+                    mask &= (self.df["make"] == make).to_numpy()
+                if body is not None:
+                    mask &= (self.df["body"] == body).to_numpy()
+                positions = np.flatnonzero(mask)
+                tree = self._kdtree(self.points[positions]) if len(positions) else None
+                self._trees[key] = (tree, positions)
+            return self._trees[key]
+
+    def query(self, spec, k=5, make=None, body=None):
+        """
+        Find the `k` vehicles closest to `spec`.
+
+        Parameters
+        ----------
+        spec : dict or pd.DataFrame
+            Vehicle specs, a one-row frame is read from its first row.
+        k : int, optional
+            Number of comparables to return.
+        make, body : str, optional
+            Only return vehicles of this make and/or body type.
+
+        Returns
+        -------
+        pd.DataFrame
+            Up to `k` dataset rows, closest first, with a `distance` column
+            measured in standardized units.
+        """
+        if isinstance(spec, pd.DataFrame):
+            spec = spec.iloc[0].to_dict()
+        tree, positions = self._tree(make, body)
+        if tree is None:
+            return self.df.iloc[[]].assign(distance=pd.Series(dtype=float))
+        distances, idx = tree.query(self._transform(spec), k=min(k, len(positions)))
+        return self.df.iloc[positions[idx[0]]].assign(distance=distances[0])
+
+def _build_similar_index(version, _df):
+    # --- `version` keys the cache, the underscore keeps Streamlit from hashing the frame ---
+    return SimilarVehicleIndex(_df)
+
+def load_similar_index():
+    """
+    Shared similar-vehicle index, built once per dataset version.
+
+    Returns
+    -------
+    SimilarVehicleIndex
+        Index over the shared dataset from `load_dataset_with_version()`.
+    """
+    df, version = load_dataset_with_version()
+    return streamlit_cached(_build_similar_index, max_entries=VERSION_ENTRIES)(version, df)
@@ -0,0 +1,47 @@
+import importlib
+import sys
+import time
+
+from src.caching import streamlit_cached
+
+def _new_report():
+    return {"imports": {}, "first_render": {}}
+
+def startup_report():
+    """
+    Process-wide record of cold start costs.
+
+    Returns
+    -------
+    dict
+        `imports` maps module name -> seconds its first import took, and
+        `first_render` maps page name -> seconds of its first render.
+    """
+    return streamlit_cached(_new_report)()
+
+def timed_import(name):
+    """
+    Import a module on demand and record how long the first import took.
+
+    Parameters
+    ----------
+    name : str
+        Dotted module name, e.g. "plotly.express".
+
+    Returns
+    -------
+    module
+        The imported module.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    startup_report()["imports"].setdefault(name, time.perf_counter() - start)
+    return module
+
+def render_page(name, show):
+    """Call a page's `show()` and record the time of its first render in this process."""
+    start = time.perf_counter()
+    show()
+    startup_report()["first_render"].setdefault(name, time.perf_counter() - start)
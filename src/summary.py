@@ -0,0 +1,179 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.caching import VERSION_ENTRIES, streamlit_cached
+from src.dataset import DATASET_PATH, file_hash, load_dataset_with_version
+from src.features import INSIGHT_FEATURES, add_features
+
+# --- Features offered in the "Price Trends" selectbox ---
+TREND_FEATURES = ["make", "year", "body", "fuel", "drivetrain"]
+PRICE_PER_MILE_BINS = 30
+PREVIEW_ROWS = 10
+PREVIEW_COLS = ["make", "model", "year", "mileage", "price", "price_per_mile", "age", "luxury_flag"]
+
+def _group_sums(df, col):
+    """Price sum and count per value of `col`, the mergeable form of a groupby mean."""
+    return df.groupby(col)["price"].agg(["sum", "count"])
+
+def _describe(prices):
+    """`Series.describe()` of a sorted, NaN-free price array."""
+    n = len(prices)
+    values = [n, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan]
+    if n:
+        values = [
+            n, prices.mean(), prices.std(ddof=1) if n > 1 else np.nan, prices[0],
+            *np.quantile(prices, [0.25, 0.5, 0.75]), prices[-1],
+        ]
+    return pd.Series(values, index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"], name="price")
+
+class SummaryStore:
+    """
+    Aggregates and chart payloads of the Insights & Analytics page for one dataset version.
+
+    Everything is computed once when the store is built, the page only does
+    lookups. Group means are kept as sums and counts so `append()` can fold
+    new rows in without going over the existing ones again. Stores are
+    read-only, `append()` returns a new one.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Vehicle rows with a price.
+    version : str, optional
+        Dataset hash the store belongs to.
+    source_size : int, optional
+        Size in bytes of the CSV the rows were read from, used to recognize appends.
+    """
+
+    def __init__(self, df, version=None, source_size=None):
+        self.version = version
+        self.source_size = source_size
+        self.n_rows = len(df)
+        self.columns = df.columns
+        self.dtypes = df.dtypes.astype(str)
+        self.non_null = df.notnull().sum()
+
+        features = add_features(df, INSIGHT_FEATURES)
+        self.preview = features[PREVIEW_COLS].head(PREVIEW_ROWS)
+        self._groups = {col: _group_sums(df, col) for col in TREND_FEATURES}
+        self._luxury = _group_sums(features, "luxury_flag")
+        self._prices = np.sort(df["price"].dropna().to_numpy(dtype=float))
+        self._price_per_mile = features["price_per_mile"].dropna().to_numpy(dtype=float)
+        self._hist = pd.Series(self._price_per_mile).value_counts(bins=PRICE_PER_MILE_BINS).sort_index()
+        self.scatter = df[["mileage", "price"]].dropna().reset_index(drop=True)
+        self._materialize()
+
+    def _materialize(self):
+        # --- Final chart payloads, so a rerun of the page is a dict lookup ---
+        self.trends = {
+            col: (stats["sum"] / stats["count"]).sort_values().rename("price")
+            for col, stats in self._groups.items()
+        }
+        self.luxury_prices = (self._luxury["sum"] / self._luxury["count"]).rename({0: "Non-Luxury", 1: "Luxury"}).rename("price")
+        self.price_stats = _describe(self._prices)
+        self.price_per_mile_hist = self._hist
+        self.top_makes = self._groups["make"]["count"].astype(int).sort_values(ascending=False, kind="stable").head(10)
+        self.column_info = pd.DataFrame({
+            "Column": self.columns,
+            "Dtype": self.dtypes.reindex(self.columns).to_numpy(),
+            "Non-Null Count": self.non_null.reindex(self.columns).to_numpy()
+        })
+
+    def price_by_age(self, year=None):
+        """Mean price per vehicle age, ages counted from `year` (default: current year)."""
+        year = pd.Timestamp.now().year if year is None else year
+        by_year = self.trends["year"].sort_index()
+        return pd.DataFrame({"age": year - by_year.index, "price": by_year.to_numpy()}).sort_values("age")
+
+    def append(self, rows, version=None, source_size=None):
+        """
+        Store for the dataset with `rows` added, existing aggregates are merged rather than recomputed.
+
+        Parameters
+        ----------
+        rows : pd.DataFrame
+            New vehicle rows with a price, same columns as the original frame.
+        version, source_size : optional
+            See the class parameters, for the grown dataset.
+
+        Returns
+        -------
+        SummaryStore
+            New store, this one is left unchanged.
+        """
+        store = object.__new__(SummaryStore)
+        store.version = version
+        store.source_size = source_size
+        store.n_rows = self.n_rows + len(rows)
+        store.columns = self.columns
+        store.dtypes = rows.dtypes.astype(str) if len(rows) else self.dtypes
+        store.non_null = self.non_null.add(rows.notnull().sum(), fill_value=0).astype(int)
+
+        features = add_features(rows, INSIGHT_FEATURES)
+        store.preview = self.preview if len(self.preview) >= PREVIEW_ROWS else pd.concat(
+            [self.preview, features[PREVIEW_COLS]]
+        ).head(PREVIEW_ROWS)
+        store._groups = {
+            col: stats.add(_group_sums(rows, col), fill_value=0) for col, stats in self._groups.items()
+        }
+        store._luxury = self._luxury.add(_group_sums(features, "luxury_flag"), fill_value=0)
+
+        new_prices = np.sort(rows["price"].dropna().to_numpy(dtype=float))
+        store._prices = np.insert(self._prices, np.searchsorted(self._prices, new_prices), new_prices)
+
+        new_ppm = features["price_per_mile"].dropna().to_numpy(dtype=float)
+        store._price_per_mile = np.concatenate([self._price_per_mile, new_ppm])
+        lo, hi = self._price_per_mile.min(initial=np.inf), self._price_per_mile.max(initial=-np.inf)
+        if len(new_ppm) and len(self._price_per_mile) and new_ppm.min() >= lo and new_ppm.max() <= hi:
+            # --- Same range means the same bin edges, only the new rows are binned ---
+            added = pd.Series(pd.cut(new_ppm, self._hist.index)).value_counts(sort=False)
+            store._hist = self._hist + added.reindex(self._hist.index, fill_value=0).to_numpy()
+        elif len(new_ppm):
+            store._hist = pd.Series(store._price_per_mile).value_counts(bins=PRICE_PER_MILE_BINS).sort_index()
+        else:
+            store._hist = self._hist
+
+        store.scatter = pd.concat([self.scatter, rows[["mileage", "price"]].dropna()], ignore_index=True)
+        store._materialize()
+        return store
+
+def _summary_registry():
+    # --- Last store built in this process, the base for incremental updates ---
+    return {}
+
+def _build_summary(version, _df, path):
+    registry = streamlit_cached(_summary_registry)()
+    previous = registry.get(path)
+    size = os.path.getsize(path)
+    store = None
+    if (
+        previous is not None
+        and previous.source_size is not None
+        and previous.source_size <= size
+        and previous.n_rows <= len(_df)
+        and file_hash(path, limit=previous.source_size) == previous.version
+    ):
+        # --- The old file is a prefix of the new one: rows were only appended ---
+        store = previous.append(_df.iloc[previous.n_rows:], version=version, source_size=size)
+    if store is None:
+        store = SummaryStore(_df, version=version, source_size=size)
+    registry[path] = store
+    return store
+
+def load_summary():
+    """
+    Shared aggregates of the Insights & Analytics page for the current dataset version.
+
+    Built on first use, keyed by the dataset hash. When the CSV only had
+    rows appended since the previous version, the previous store is
+    extended instead of rebuilt.
+
+    Returns
+    -------
+    SummaryStore
+        Read-only store, shared by every session.
+    """
+    df, version = load_dataset_with_version()
+    return streamlit_cached(_build_summary, max_entries=VERSION_ENTRIES)(version, df, DATASET_PATH)
@@ -0,0 +1,192 @@
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.caching import VERSION_ENTRIES, streamlit_cached
+from src.dataset import load_dataset_with_version
+
+# --- Searchable columns and how much a match in each counts towards the rank ---
+FIELD_WEIGHTS = {"name": 2.0, "model": 3.0, "trim": 2.0, "engine": 1.0, "description": 1.0}
+TOKEN_PATTERN = r"[a-z0-9]+"
+NGRAM = 3
+# --- BM25 term frequency saturation ---
+K1 = 1.2
+# --- Rows tokenized at a time while building ---
+BLOCK_ROWS = 50_000
+
+def tokenize(text):
+    """Lower-cased alphanumeric tokens of a query string."""
+    return pd.Series([text]).str.lower().str.findall(TOKEN_PATTERN)[0]
+
+def _ngrams(token):
+    return {token[i:i + NGRAM] for i in range(len(token) - NGRAM + 1)}
+
+class TextIndex:
+    """
+    Inverted index over the free-text columns of the vehicle dataset.
+
+    Every field is tokenized once into a sparse document x term matrix
+    holding BM25 weights, so a search only touches the postings of its
+    terms. Query terms match any indexed token that contains them (found
+    through a character n-gram index over the vocabulary), all terms of a
+    query must match, and results are ranked by summed score.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataset to index.
+    fields : dict[str, float], optional
+        Columns to index and their weight in the ranking.
+    """
+
+    def __init__(self, df, fields=FIELD_WEIGHTS):
+        self.n_docs = len(df)
+        self.fields = {f: w for f, w in fields.items() if f in df.columns}
+
+        vocab_ids = {}
+        counts = {field: self._count_terms(df[field], vocab_ids) for field in self.fields}
+
+        # --- Columns are renumbered so the vocabulary is sorted, which allows prefix lookups ---
+        tokens = np.array(list(vocab_ids), dtype=object)
+        order = np.argsort(tokens, kind="stable")
+        rank = np.empty(len(order), dtype=np.int32)
+        rank[order] = np.arange(len(order), dtype=np.int32)
+        self._tokens = tokens[order].tolist()
+        self.vocab = pd.Index(self._tokens, dtype=object)
+
+        self._matrices = {}
+        for field, m in counts.items():
+            m.resize(self.n_docs, len(self.vocab))
+            m.indices = rank[m.indices]
+            m = m.tocsc()
+            m.sort_indices()
+            # --- BM25 weight per (row, token), idf is taken per field ---
+            doc_freq = np.diff(m.indptr)
+            idf = np.log1p((self.n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+            tf = m.data
+            m.data = self.fields[field] * np.repeat(idf, doc_freq) * tf * (K1 + 1) / (tf + K1)
+            self._matrices[field] = m
+
+        grams = defaultdict(list)
+        for i, token in enumerate(self._tokens):
+            for gram in _ngrams(token):
+                grams[gram].append(i)
+        self._grams = {g: np.array(ids, dtype=np.int64) for g, ids in grams.items()}
+
+    @staticmethod
+    def _count_terms(column, vocab_ids):
+        """Row x token count matrix of one column, tokenized in blocks to bound memory."""
+        blocks = []
+        for start in range(0, len(column), BLOCK_ROWS):
+            text = column.iloc[start:start + BLOCK_ROWS].reset_index(drop=True).fillna("").astype(str).str.lower()
+            exploded = text.str.findall(TOKEN_PATTERN).explode().dropna()
+            local_codes, uniques = pd.factorize(exploded.to_numpy())
+            global_ids = np.fromiter(
+                (vocab_ids.setdefault(token, len(vocab_ids)) for token in uniques),
+                dtype=np.int32, count=len(uniques),
+            )
+            block = sp.csr_matrix(
+                (np.ones(len(local_codes), dtype=np.float32), (exploded.index.to_numpy(), global_ids[local_codes])),
+                shape=(len(text), len(vocab_ids)),
+            )
+            block.sum_duplicates()
+            blocks.append(block)
+        for block in blocks:
+            block.resize(block.shape[0], len(vocab_ids))
+        if not blocks:
+            return sp.csr_matrix((0, len(vocab_ids)), dtype=np.float32)
+        return sp.vstack(blocks, format="csr")
+
+    def expand(self, term):
+        """
+        Vocabulary ids of the indexed tokens matching `term`.
+
+        Terms of at least `NGRAM` characters match every token containing
+        them, shorter terms match tokens starting with them.
+        """
+        if len(term) < NGRAM:
+            lo = self.vocab.searchsorted(term, side="left")
+            hi = self.vocab.searchsorted(term + "\uffff", side="left")
+            return np.arange(lo, hi)
+        candidates = None
+        for gram in _ngrams(term):
+            ids = self._grams.get(gram)
+            if ids is None:
+                return np.array([], dtype=np.int64)
+            candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+        return np.array([i for i in candidates if term in self._tokens[i]], dtype=np.int64)
+
+    def _term_scores(self, term, fields):
+        cols = self.expand(term)
+        if not len(cols):
+            return np.array([], dtype=np.int64), np.array([], dtype=float)
+        rows, data = [], []
+        for field in fields:
+            sub = self._matrices[field][:, cols].tocoo()
+            rows.append(sub.row)
+            data.append(sub.data)
+        docs, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        return docs, np.bincount(inverse, weights=np.concatenate(data))
+
+    def search(self, query, fields=None, candidates=None):
+        """
+        Rank the rows matching every term of `query`.
+
+        Parameters
+        ----------
+        query : str or dict[str, str]
+            Search text matched against all `fields`, or a mapping of
+            field -> text to search each field for its own terms.
+        fields : list[str], optional
+            Columns a plain string query is matched against, defaults to all indexed fields.
+        candidates : np.ndarray of bool, optional
+            Row mask, e.g. from other filters, results are limited to it.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Row positions, best match first, and their scores. A query
+            without any term returns all candidate rows in dataset order.
+        """
+        if isinstance(query, str):
+            query = {tuple(fields or self.fields): query}
+        else:
+            query = {(field,): text for field, text in query.items()}
+
+        matched = None
+        scores = None
+        for group, text in query.items():
+            for term in dict.fromkeys(tokenize(text or "")):
+                docs, term_scores = self._term_scores(term, group)
+                if matched is None:
+                    matched, scores = docs, term_scores
+                else:
+                    matched, left, right = np.intersect1d(matched, docs, assume_unique=True, return_indices=True)
+                    scores = scores[left] + term_scores[right]
+
+        if matched is None:
+            positions = np.arange(self.n_docs) if candidates is None else np.flatnonzero(candidates)
+            return positions, np.zeros(len(positions))
+        if candidates is not None:
+            keep = np.asarray(candidates)[matched]
+            matched, scores = matched[keep], scores[keep]
+        order = np.lexsort((matched, -scores))
+        return matched[order], scores[order]
+
+def _build_text_index(version, _df):
+    # --- `version` keys the cache, the underscore keeps Streamlit from hashing the frame ---
+    return TextIndex(_df)
+
+def load_text_index():
+    """
+    Shared text index, built once per dataset version.
+
+    Returns
+    -------
+    TextIndex
+        Index over the shared dataset from `load_dataset_with_version()`.
+    """
+    df, version = load_dataset_with_version()
+    return streamlit_cached(_build_text_index, max_entries=VERSION_ENTRIES)(version, df)
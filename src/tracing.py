@@ -0,0 +1,158 @@
+import contextvars
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from src.caching import streamlit_cached
+
+MAX_TRACES = 200
+
+# --- Trace and span nesting level of the running code, per thread / session ---
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_depth = contextvars.ContextVar("span_depth", default=0)
+
+class Tracer:
+    """
+    Bounded, thread-safe store of the most recent finished traces.
+
+    A trace is a dict with `trace_id`, `name`, `start` (epoch seconds),
+    `duration_ms`, `attrs` and a list of `spans`, each span holding its
+    `name`, `depth`, `offset_ms` from the start of the trace, `duration_ms`
+    and any attributes set on it.
+
+    Parameters
+    ----------
+    max_traces : int, optional
+        Traces kept, the oldest are dropped first.
+    """
+
+    def __init__(self, max_traces=MAX_TRACES):
+        self._traces = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    def record(self, trace):
+        """Store a finished trace."""
+        with self._lock:
+            self._traces.append(trace)
+
+    def recent(self, n=None):
+        """Up to `n` most recent traces, newest first."""
+        with self._lock:
+            traces = list(self._traces)
+        traces.reverse()
+        return traces if n is None else traces[:n]
+
+    def clear(self):
+        """Drop every stored trace."""
+        with self._lock:
+            self._traces.clear()
+
+    def export_jsonl(self, traces=None):
+        """Traces (default: all stored, oldest first) as JSON lines for offline analysis."""
+        traces = list(reversed(self.recent())) if traces is None else traces
+        return "".join(json.dumps(trace, default=str) + "\n" for trace in traces)
+
+def _new_tracer():
+    return Tracer()
+
+def get_tracer():
+    """Process-wide `Tracer` shared by every Streamlit session."""
+    return streamlit_cached(_new_tracer)()
+
+@contextmanager
+def trace(name, **attrs):
+    """
+    Time one request, spans opened inside it are recorded as its stages.
+
+    Parameters
+    ----------
+    name : str
+        What the request is, e.g. "batch_predict".
+    **attrs
+        Extra fields stored with the trace, more can be set on the yielded dict.
+
+    Yields
+    ------
+    dict
+        The trace record, stored in `get_tracer()` when the block exits.
+    """
+    record = {
+        "trace_id": uuid.uuid4().hex[:16],
+        "name": name,
+        "start": time.time(),
+        "attrs": dict(attrs),
+        "spans": [],
+    }
+    token = _current_trace.set(record)
+    start = time.perf_counter()
+    record["_t0"] = start
+    try:
+        yield record
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        del record["_t0"]
+        # --- A child starting in the same microsecond as its parent stays after it ---
+        record["spans"].sort(key=lambda s: (s["offset_ms"], s["depth"]))
+        _current_trace.reset(token)
+        get_tracer().record(record)
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time one stage of the current trace, a no-op outside of `trace()`.
+
+    Parameters
+    ----------
+    name : str
+        Stage name, e.g. "csv_read" or "model_predict".
+    **attrs
+        Extra fields stored with the span, e.g. `rows=len(df)`.
+
+    Yields
+    ------
+    dict
+        The span's attributes, values set on it are stored with the span.
+    """
+    record = _current_trace.get()
+    if record is None:
+        yield dict(attrs)
+        return
+    fields = dict(attrs)
+    depth = _depth.get()
+    token = _depth.set(depth + 1)
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        end = time.perf_counter()
+        _depth.reset(token)
+        record["spans"].append({
+            "name": name,
+            "depth": depth,
+            "offset_ms": round((start - record["_t0"]) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3),
+            **fields,
+        })
+
+def predict_in_stages(model, df):
+    """
+    `model.predict(df)` with preprocessing and the final estimator timed as separate spans.
+
+    A fitted sklearn Pipeline is split into its transforms, timed as
+    "preprocess", and its last step, timed as "predict", the same calls
+    `Pipeline.predict` makes. Other predictors (bundles, compiled pipelines)
+    preprocess block by block, their whole call is one "predict" span.
+    """
+    # --- A Pipeline can only be loaded with sklearn imported, no need to import it here ---
+    pipeline = sys.modules.get("sklearn.pipeline")
+    if pipeline is None or not isinstance(model, pipeline.Pipeline):
+        with span("predict", rows=len(df)):
+            return model.predict(df)
+    with span("preprocess", rows=len(df)):
+        X = model[:-1].transform(df)
+    with span("predict", rows=len(df)):
+        return model[-1].predict(X)
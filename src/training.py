@@ -0,0 +1,514 @@
+import datetime
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.dataset import DATASET_PATH, file_hash
+from src.feature_pipeline import FeatureEngineer
+from src.model_loader import METADATA_NAME, MODEL_PATH
+from src.preprocess import CATEGORICAL_COLS, NUMERIC_COLS, TARGET_COL, build_preprocessor
+
+# --- Candidate models of the notebook, slowest first so the longest fits start right away ---
+CANDIDATES = ["RandomForest", "XGBoost", "DecisionTree", "LinearRegression"]
+RANDOM_STATE = 42
+TEST_SIZE = 0.2
+# --- Candidates whose fit runs on several threads of its own ---
+_MULTITHREADED = ("RandomForest", "XGBoost")
+
+def make_candidate(name, n_jobs=1):
+    """
+    Unfitted estimator of a candidate model, configured like the notebook.
+
+    XGBoost builds its trees with the `hist` method, which bins every feature
+    once instead of sorting it at every split.
+
+    Parameters
+    ----------
+    name : str
+        One of `CANDIDATES`.
+    n_jobs : int, optional
+        Threads of the multithreaded candidates.
+    """
+    if name == "LinearRegression":
+        from sklearn.linear_model import LinearRegression
+        return LinearRegression()
+    if name == "DecisionTree":
+        from sklearn.tree import DecisionTreeRegressor
+        return DecisionTreeRegressor(random_state=RANDOM_STATE)
+    if name == "RandomForest":
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(n_estimators=200, random_state=RANDOM_STATE, n_jobs=n_jobs)
+    if name == "XGBoost":
+        import xgboost as xgb
+        return xgb.XGBRegressor(
+            n_estimators=300, objective="reg:squarederror", tree_method="hist",
+            random_state=RANDOM_STATE, n_jobs=n_jobs,
+        )
+    raise ValueError(f"Unknown candidate {name!r}, expected one of {CANDIDATES}")
+
+def read_training_data(path=DATASET_PATH):
+    """Rows of the dataset CSV with a price, parsed like the notebook (missing text as NaN)."""
+    df = pd.read_csv(path)
+    return df.dropna(subset=[TARGET_COL]).reset_index(drop=True)
+
+def _fit_candidate(name, n_jobs, X_train, y_train, X_test, y_test):
+    from sklearn.metrics import mean_squared_error, r2_score
+
+    model = make_candidate(name, n_jobs)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fitted = time.perf_counter()
+    preds = model.predict(X_test)
+    done = time.perf_counter()
+    return {
+        "name": name,
+        "model": model,
+        "rmse": float(np.sqrt(mean_squared_error(y_test, preds))),
+        "r2": float(r2_score(y_test, preds)),
+        "fit_seconds": fitted - start,
+        "predict_seconds": done - fitted,
+    }
+
+def fit_preprocessing(X_train, features=()):
+    """
+    Fit the engineered features and the preprocessor on training rows.
+
+    Parameters
+    ----------
+    X_train : pd.DataFrame
+        Training rows without the target.
+    features : list[str], optional
+        Engineered features to add in a `FeatureEngineer` step, see `src.features`.
+
+    Returns
+    -------
+    preprocessing : sklearn.pipeline.Pipeline
+        The fitted `features` (when any) and `preprocess` steps.
+    numeric_cols, categorical_cols : list[str]
+        Input columns of each branch of the preprocessor.
+    """
+    from sklearn.pipeline import Pipeline
+
+    steps = []
+    numeric_cols, categorical_cols = list(NUMERIC_COLS), list(CATEGORICAL_COLS)
+    if features:
+        engineer = FeatureEngineer(list(features)).fit(X_train)
+        X_train = engineer.transform(X_train)
+        for name in features:
+            target = numeric_cols if pd.api.types.is_numeric_dtype(X_train[name]) else categorical_cols
+            target.append(name)
+        steps.append(("features", engineer))
+    preprocessor = build_preprocessor(numeric_cols, categorical_cols).fit(X_train)
+    steps.append(("preprocess", preprocessor))
+    return Pipeline(steps), numeric_cols, categorical_cols
+
+def train_models(df, candidates=CANDIDATES, features=(), n_jobs=None, test_size=TEST_SIZE):
+    """
+    Fit the preprocessor once and train every candidate on its output in parallel.
+
+    The rows are split like the notebook (80/20, fixed seed). The engineered
+    `features` are added and the preprocessor is fitted on the training rows
+    a single time, every candidate then fits on the same transformed matrix
+    on its own thread. The fits run in native code that releases the GIL, so
+    threads share the matrix without copying it to other processes.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Training rows with the `price` target, see `read_training_data()`.
+    candidates : list[str], optional
+        Models to train, see `make_candidate()`.
+    features : list[str], optional
+        Engineered features to add in a `FeatureEngineer` step, see `src.features`.
+    n_jobs : int, optional
+        Threads in total, defaults to the number of CPU cores.
+    test_size : float, optional
+        Share of rows held out for scoring the candidates.
+
+    Returns
+    -------
+    dict
+        `pipeline` of the winner (best R² on the held-out rows), `results` per
+        candidate (rmse, r2, fit and predict seconds, best first), the
+        `timings` of every stage in seconds, the `rows` of each split and the
+        positions of the held-out rows in `df` (`holdout_rows`).
+    """
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import Pipeline
+
+    timings = {}
+    start = time.perf_counter()
+    X = df.drop(columns=[TARGET_COL])
+    y = df[TARGET_COL]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=RANDOM_STATE)
+
+    # --- Engineered features and the preprocessor are fitted once and shared by every candidate ---
+    preprocessing, numeric_cols, categorical_cols = fit_preprocessing(X_train, features)
+    Xt_train = preprocessing.transform(X_train)
+    Xt_test = preprocessing.transform(X_test)
+    steps = list(preprocessing.steps)
+    timings["preprocess"] = time.perf_counter() - start
+
+    # --- Candidates run side by side, the multithreaded ones split the cores left over ---
+    n_jobs = n_jobs or os.cpu_count() or 1
+    n_parallel = min(n_jobs, len(candidates))
+    threads = max(1, (n_jobs - n_parallel) // max(1, sum(c in _MULTITHREADED for c in candidates)) + 1)
+    start = time.perf_counter()
+    results = Parallel(n_jobs=n_parallel, prefer="threads")(
+        delayed(_fit_candidate)(name, threads if name in _MULTITHREADED else 1, Xt_train, y_train, Xt_test, y_test)
+        for name in candidates
+    )
+    timings["train"] = time.perf_counter() - start
+    timings["candidates"] = {
+        r["name"]: {"fit": round(r["fit_seconds"], 3), "predict": round(r["predict_seconds"], 3)} for r in results
+    }
+
+    results.sort(key=lambda r: r["r2"], reverse=True)
+    winner = results[0]
+    # --- The winner is already fitted, no second training run ---
+    pipeline = Pipeline(steps + [("model", winner["model"])])
+    return {
+        "pipeline": pipeline,
+        "results": results,
+        "timings": timings,
+        "rows": {"train": len(X_train), "test": len(X_test)},
+        "holdout_rows": sorted(int(i) for i in X_test.index),
+        "numeric_features": numeric_cols,
+        "categorical_features": categorical_cols,
+    }
+
+def _top_features(pipeline, n=10):
+    model = pipeline.named_steps["model"]
+    if not hasattr(model, "feature_importances_"):
+        return None
+    names = pipeline.named_steps["preprocess"].get_feature_names_out()
+    order = np.argsort(model.feature_importances_)[::-1][:n]
+    return {str(names[i]): round(float(model.feature_importances_[i]), 5) for i in order}
+
+def _write_atomic(path, write):
+    # --- Write-then-rename, a running app reloading the model never reads half a file ---
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def _dump_json(data, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+def _data_record(data_path, rows, holdout_rows):
+    """
+    Training data of a model: file name, SHA-256, rows with a price (the rows
+    after them are new) and the positions among them of the held-out rows.
+    """
+    return {"path": os.path.basename(data_path), "sha256": file_hash(data_path), "rows": rows, "holdout": holdout_rows}
+
+def save_model(trained, model_path=MODEL_PATH, metadata_path=None, data_path=None, extra_timings=None):
+    """
+    Write the winning pipeline and its metadata file.
+
+    Parameters
+    ----------
+    trained : dict
+        Output of `train_models()`.
+    model_path : str, optional
+        Pickle to write, replaced atomically so a running app hot reloads it.
+    metadata_path : str, optional
+        Metadata JSON, defaults to `metadata.json` next to `model_path`.
+    data_path : str, optional
+        Training CSV, recorded with its SHA-256.
+    extra_timings : dict, optional
+        More stage timings in seconds to record, e.g. reading the data.
+
+    Returns
+    -------
+    dict
+        The metadata written.
+    """
+    metadata_path = metadata_path or os.path.join(os.path.dirname(model_path), METADATA_NAME)
+    pipeline = trained["pipeline"]
+    engineer = pipeline.named_steps.get("features")
+    winner = trained["results"][0]
+
+    start = time.perf_counter()
+    _write_atomic(model_path, lambda path: joblib.dump(pipeline, path))
+    save_seconds = time.perf_counter() - start
+
+    timings = {**(extra_timings or {}), **trained["timings"], "save": save_seconds}
+    metadata = {
+        "model": type(winner["model"]).__name__,
+        "model_file": os.path.basename(model_path),
+        "numeric_features": trained["numeric_features"],
+        "categorical_features": trained["categorical_features"],
+        "engineered_features": list(engineer.features) if engineer is not None else [],
+        "saved_at": datetime.datetime.now().isoformat(),
+        "rows": trained["rows"],
+        "data": _data_record(data_path, sum(trained["rows"].values()), trained["holdout_rows"]) if data_path else None,
+        "metrics": {r["name"]: {"rmse": round(r["rmse"], 2), "r2": round(r["r2"], 5)} for r in trained["results"]},
+        "timings": {
+            key: value if isinstance(value, dict) else round(value, 3) for key, value in timings.items()
+        },
+        "top_features": _top_features(pipeline),
+        "notes": "Trained by train.py: one fitted preprocessor shared by all candidates, XGBoost with tree_method='hist'.",
+    }
+    _write_atomic(metadata_path, lambda path: _dump_json(metadata, path))
+    return metadata
+
+# --- Incremental updates ---
+
+UPDATE_ROUNDS = 50
+# --- Largest relative increase of the holdout RMSE an update may cause and still be published ---
+UPDATE_TOLERANCE = 0.01
+
+def extend_vocabulary(pipeline, df):
+    """
+    Copy of a fitted pipeline whose one-hot encoder also knows the categories in `df`.
+
+    Every categorical column gets the sorted union of its fitted and new
+    categories, imputer and scaler statistics stay as fitted. New categories
+    shift the one-hot output columns, the returned mapping tells where each
+    old output column went.
+
+    Parameters
+    ----------
+    pipeline : sklearn.pipeline.Pipeline
+        Fitted pipeline with a `preprocess` step and an optional `features` step.
+    df : pd.DataFrame
+        New vehicle rows.
+
+    Returns
+    -------
+    extended : sklearn.pipeline.Pipeline
+        The copy, its model step is the unchanged fitted model.
+    mapping : np.ndarray
+        New output column of every old output column.
+    added : dict[str, list]
+        New categories per column.
+    """
+    import copy
+    from sklearn.base import clone
+
+    extended = copy.deepcopy(pipeline)
+    engineer = extended.named_steps.get("features")
+    X = engineer.transform(df) if engineer is not None else df
+    preprocessor = extended.named_steps["preprocess"]
+    columns = {name: cols for name, _, cols in preprocessor.transformers_}
+    cat = preprocessor.named_transformers_["cat"]
+    encoder_name, encoder = cat.steps[-1]
+    values = cat[:-1].transform(X[columns["cat"]])
+
+    n_num = len(columns["num"])
+    mapping = list(range(n_num))
+    categories, added = [], {}
+    offset = n_num
+    for j, (col, fitted) in enumerate(zip(columns["cat"], encoder.categories_)):
+        known = set(fitted)
+        # --- Missing values left by the imputer (None) never become a category ---
+        new = sorted({v for v in values[:, j] if isinstance(v, type(fitted[0])) and v not in known})
+        merged = np.asarray(sorted(known.union(new)), dtype=fitted.dtype)
+        position = {value: i for i, value in enumerate(merged)}
+        mapping.extend(offset + position[value] for value in fitted)
+        categories.append(merged)
+        if new:
+            added[col] = new
+        offset += len(merged)
+
+    cat.steps[-1] = (encoder_name, clone(encoder).set_params(categories=categories).fit(values))
+    preprocessor.output_indices_["cat"] = slice(n_num, offset)
+    return extended, np.asarray(mapping, dtype=np.int64), added
+
+def remap_booster(booster, mapping, n_features):
+    """
+    Copy of an XGBoost booster whose splits read the input columns given by `mapping`.
+
+    Parameters
+    ----------
+    booster : xgboost.Booster
+        Trained booster.
+    mapping : np.ndarray
+        New index of every old input column, see `extend_vocabulary()`.
+    n_features : int
+        Number of input columns after the remap.
+    """
+    import xgboost as xgb
+
+    model = json.loads(booster.save_raw("json"))
+    learner = model["learner"]
+    learner["learner_model_param"]["num_feature"] = str(n_features)
+    for tree in learner["gradient_booster"]["model"]["trees"]:
+        # --- Leaves carry split index 0, numeric columns keep their index so they stay 0 ---
+        tree["split_indices"] = mapping[np.asarray(tree["split_indices"], dtype=np.int64)].tolist()
+        tree["tree_param"]["num_feature"] = str(n_features)
+    remapped = xgb.Booster()
+    remapped.load_model(bytearray(json.dumps(model).encode("utf-8")))
+    return remapped
+
+def _rmse(pipeline, df):
+    preds = pipeline.predict(df.drop(columns=[TARGET_COL]))
+    return float(np.sqrt(np.mean((preds - df[TARGET_COL].to_numpy()) ** 2)))
+
+def update_holdout(base, new_rows, holdout_rows=None, offset=None, test_size=TEST_SIZE):
+    """
+    Split newly labelled rows into rows to boost on and a holdout.
+
+    The holdout is the model's own held-out rows of `base`, which it never
+    saw, plus `test_size` of the new rows, when there are enough of them to
+    spare. The held-out rows are never re-split, an update only adds to them.
+
+    Parameters
+    ----------
+    base : pd.DataFrame
+        Rows the model was trained and scored on, see `read_training_data()`.
+    new_rows : pd.DataFrame
+        Newly labelled rows.
+    holdout_rows : list[int], optional
+        Positions in `base` of the held-out rows, as recorded in the model's
+        metadata (`data.holdout`). Without them `base` is split like
+        `train_models()` does, which only matches while `base` is exactly
+        the data the model was trained on.
+    offset : int, optional
+        Position of the first new row in the dataset, when the new rows were
+        appended to it. Their held-out positions are then added to the
+        returned list, rows of a separate file only serve this update.
+    test_size : float, optional
+        Share of the new rows held out.
+
+    Returns
+    -------
+    fit_rows, holdout : pd.DataFrame
+    holdout_rows : list[int] or None
+        Held-out positions to record for the next update.
+    """
+    from sklearn.model_selection import train_test_split
+
+    if holdout_rows is None:
+        _, holdout = train_test_split(base, test_size=test_size, random_state=RANDOM_STATE)
+        holdout_rows = sorted(int(i) for i in holdout.index)
+    holdout = base.iloc[holdout_rows]
+    if len(new_rows) * test_size < 1:
+        return new_rows, holdout, holdout_rows
+    fit_rows, new_holdout = train_test_split(new_rows, test_size=test_size, random_state=RANDOM_STATE)
+    if offset is not None:
+        holdout_rows = holdout_rows + sorted(offset + int(i) for i in new_holdout.index)
+    return fit_rows, pd.concat([holdout, new_holdout], ignore_index=True), holdout_rows
+
+def update_model(pipeline, new_rows, holdout, rounds=UPDATE_ROUNDS, learning_rate=None, tolerance=UPDATE_TOLERANCE):
+    """
+    Continue boosting a fitted XGBoost pipeline on new rows only.
+
+    The vocabularies are extended with the categories of `new_rows` and the
+    existing trees remapped to the wider one-hot layout, so they predict
+    exactly as before. `rounds` more trees are then fitted on the new rows.
+    The update is accepted when its RMSE on `holdout` is at most `tolerance`
+    worse than the current model's.
+
+    Parameters
+    ----------
+    pipeline : sklearn.pipeline.Pipeline
+        Fitted pipeline ending in an `XGBRegressor` step named `model`.
+    new_rows : pd.DataFrame
+        Newly labelled rows with a `price`.
+    holdout : pd.DataFrame
+        Labelled rows neither model was fitted on.
+    rounds : int, optional
+        Trees to add.
+    learning_rate : float, optional
+        Learning rate of the new trees, defaults to the model's.
+    tolerance : float, optional
+        Accepted relative increase of the holdout RMSE.
+
+    Returns
+    -------
+    dict
+        The updated `pipeline`, `accepted`, `rmse_before` / `rmse_after` on the
+        holdout, the `new_categories` per column and the `timings` in seconds.
+
+    Raises
+    ------
+    ValueError
+        For pipelines whose model is not an XGBoost booster.
+    """
+    from sklearn.base import clone
+
+    regressor = pipeline.named_steps["model"]
+    if not hasattr(regressor, "get_booster"):
+        raise ValueError(f"Incremental updates need an XGBoost model, not {type(regressor).__name__}")
+    timings = {}
+    start = time.perf_counter()
+    extended, mapping, added = extend_vocabulary(pipeline, new_rows)
+    Xt = extended[:-1].transform(new_rows.drop(columns=[TARGET_COL]))
+    booster = remap_booster(regressor.get_booster(), mapping, Xt.shape[1])
+    timings["extend"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    params = {"n_estimators": rounds, "tree_method": "hist"}
+    if learning_rate is not None:
+        params["learning_rate"] = learning_rate
+    updated = clone(regressor).set_params(**params)
+    updated.fit(Xt, new_rows[TARGET_COL], xgb_model=booster)
+    extended.steps[-1] = ("model", updated)
+    timings["boost"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    before, after = _rmse(pipeline, holdout), _rmse(extended, holdout)
+    timings["holdout"] = time.perf_counter() - start
+    return {
+        "pipeline": extended,
+        "accepted": after <= before * (1 + tolerance),
+        "rmse_before": before,
+        "rmse_after": after,
+        "new_categories": added,
+        "rounds": rounds,
+        "learning_rate": updated.get_params()["learning_rate"],
+        "rows": len(new_rows),
+        "timings": timings,
+    }
+
+def save_update(update, model_path=MODEL_PATH, metadata_path=None, data_path=None, data_rows=None, holdout_rows=None):
+    """
+    Write an accepted update over the model and add it to the model's metadata.
+
+    Parameters
+    ----------
+    update : dict
+        Output of `update_model()`.
+    model_path : str, optional
+        Pickle to replace, atomically.
+    metadata_path : str, optional
+        Metadata JSON, defaults to `metadata.json` next to `model_path`.
+    data_path : str, optional
+        Dataset the new rows were appended to, recorded with its row count.
+    data_rows : int, optional
+        Rows of `data_path` the model has now seen.
+    holdout_rows : list[int], optional
+        Positions of the held-out rows of `data_path`, see `update_holdout()`.
+
+    Returns
+    -------
+    dict
+        The metadata written.
+    """
+    from src.model_loader import read_metadata
+
+    metadata_path = metadata_path or os.path.join(os.path.dirname(model_path), METADATA_NAME)
+    _write_atomic(model_path, lambda path: joblib.dump(update["pipeline"], path))
+    metadata = read_metadata(model_path) or {"model": "XGBRegressor", "model_file": os.path.basename(model_path)}
+    if data_path is not None:
+        metadata["data"] = _data_record(data_path, data_rows, holdout_rows)
+    metadata["updated_at"] = datetime.datetime.now().isoformat()
+    metadata.setdefault("updates", []).append({
+        "at": metadata["updated_at"],
+        "rows": update["rows"],
+        "rounds": update["rounds"],
+        "learning_rate": update["learning_rate"],
+        "new_categories": sum(len(v) for v in update["new_categories"].values()),
+        "rmse_before": round(update["rmse_before"], 2),
+        "rmse_after": round(update["rmse_after"], 2),
+        "timings": {key: round(value, 3) for key, value in update["timings"].items()},
+    })
+    _write_atomic(metadata_path, lambda path: _dump_json(metadata, path))
+    return metadata
@@ -0,0 +1,180 @@
+import json
+
+import numpy as np
+import scipy.sparse as sp
+
+from src.preprocess import FittedPreprocessor
+
+# --- Rows converted to a dense block at a time, bounds the scratch memory per call ---
+BLOCK_ROWS = 8192
+
+class TreeEnsemble:
+    """
+    XGBoost tree ensemble flattened into contiguous NumPy arrays.
+
+    All trees are concatenated into one node table (feature index, threshold,
+    default direction, left/right child and leaf value) with children stored
+    as global node indices. Leaves point back to themselves, so every row can
+    walk every tree in lock step for `max_depth` vectorized steps.
+
+    Parameters
+    ----------
+    booster : xgboost.Booster
+        Trained booster with numerical splits and a single regression target.
+    """
+
+    def __init__(self, booster):
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        model_param = learner["learner_model_param"]
+        if int(model_param.get("num_target", "1")) != 1 or int(model_param.get("num_class", "0")) > 1:
+            raise ValueError("Only single target regression boosters are supported")
+        if learner["objective"]["name"] not in ("reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror"):
+            raise ValueError(f"Unsupported objective: {learner['objective']['name']}")
+
+        trees = learner["gradient_booster"]["model"]["trees"]
+        if any(any(split_type != 0 for split_type in tree["split_type"]) for tree in trees):
+            raise ValueError("Categorical splits are not supported")
+
+        self.base_score = np.float32(model_param["base_score"])
+        self.n_features = int(model_param["num_feature"])
+
+        feature, threshold, default_left, left, right, value, roots = [], [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            tree_left = np.asarray(tree["left_children"], dtype=np.int32)
+            tree_right = np.asarray(tree["right_children"], dtype=np.int32)
+            nodes = np.arange(len(tree_left), dtype=np.int32)
+            is_leaf = tree_left == -1
+
+            roots.append(offset)
+            feature.append(np.asarray(tree["split_indices"], dtype=np.int32))
+            threshold.append(np.asarray(tree["split_conditions"], dtype=np.float32))
+            default_left.append(np.asarray(tree["default_left"], dtype=bool))
+            left.append(np.where(is_leaf, nodes, tree_left) + offset)
+            right.append(np.where(is_leaf, nodes, tree_right) + offset)
+            # --- Leaf weights are stored in `split_conditions` of leaf nodes ---
+            value.append(np.where(is_leaf, np.asarray(tree["split_conditions"], dtype=np.float32), 0))
+            offset += len(tree_left)
+
+        self.feature = np.concatenate(feature)
+        self.threshold = np.concatenate(threshold)
+        self.default_left = np.concatenate(default_left)
+        self.left = np.concatenate(left)
+        self.right = np.concatenate(right)
+        self.value = np.concatenate(value).astype(np.float32)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.max_depth = self._max_depth(trees)
+
+    # --- Node tables, everything `predict_dense` reads besides the scalars ---
+    ARRAYS = ("feature", "threshold", "default_left", "left", "right", "value", "roots")
+
+    def to_arrays(self):
+        """Node tables by name plus the `base_score`, `n_features` and `max_depth` scalars."""
+        scalars = {"base_score": float(self.base_score), "n_features": self.n_features, "max_depth": self.max_depth}
+        return {name: getattr(self, name) for name in self.ARRAYS}, scalars
+
+    @classmethod
+    def from_arrays(cls, arrays, scalars):
+        """
+        Rebuild from `to_arrays()` output without a booster.
+
+        The arrays are used as given, so read-only memory-mapped arrays work
+        without being copied.
+        """
+        ensemble = object.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(ensemble, name, arrays[name])
+        ensemble.base_score = np.float32(scalars["base_score"])
+        ensemble.n_features = int(scalars["n_features"])
+        ensemble.max_depth = int(scalars["max_depth"])
+        return ensemble
+
+    @staticmethod
+    def _max_depth(trees):
+        depth = 0
+        for tree in trees:
+            parents = tree["parents"]
+            for node in range(len(parents)):
+                d = 0
+                while node != 0:
+                    node = parents[node]
+                    d += 1
+                depth = max(depth, d)
+        return depth
+
+    def predict(self, X):
+        """
+        Evaluate the ensemble on a feature matrix.
+
+        Entries not stored in a sparse matrix and NaN entries in a dense one
+        are treated as missing, the same way XGBoost treats them.
+
+        Parameters
+        ----------
+        X : np.ndarray or scipy.sparse matrix
+            Preprocessed features of shape (n_rows, n_features).
+
+        Returns
+        -------
+        np.ndarray
+            float32 predictions of shape (n_rows,).
+        """
+        out = np.empty(X.shape[0], dtype=np.float32)
+        for start in range(0, X.shape[0], BLOCK_ROWS):
+            block = X[start:start + BLOCK_ROWS]
+            out[start:start + BLOCK_ROWS] = self.predict_dense(self._to_dense(block))
+        return out
+
+    def _to_dense(self, X):
+        if sp.issparse(X):
+            X = X.tocoo()
+            dense = np.full(X.shape, np.nan, dtype=np.float32)
+            dense[X.row, X.col] = X.data
+            return dense
+        return np.asarray(X, dtype=np.float32)
+
+    def predict_dense(self, X):
+        """Evaluate the ensemble on a dense float32 matrix where NaN marks missing values."""
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            go_left = np.where(np.isnan(x), self.default_left[node], x < self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.base_score + self.value[node].sum(axis=1, dtype=np.float32)
+
+class CompiledPipeline:
+    """
+    Drop-in replacement for the fitted sklearn Pipeline at prediction time.
+
+    Replaces the fitted preprocessing step with a `FittedPreprocessor` and the
+    XGBoost regressor with a `TreeEnsemble`, so `predict` skips ColumnTransformer
+    and Pipeline dispatch, DMatrix construction and the generic XGBoost predictor.
+
+    Parameters
+    ----------
+    pipeline : sklearn.pipeline.Pipeline
+        Fitted pipeline with a `preprocess` step and an XGBoost `model` step.
+    """
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.preprocessor = FittedPreprocessor.from_pipeline(pipeline)
+        self.ensemble = TreeEnsemble(pipeline.named_steps["model"].get_booster())
+
+    def predict(self, df):
+        """Predict prices for the rows of `df`, same output as `pipeline.predict`."""
+        features = self.pipeline.named_steps.get("features")
+        if features is not None:
+            df = features.transform(df)
+        out = np.empty(len(df), dtype=np.float32)
+        for start in range(0, len(df), BLOCK_ROWS):
+            block = df.iloc[start:start + BLOCK_ROWS]
+            out[start:start + BLOCK_ROWS] = self.ensemble.predict_dense(self.preprocessor.transform_dense(block))
+        return out
+
+    def __getattr__(self, name):
+        # --- Model metadata (feature_names_in_, named_steps, ...) comes from the pipeline ---
+        if name == "pipeline":
+            raise AttributeError(name)
+        return getattr(self.pipeline, name)
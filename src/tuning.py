@@ -0,0 +1,376 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.preprocess import TARGET_COL
+from src.training import RANDOM_STATE, TEST_SIZE, fit_preprocessing
+
+# --- XGBoost parameters searched and their ranges: (kind, low, high), "log" samples on a log scale ---
+SEARCH_SPACE = {
+    "max_depth": ("int", 2, 10),
+    "learning_rate": ("log", 0.01, 0.3),
+    "subsample": ("float", 0.5, 1.0),
+    "colsample_bytree": ("float", 0.3, 1.0),
+    "min_child_weight": ("log", 1.0, 20.0),
+    "reg_lambda": ("log", 0.1, 10.0),
+}
+N_FOLDS = 3
+# --- Boosting rounds of the first rung, each rung trains `ETA` times more on the best `1 / ETA` trials ---
+MIN_ROUNDS = 30
+MAX_ROUNDS = 810
+ETA = 3
+EARLY_STOPPING_ROUNDS = 20
+# --- Rows of the batch the leaderboard's throughput is measured on ---
+LATENCY_BATCH = 1000
+
+def sample_params(rng, space=SEARCH_SPACE):
+    """Random XGBoost parameters from `space`, drawn with the NumPy generator `rng`."""
+    params = {}
+    for name, (kind, low, high) in space.items():
+        if kind == "int":
+            params[name] = int(rng.integers(low, high + 1))
+        elif kind == "log":
+            params[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        else:
+            params[name] = float(rng.uniform(low, high))
+    return params
+
+def prepare_folds(df, n_folds=N_FOLDS, features=(), test_size=TEST_SIZE):
+    """
+    Preprocessed cross-validation folds of the training rows, built once for every trial.
+
+    The test split of `train_models()` is left out, so tuning never sees the
+    rows the final model is scored on. Per fold, the preprocessor is fitted on
+    the fold's training rows only, and both sides are turned into XGBoost
+    matrices. The training matrix is quantized once (`QuantileDMatrix`), the
+    trials then share it instead of binning the features again.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Training rows with the `price` target, see `src.training.read_training_data()`.
+    n_folds : int, optional
+        Number of folds.
+    features : list[str], optional
+        Engineered features to add, see `src.features`.
+    test_size : float, optional
+        Share of rows held out by `train_models()`.
+
+    Returns
+    -------
+    list[dict]
+        Per fold `dtrain`, `dvalid`, the preprocessed validation rows `X_valid`
+        and their prices `y_valid`.
+    """
+    import xgboost as xgb
+    from sklearn.model_selection import KFold, train_test_split
+
+    train, _ = train_test_split(df, test_size=test_size, random_state=RANDOM_STATE)
+    X, y = train.drop(columns=[TARGET_COL]), train[TARGET_COL].to_numpy()
+    folds = []
+    for train_idx, valid_idx in KFold(n_folds, shuffle=True, random_state=RANDOM_STATE).split(X):
+        preprocessing, _, _ = fit_preprocessing(X.iloc[train_idx], features)
+        X_train = preprocessing.transform(X.iloc[train_idx])
+        X_valid = preprocessing.transform(X.iloc[valid_idx]).tocsr()
+        dtrain = xgb.QuantileDMatrix(X_train, label=y[train_idx])
+        folds.append({
+            "dtrain": dtrain,
+            "dvalid": xgb.DMatrix(X_valid, label=y[valid_idx]),
+            "X_valid": X_valid,
+            "y_valid": y[valid_idx],
+        })
+    return folds
+
+class Budget:
+    """
+    Wall-clock and CPU time limits of a search, either may be None.
+
+    CPU time is that of the whole process, so with parallel trials it runs
+    faster than the clock.
+    """
+
+    def __init__(self, seconds=None, cpu_seconds=None):
+        self.seconds = seconds
+        self.cpu_seconds = cpu_seconds
+        self.start = time.perf_counter()
+        self.cpu_start = time.process_time()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def cpu_elapsed(self):
+        return time.process_time() - self.cpu_start
+
+    def exhausted(self):
+        return (
+            (self.seconds is not None and self.elapsed() >= self.seconds)
+            or (self.cpu_seconds is not None and self.cpu_elapsed() >= self.cpu_seconds)
+        )
+
+def _stop_callback(budget):
+    import xgboost as xgb
+
+    class StopOnBudget(xgb.callback.TrainingCallback):
+        def after_iteration(self, model, epoch, evals_log):
+            return budget.exhausted()
+
+    return StopOnBudget()
+
+class Trial:
+    """
+    One sampled configuration and its boosters, one per fold, grown rung by rung.
+
+    Parameters
+    ----------
+    trial_id : int
+        Order in which the trial was started.
+    params : dict
+        XGBoost parameters, see `sample_params()`.
+    """
+
+    def __init__(self, trial_id, params):
+        self.trial_id = trial_id
+        self.params = params
+        self.boosters = None
+        # --- Last completed rung and its scores, -1 before the first, `rounds` up to the best iteration ---
+        self.rung = -1
+        self.rmse = None
+        self.r2 = None
+        self.rounds = 0
+        self.best_rounds = []
+        self.fit_seconds = 0.0
+        # --- Early stopping ended the boosting, more rounds would not help ---
+        self.converged = False
+        self.complete = False
+        # --- Cross-validated RMSE of every rung the trial completed, and the rungs it was promoted from ---
+        self.scores = {}
+        self.promoted_from = set()
+
+    def run_rung(self, rung, rounds, folds, budget, threads=1):
+        """
+        Boost every fold up to `rounds` trees with early stopping, continuing from the last rung.
+
+        Returns False when the budget ran out before the rung was complete, its
+        partial result is then dropped.
+        """
+        import xgboost as xgb
+
+        params = {
+            **self.params, "objective": "reg:squarederror", "eval_metric": "rmse",
+            "tree_method": "hist", "nthread": threads, "seed": RANDOM_STATE,
+        }
+        start = time.perf_counter()
+        boosters = []
+        for j, fold in enumerate(folds):
+            previous = self.boosters[j] if self.boosters else None
+            done = previous.num_boosted_rounds() if previous is not None else 0
+            booster = xgb.train(
+                params, fold["dtrain"], num_boost_round=rounds - done, xgb_model=previous,
+                evals=[(fold["dvalid"], "valid")], early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                callbacks=[_stop_callback(budget)], verbose_eval=False,
+            )
+            boosters.append(booster)
+        self.fit_seconds += time.perf_counter() - start
+        if budget.exhausted():
+            return False
+
+        rmse, r2, best = [], [], []
+        for booster, fold in zip(boosters, folds):
+            # --- Without an improvement in this rung, the best iteration is still the previous rung's ---
+            n = min(booster.best_iteration + 1, booster.num_boosted_rounds())
+            preds = booster.predict(fold["dvalid"], iteration_range=(0, n))
+            mse = float(np.mean((preds - fold["y_valid"]) ** 2))
+            rmse.append(math.sqrt(mse))
+            r2.append(1 - mse / float(np.var(fold["y_valid"])))
+            best.append(n)
+        self.boosters = boosters
+        self.rmse, self.r2 = float(np.mean(rmse)), float(np.mean(r2))
+        self.best_rounds = best
+        self.rounds = int(round(np.mean(best)))
+        self.converged = any(booster.num_boosted_rounds() < rounds for booster in boosters)
+        self.scores[rung] = self.rmse
+        # --- Set last, the scheduler reads trials of a rung from other threads ---
+        self.rung = rung
+        return True
+
+class SuccessiveHalving:
+    """
+    Asynchronous successive halving (ASHA) over boosting rounds.
+
+    Rung `k` trains a trial to `min_rounds * eta**k` trees. A free worker
+    promotes a trial to the next rung once it is among the best `1 / eta` of
+    the trials that completed its rung, and starts a new trial otherwise.
+    Trials early stopped at a rung are finished and need no promotion, the
+    next best trials take their place. No
+    worker waits for a rung to fill up, bad trials are dropped after the
+    cheap first rung and the budget goes to the promising ones.
+
+    Parameters
+    ----------
+    folds : list[dict]
+        Cached fold matrices, see `prepare_folds()`.
+    budget : Budget
+        Time limits, checked between boosting rounds.
+    max_trials : int, optional
+        Trials to start at most.
+    min_rounds, max_rounds, eta : int, optional
+        Rounds of the first rung, cap of the last rung and reduction factor.
+    space : dict, optional
+        Search space, see `SEARCH_SPACE`.
+    seed : int, optional
+        Seed of the parameter sampling.
+    """
+
+    def __init__(self, folds, budget, max_trials=100, min_rounds=MIN_ROUNDS, max_rounds=MAX_ROUNDS, eta=ETA,
+                 space=SEARCH_SPACE, seed=RANDOM_STATE):
+        self.folds = folds
+        self.budget = budget
+        self.max_trials = max_trials
+        self.eta = eta
+        self.rung_rounds = []
+        rounds = min_rounds
+        while rounds < max_rounds:
+            self.rung_rounds.append(rounds)
+            rounds *= eta
+        self.rung_rounds.append(max_rounds)
+        self.space = space
+        self.rng = np.random.default_rng(seed)
+        self.trials = []
+        self._running = 0
+        self._changed = threading.Condition()
+
+    def _promotion(self):
+        # --- Top rung down, each rung ranked on every trial that completed it, promoted ones included ---
+        for rung in range(len(self.rung_rounds) - 2, -1, -1):
+            done = sorted((t for t in self.trials if rung in t.scores), key=lambda t: t.scores[rung])
+            # --- Trials early stopped at this rung are finished, they leave their promotion slot to the next best ---
+            candidates = [t for t in done if not (t.rung == rung and t.converged)]
+            for trial in candidates[:len(done) // self.eta]:
+                if rung not in trial.promoted_from and trial.rung == rung:
+                    trial.promoted_from.add(rung)
+                    return trial, rung + 1
+        return None, None
+
+    def _next_job(self):
+        with self._changed:
+            while True:
+                trial, rung = self._promotion()
+                if trial is None and len(self.trials) < self.max_trials:
+                    trial, rung = Trial(len(self.trials), sample_params(self.rng, self.space)), 0
+                    self.trials.append(trial)
+                if trial is not None:
+                    self._running += 1
+                    return trial, rung
+                # --- All trials started, a running one may still earn a promotion ---
+                if not self._running or self.budget.exhausted():
+                    return None, None
+                self._changed.wait(timeout=1.0)
+
+    def _worker(self, threads):
+        while not self.budget.exhausted():
+            trial, rung = self._next_job()
+            if trial is None:
+                return
+            try:
+                trial.run_rung(rung, self.rung_rounds[rung], self.folds, self.budget, threads)
+            finally:
+                with self._changed:
+                    self._running -= 1
+                    self._changed.notify_all()
+
+    def run(self, n_jobs=1, threads=1):
+        """
+        Search until the budget or `max_trials` is used up.
+
+        Parameters
+        ----------
+        n_jobs : int, optional
+            Trials trained in parallel, on threads sharing the fold matrices.
+        threads : int, optional
+            XGBoost threads per trial.
+
+        Returns
+        -------
+        list[Trial]
+            Trials that completed at least one rung, best first.
+        """
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            for future in [pool.submit(self._worker, threads) for _ in range(n_jobs)]:
+                future.result()
+        # --- Early stopped trials are as finished as those that reached the last rung ---
+        last = len(self.rung_rounds) - 1
+        for trial in self.trials:
+            trial.complete = trial.converged or trial.rung == last
+        scored = (t for t in self.trials if t.rung >= 0)
+        return sorted(scored, key=lambda t: (not t.complete, 0 if t.complete else -t.rung, t.rmse))
+
+def measure_latency(trial, fold, repeats=200):
+    """
+    Single-row latency (p50, p99 in ms) and batch throughput (rows/s) of a trial's model.
+
+    Measured on one thread with the first fold's booster, cut at its best
+    iteration, on preprocessed rows. Preprocessing costs the same for every
+    trial and is left out.
+    """
+    booster = trial.boosters[0][:trial.best_rounds[0]]
+    booster.set_param({"nthread": 1})
+    X = fold["X_valid"]
+    booster.inplace_predict(X[:1])
+    times = []
+    for i in range(repeats):
+        row = X[i % X.shape[0]:i % X.shape[0] + 1]
+        start = time.perf_counter()
+        booster.inplace_predict(row)
+        times.append(time.perf_counter() - start)
+    from scipy.sparse import vstack
+    batch = vstack([X] * math.ceil(LATENCY_BATCH / X.shape[0]))[:LATENCY_BATCH]
+    start = time.perf_counter()
+    booster.inplace_predict(batch)
+    batch_seconds = time.perf_counter() - start
+    return {
+        "latency_p50_ms": float(np.percentile(times, 50) * 1000),
+        "latency_p99_ms": float(np.percentile(times, 99) * 1000),
+        "rows_per_s": round(LATENCY_BATCH / batch_seconds),
+    }
+
+def leaderboard(trials, folds, top=None):
+    """
+    Table of the trials with their accuracy, training cost and inference latency.
+
+    Complete trials (early stopped or through the last rung) come first, the
+    others by the rung they reached. Within each, trials are ranked by
+    cross-validated RMSE, so a trial cut short by halving never outranks one
+    trained to the end.
+
+    Parameters
+    ----------
+    trials : list[Trial]
+        Output of `SuccessiveHalving.run()`.
+    folds : list[dict]
+        Fold matrices the trials were trained on.
+    top : int, optional
+        Rows to keep, all by default.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    rows = []
+    for rank, trial in enumerate(trials[:top], start=1):
+        rows.append({
+            "rank": rank,
+            "trial": trial.trial_id,
+            "rung": trial.rung,
+            "complete": trial.complete,
+            "rounds": trial.rounds,
+            "cv_rmse": round(trial.rmse, 2),
+            "cv_r2": round(trial.r2, 5),
+            "fit_s": round(trial.fit_seconds, 3),
+            **{key: round(value, 4) for key, value in measure_latency(trial, folds[0]).items()},
+            **{key: round(value, 5) if isinstance(value, float) else value for key, value in trial.params.items()},
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,98 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.ingest import check_columns
+
+# --- Columns added to the rejects, see `reject_column()` for their names when the upload has them too ---
+REJECT_REASON_COL = "reject_reason"
+REJECT_ROW_COL = "_row"
+# --- Plausible value ranges of numeric inputs, None leaves a side open ---
+VALUE_RANGES = {
+    "year": (1900, datetime.date.today().year + 1),
+    "mileage": (0, None),
+    "cylinders": (0, 16),
+    "doors": (0, 8),
+}
+
+def _add_reason(reasons, mask, text):
+    """Append `text`, a string or a Series indexed like the rows in `mask`, to their reasons."""
+    reasons[mask] = reasons[mask] + text + "; "
+
+def reject_column(name, columns):
+    """
+    Name under which the rejects of rows with `columns` carry the added column `name`.
+
+    The rejects keep every uploaded column, so `name` gets leading underscores
+    until it no longer clashes with one of them.
+    """
+    while name in columns:
+        name = "_" + name
+    return name
+
+def validate_batch(df, schema, ranges=VALUE_RANGES):
+    """
+    Check and coerce a batch of vehicles to the columns and dtypes a model expects.
+
+    Every check runs on a whole column at once: numeric columns are parsed with
+    `pd.to_numeric`, values that do not parse or fall outside `ranges` mark
+    their row as rejected, as do rows with no model column set at all. Missing
+    values in otherwise valid rows are left to the model's imputers.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Uploaded rows, extra columns are kept.
+    schema : dict[str, str]
+        Required columns and their dtypes, see `src.ingest.input_schema()`.
+    ranges : dict[str, tuple], optional
+        (low, high) bounds of numeric columns, either can be None.
+
+    Returns
+    -------
+    valid : pd.DataFrame
+        Rows that can be scored, model columns cast to the `schema` dtypes.
+    rejects : pd.DataFrame
+        Rejected rows as uploaded, with their 0-based `_row` position and a
+        `reject_reason` column, named by `reject_column()` when `df` has them.
+
+    Raises
+    ------
+    SchemaError
+        When a required column is missing, the whole batch is rejected.
+    """
+    check_columns(df.columns, schema)
+    reasons = pd.Series("", index=df.index, dtype=object)
+    # --- Shallow copy, replacing a column of it leaves `df` and the other columns alone ---
+    out = df.copy(deep=False)
+
+    for col, dtype in schema.items():
+        values = df[col]
+        if dtype == "object":
+            continue
+        if dtype == "category":
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                out[col] = values.astype("category")
+            continue
+        numbers = values if pd.api.types.is_numeric_dtype(values) else pd.to_numeric(values, errors="coerce")
+        unparsed = numbers.isna() & values.notna()
+        if unparsed.any():
+            _add_reason(reasons, unparsed, f"{col} is not a number (" + values[unparsed].astype(str) + ")")
+        low, high = ranges.get(col, (None, None))
+        if low is not None and (numbers < low).any():
+            _add_reason(reasons, numbers < low, f"{col} below {low}")
+        if high is not None and (numbers > high).any():
+            _add_reason(reasons, numbers > high, f"{col} above {high}")
+        out[col] = numbers.astype(dtype)
+
+    empty = df[list(schema)].isna().all(axis=1)
+    if empty.any():
+        _add_reason(reasons, empty, "no model column set")
+
+    bad = (reasons != "").to_numpy()
+    valid = out[~bad].reset_index(drop=True) if bad.any() else out
+    rejects = df[bad].copy()
+    rejects.insert(0, reject_column(REJECT_ROW_COL, df.columns), np.flatnonzero(bad))
+    rejects[reject_column(REJECT_REASON_COL, df.columns)] = reasons[bad].str[:-2]
+    return valid, rejects
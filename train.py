@@ -0,0 +1,86 @@
+import argparse
+import sys
+import time
+
+from src.dataset import DATASET_PATH
+from src.features import MODEL_FEATURES
+from src.model_loader import MODEL_PATH, read_metadata
+from src.training import (
+    CANDIDATES, TEST_SIZE, UPDATE_ROUNDS, read_training_data, save_model, save_update, train_models, update_holdout,
+    update_model,
+)
+
+def run_update(args):
+    """Boost the model at `--output` on newly labelled rows, publish it only if the holdout agrees."""
+    import joblib
+
+    base = read_training_data(args.data)
+    data = (read_metadata(args.output) or {}).get("data") or {}
+    offset = None
+    if args.update is True:
+        # --- New rows appended to the dataset since the model was trained ---
+        offset = data.get("rows")
+        if offset is None:
+            sys.exit(f"No training row count recorded for {args.output}, pass the new rows as --update NEW.csv")
+        base, new_rows = base.iloc[:offset], base.iloc[offset:].reset_index(drop=True)
+    else:
+        new_rows = read_training_data(args.update)
+    if new_rows.empty:
+        sys.exit("No new labelled rows, nothing to update")
+
+    fit_rows, holdout, holdout_rows = update_holdout(base, new_rows, data.get("holdout"), offset, args.test_size)
+    update = update_model(joblib.load(args.output), fit_rows, holdout, rounds=args.rounds, learning_rate=args.learning_rate)
+    added = sum(len(v) for v in update["new_categories"].values())
+    print(f"Boosted {update['rounds']} rounds on {len(fit_rows)} new rows ({added} new categories) "
+          f"in {sum(update['timings'].values()):.2f}s")
+    print(f"Holdout RMSE {update['rmse_before']:,.0f} -> {update['rmse_after']:,.0f} on {len(holdout)} rows")
+    if not update["accepted"]:
+        sys.exit("Holdout RMSE got worse, the model was not updated")
+    if not args.dry_run:
+        if args.update is True:
+            save_update(update, args.output, args.metadata, args.data, len(base) + len(new_rows), holdout_rows)
+        else:
+            save_update(update, args.output, args.metadata)
+        print(f"Saved the updated model to {args.output}")
+
+if __name__ == "__main__":
+    # --- Retrain the served model, e.g. `python train.py --jobs 8` after new rows were added ---
+    parser = argparse.ArgumentParser(description="Train the candidate models in parallel and save the best one.")
+    parser.add_argument("--data", default=DATASET_PATH, help="training CSV (default: dataset/dataset.csv)")
+    parser.add_argument("--output", default=MODEL_PATH, help="model file to write (default: model/vehicle_price_dt.pkl)")
+    parser.add_argument("--metadata", default=None, help="metadata file to write (default: metadata.json next to --output)")
+    parser.add_argument("--models", nargs="+", choices=CANDIDATES, default=CANDIDATES,
+                        help="candidates to train (default: all)")
+    parser.add_argument("--features", nargs="*", choices=MODEL_FEATURES, default=None,
+                        help="add engineered features, all of them when given without names")
+    parser.add_argument("--jobs", type=int, default=None, help="threads in total (default: all cores)")
+    parser.add_argument("--test-size", type=float, default=TEST_SIZE, help="held-out share of rows (default: %(default)s)")
+    parser.add_argument("--update", nargs="?", const=True, default=None, metavar="NEW.csv",
+                        help="continue boosting the model at --output on new labelled rows instead of retraining, "
+                             "the rows appended to --data since it was trained when no file is given")
+    parser.add_argument("--rounds", type=int, default=UPDATE_ROUNDS, help="trees added by --update (default: %(default)s)")
+    parser.add_argument("--learning-rate", type=float, default=None,
+                        help="learning rate of the trees added by --update (default: the model's)")
+    parser.add_argument("--dry-run", action="store_true", help="train and report without writing files")
+    args = parser.parse_args()
+    if args.update is not None:
+        run_update(args)
+        sys.exit()
+
+    start = time.perf_counter()
+    df = read_training_data(args.data)
+    read_seconds = time.perf_counter() - start
+    features = MODEL_FEATURES if args.features == [] else (args.features or ())
+    trained = train_models(df, candidates=args.models, features=features, n_jobs=args.jobs, test_size=args.test_size)
+
+    print(f"{'model':>18} {'RMSE':>12} {'R2':>8} {'fit s':>8}")
+    for result in trained["results"]:
+        print(f"{result['name']:>18} {result['rmse']:12,.0f} {result['r2']:8.4f} {result['fit_seconds']:8.2f}")
+    timings = trained["timings"]
+    fit_total = sum(r["fit_seconds"] for r in trained["results"])
+    print(f"Read {read_seconds:.2f}s, preprocess {timings['preprocess']:.2f}s, "
+          f"train {timings['train']:.2f}s wall for {fit_total:.2f}s of fitting")
+
+    if not args.dry_run:
+        save_model(trained, args.output, args.metadata, data_path=args.data, extra_timings={"read": read_seconds})
+        print(f"Saved {trained['results'][0]['name']} to {args.output}")
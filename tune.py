@@ -0,0 +1,51 @@
+import argparse
+import os
+import time
+
+from src.dataset import DATASET_PATH
+from src.features import MODEL_FEATURES
+from src.model_loader import MODEL_DIR
+from src.training import read_training_data
+from src.tuning import ETA, MAX_ROUNDS, MIN_ROUNDS, N_FOLDS, Budget, SuccessiveHalving, leaderboard, prepare_folds
+
+if __name__ == "__main__":
+    # --- Tune XGBoost within a time budget, e.g. `python tune.py --budget 600 --jobs 4` ---
+    parser = argparse.ArgumentParser(description="Search XGBoost parameters with successive halving and early stopping.")
+    parser.add_argument("--data", default=DATASET_PATH, help="training CSV (default: dataset/dataset.csv)")
+    parser.add_argument("--features", nargs="*", choices=MODEL_FEATURES, default=None,
+                        help="add engineered features, all of them when given without names")
+    parser.add_argument("--budget", type=float, default=300, help="wall-clock seconds of the search (default: %(default)s)")
+    parser.add_argument("--cpu-budget", type=float, default=None, help="CPU seconds of the search, over all threads")
+    parser.add_argument("--trials", type=int, default=100, help="configurations to try at most (default: %(default)s)")
+    parser.add_argument("--folds", type=int, default=N_FOLDS, help="cross-validation folds (default: %(default)s)")
+    parser.add_argument("--min-rounds", type=int, default=MIN_ROUNDS, help="trees of the first rung (default: %(default)s)")
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS, help="trees of the last rung (default: %(default)s)")
+    parser.add_argument("--eta", type=int, default=ETA, help="rung reduction factor (default: %(default)s)")
+    parser.add_argument("--jobs", type=int, default=None, help="trials trained in parallel (default: all cores)")
+    parser.add_argument("--seed", type=int, default=42, help="seed of the parameter sampling (default: %(default)s)")
+    parser.add_argument("--top", type=int, default=20, help="leaderboard rows (default: %(default)s)")
+    parser.add_argument("--output", default=os.path.join(MODEL_DIR, "tuning.csv"),
+                        help="leaderboard CSV to write (default: model/tuning.csv)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    features = MODEL_FEATURES if args.features == [] else (args.features or ())
+    folds = prepare_folds(read_training_data(args.data), n_folds=args.folds, features=features)
+    print(f"Prepared {args.folds} folds in {time.perf_counter() - start:.2f}s")
+
+    budget = Budget(args.budget, args.cpu_budget)
+    search = SuccessiveHalving(
+        folds, budget, max_trials=args.trials, min_rounds=args.min_rounds, max_rounds=args.max_rounds,
+        eta=args.eta, seed=args.seed,
+    )
+    trials = search.run(n_jobs=args.jobs or os.cpu_count() or 1)
+    print(f"{len(search.trials)} trials, {len(trials)} scored, rungs {search.rung_rounds}, "
+          f"{budget.elapsed():.1f}s wall, {budget.cpu_elapsed():.1f}s CPU")
+
+    board = leaderboard(trials, folds, top=args.top)
+    columns = [
+        "rank", "trial", "rung", "complete", "rounds", "cv_rmse", "cv_r2", "fit_s", "latency_p50_ms", "rows_per_s",
+    ]
+    print(board[columns].to_string(index=False))
+    board.to_csv(args.output, index=False)
+    print(f"Leaderboard with the parameters of every trial written to {args.output}")